@@ -0,0 +1,173 @@
+# app/ai/bots.py
+import asyncio
+import logging
+import multiprocessing
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List
+
+from .. import config
+from ..core import engine
+from ..core.engine import Action, ActionKind
+from ..core.models import Game
+from ..schemas import (
+    ActionResponse, ActionResponsePayload, ChooseMonster, ChooseMonsterPayload, ClientMessage, PlayerAction,
+    PlayerActionPayload,
+)
+from .mcts import ISMCTS
+
+
+def action_to_message(game: Game, action: Action) -> ClientMessage:
+    """Traduz uma Action do motor na mesma mensagem que um cliente humano enviaria."""
+    target_id = game.player_ids[action.target] if action.target >= 0 else None
+    kind = action.kind
+    if kind == ActionKind.TRAIN:
+        return PlayerAction("PLAYER_ACTION", PlayerActionPayload("Treinar"))
+    if kind == ActionKind.HUNT:
+        return PlayerAction("PLAYER_ACTION", PlayerActionPayload("Caçar"))
+    if kind == ActionKind.FINAL_STRIKE:
+        return PlayerAction("PLAYER_ACTION", PlayerActionPayload("Golpe Final", target_id))
+    if kind == ActionKind.ABILITY:
+        return PlayerAction("PLAYER_ACTION", PlayerActionPayload(engine.MONSTER_NAMES[action.card], target_id))
+    if kind == ActionKind.ALLOW:
+        return ActionResponse("ACTION_RESPONSE", ActionResponsePayload(contested=False))
+    if kind == ActionKind.CHALLENGE:
+        return ActionResponse("ACTION_RESPONSE", ActionResponsePayload(contested=True))
+    if kind == ActionKind.BLOCK:
+        return ActionResponse("ACTION_RESPONSE", ActionResponsePayload(block_with=engine.MONSTER_NAMES[action.card]))
+    return ChooseMonster("CHOOSE_MONSTER", ChooseMonsterPayload(engine.MONSTER_NAMES[action.card]))
+
+
+class BotPlayer:
+    def __init__(self, game_id: str, player_id: str):
+        self.game_id = game_id
+        self.player_id = player_id
+        self.searcher: ISMCTS | None = None
+        self.seen_actions = 0  # Quantas ações do histórico do jogo a árvore já acompanhou
+        self.thinking = False
+        self.failures = 0  # Buscas seguidas que terminaram em exceção
+
+    def _catch_up(self, game: Game, n_actions: int):
+        # Reaproveita a árvore descendo pelas ações jogadas desde a última jogada do bot.
+        seat = game.players[self.player_id]
+        if self.searcher is None:
+            self.searcher = ISMCTS(seat)
+            self.seen_actions = n_actions
+            return
+        for state_before, action in game.history[self.seen_actions:n_actions]:
+            hidden = (
+                state_before.phase == engine.Phase.AWAITING_CHOICE
+                and state_before.choice == engine.ChoiceKind.SWAP
+                and action.actor != seat
+            )
+            # A carta trocada pelo Falcão de um oponente é secreta: não dá para seguir o ramo certo.
+            if hidden:
+                self.searcher.reset()
+            else:
+                self.searcher.advance(action)
+        self.seen_actions = n_actions
+
+    def decide(self, game: Game, state: engine.State, n_actions: int, deadline: float, map_fn) -> Action:
+        self._catch_up(game, n_actions)
+        return self.searcher.search(state, deadline, config.BOT_ROLLOUT_BATCH, map_fn)
+
+
+class BotManager:
+    def __init__(
+        self,
+        move_budget_ms: int = config.BOT_MOVE_BUDGET_MS,
+        search_threads: int = config.BOT_SEARCH_THREADS,
+        rollout_workers: int = config.BOT_ROLLOUT_WORKERS,
+        max_failures: int = config.BOT_MAX_SEARCH_FAILURES,
+    ):
+        self.bots: Dict[str, Dict[str, BotPlayer]] = {}
+        self.move_budget = move_budget_ms / 1000
+        self.max_failures = max_failures
+        # A busca roda fora do event loop; os rollouts em lote, a maior parte da CPU de uma jogada, vão
+        # para um pool de processos: numa thread eles disputariam o GIL com o event loop.
+        self._search_threads = ThreadPoolExecutor(search_threads, thread_name_prefix="bot-search")
+        self._rollout_workers = rollout_workers
+        self._rollout_pool: ProcessPoolExecutor | None = None
+
+    def _map_fn(self):
+        if self._rollout_workers <= 0:
+            return map
+        if self._rollout_pool is None:
+            # spawn, como os shards: um fork deste processo copiaria as threads da busca e o event loop.
+            self._rollout_pool = ProcessPoolExecutor(self._rollout_workers, multiprocessing.get_context("spawn"))
+        return self._rollout_pool.map
+
+    def shutdown(self):
+        if self._rollout_pool is not None:
+            self._rollout_pool.shutdown(wait=False, cancel_futures=True)
+            self._rollout_pool = None
+
+    def new_bot_id(self, game: Game) -> str:
+        # Sai dos ids já na mesa, não de um contador do processo: bots recuperados após um restart
+        # continuam com seus ids, e o próximo não pode colidir com eles.
+        taken = {int(pid[4:]) for pid in game.players if pid.startswith("bot-") and pid[4:].isdigit()}
+        return f"bot-{max(taken, default=0) + 1}"
+
+    def add_bot(self, game: Game, player_id: str) -> BotPlayer:
+        bot = BotPlayer(game.id, player_id)
+        self.bots.setdefault(game.id, {})[player_id] = bot
+        return bot
+
+    def remove_bot(self, game_id: str, player_id: str):
+        bots = self.bots.get(game_id)
+        if bots:
+            bots.pop(player_id, None)
+            if not bots:
+                del self.bots[game_id]
+
+    def remove_game(self, game_id: str):
+        self.bots.pop(game_id, None)
+
+    def claim_bots_to_move(self, game: Game) -> List[BotPlayer]:
+        """Bots que precisam agir agora e ainda não estão pensando; já ficam marcados como pensando."""
+        bots = self.bots.get(game.id)
+        if not bots or game.state is None:
+            return []
+        if game.state.phase == engine.Phase.FINISHED:
+            self.remove_game(game.id)
+            return []
+        acting = {game.player_ids[seat] for seat in engine.acting_players(game.state)}
+        claimed = [bot for pid, bot in bots.items() if pid in acting and not bot.thinking]
+        for bot in claimed:
+            bot.thinking = True
+        return claimed
+
+    async def choose_message(self, game: Game, bot: BotPlayer) -> ClientMessage | None:
+        """Busca a jogada do bot sem bloquear o event loop. None se não é a vez dele, o jogo mudou ou a busca falhou."""
+        version, state, n_actions = game.version, game.state, len(game.history)
+        seat = game.players.get(bot.player_id)
+        try:
+            if seat not in engine.acting_players(state):
+                return None  # Sem ação legal: a busca queimaria o orçamento para nada
+            deadline = time.monotonic() + self.move_budget
+            loop = asyncio.get_running_loop()
+            action = await loop.run_in_executor(
+                self._search_threads, bot.decide, game, state, n_actions, deadline, self._map_fn()
+            )
+            bot.failures = 0
+        except Exception:
+            logging.exception(f"Bot {bot.player_id} failed to choose a move in game {game.id}")
+            bot.failures += 1
+            if bot.failures < self.max_failures:
+                return None  # A sessão chama o bot de novo
+            # Falha que se repete (ex.: sempre no mesmo estado): uma ação legal qualquer destrava o jogo,
+            # e a árvore, talvez a causa, é refeita na próxima busca.
+            logging.warning(f"Bot {bot.player_id} plays a random legal move after {bot.failures} failed searches")
+            bot.failures = 0
+            bot.searcher = None
+            action = random.choice([a for a in engine.legal_actions(state) if a.actor == seat])
+        finally:
+            bot.thinking = False
+        if game.version != version:
+            return None
+        return action_to_message(game, action)
+
+
+# Instância global para ser usada no app
+bot_manager = BotManager()
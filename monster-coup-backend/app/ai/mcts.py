@@ -0,0 +1,147 @@
+# app/ai/mcts.py
+# Information-set MCTS (single observer) sobre o motor de regras.
+# O bot não conhece as mãos dos oponentes nem a ordem do baralho: a cada iteração ele sorteia
+# uma "determinização" consistente com o que vê (a própria mão e as cartas reveladas) e desce
+# uma árvore única compartilhada entre as determinizações. Ações que não existem na
+# determinização sorteada ficam de fora da seleção (contagem de disponibilidade).
+import math
+import random
+import time
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from ..core import engine
+from ..core.engine import Action, State
+from ..sim.policies import POLICIES, next_action
+
+EXPLORATION = 0.7
+ROLLOUT_POLICY = POLICIES["honest"]
+MAX_ROLLOUT_STEPS = 500
+
+FULL_DECK = Counter({card: engine.COPIES_PER_MONSTER for card in engine.Card})
+
+RolloutJob = Tuple[State, int]
+MapFn = Callable[[Callable, Iterable], Iterable]
+
+
+class Node:
+    __slots__ = ("parent", "action", "children", "visits", "wins", "availability")
+
+    def __init__(self, parent: "Node | None" = None, action: Action | None = None):
+        self.parent = parent
+        self.action = action
+        self.children: Dict[Action, Node] = {}
+        self.visits = 0
+        self.wins = 0.0
+        self.availability = 1
+
+    def ucb(self) -> float:
+        return self.wins / self.visits + EXPLORATION * math.sqrt(math.log(self.availability) / self.visits)
+
+
+def determinize(state: State, seat: int, rng: random.Random) -> State:
+    """Sorteia mãos dos oponentes, ordem do baralho e RNG compatíveis com a visão de `seat`."""
+    unseen = FULL_DECK.copy()
+    unseen.subtract(state.players[seat].hand)
+    for player in state.players:
+        unseen.subtract(player.revealed)
+    cards = list(unseen.elements())
+    rng.shuffle(cards)
+
+    players = []
+    offset = 0
+    for other, player in enumerate(state.players):
+        if other == seat:
+            players.append(player)
+            continue
+        size = len(player.hand)
+        players.append(player._replace(hand=bytes(cards[offset:offset + size])))
+        offset += size
+    return state._replace(players=tuple(players), deck=bytes(cards[offset:]), rng=rng.getrandbits(64))
+
+
+def rollout(job: RolloutJob) -> int:
+    """Joga até o fim com a política scriptada e devolve o assento vencedor (-1 se não terminou)."""
+    state, seed = job
+    rng = random.Random(seed)
+    policies = (ROLLOUT_POLICY,) * len(state.players)
+    for _ in range(MAX_ROLLOUT_STEPS):
+        if state.phase == engine.Phase.FINISHED:
+            break
+        state = engine.apply(state, next_action(state, policies, rng))
+    return state.winner
+
+
+class ISMCTS:
+    def __init__(self, seat: int, seed: int | None = None):
+        self.seat = seat
+        self.rng = random.Random(seed)
+        self.root = Node()
+
+    # --- Reuso da árvore entre turnos ---
+    def reset(self):
+        self.root = Node()
+
+    def advance(self, action: Action):
+        """Desce a raiz pela ação observada; se ela nunca foi explorada, começa uma árvore nova."""
+        child = self.root.children.get(action)
+        if child is None:
+            self.reset()
+            return
+        child.parent = None
+        self.root = child
+
+    # --- Busca ---
+    def _select(self, state: State) -> Tuple[List[Node], State]:
+        node = self.root
+        path = [node]
+        while state.phase != engine.Phase.FINISHED:
+            legal = engine.legal_actions(state)
+            untried = [a for a in legal if a not in node.children]
+            for action in legal:
+                child = node.children.get(action)
+                if child is not None:
+                    child.availability += 1
+            if untried:
+                action = self.rng.choice(untried)
+                child = node.children[action] = Node(node, action)
+                path.append(child)
+                state = engine.apply(state, action)
+                break
+            node = max((node.children[a] for a in legal), key=Node.ucb)
+            path.append(node)
+            state = engine.apply(state, node.action)
+        # Perda virtual: a visita conta antes do resultado, para que seleções do mesmo lote divirjam.
+        for visited in path:
+            visited.visits += 1
+        return path, state
+
+    def _backpropagate(self, path: Sequence[Node], actors: Sequence[int], winner: int):
+        for node, actor in zip(path[1:], actors):
+            if actor == winner:
+                node.wins += 1
+
+    def search(self, state: State, deadline: float, batch_size: int = 8, map_fn: MapFn = map) -> Action:
+        """Roda iterações em lotes até o deadline (time.monotonic) e devolve a ação mais visitada."""
+        legal = [a for a in engine.legal_actions(state) if a.actor == self.seat]
+        if not legal:
+            raise ValueError(f"Seat {self.seat} has no legal action")  # Falha já, sem gastar o orçamento
+        if len(legal) == 1:
+            return legal[0]
+
+        while True:
+            batch = []
+            for _ in range(batch_size):
+                path, leaf_state = self._select(determinize(state, self.seat, self.rng))
+                actors = [node.action.actor for node in path[1:]]
+                batch.append((path, actors, (leaf_state, self.rng.getrandbits(64))))
+            winners = map_fn(rollout, [job for _, _, job in batch])
+            for (path, actors, _), winner in zip(batch, winners):
+                self._backpropagate(path, actors, winner)
+            if time.monotonic() >= deadline:
+                break
+
+        visited = [self.root.children[a] for a in legal if a in self.root.children]
+        if not visited:
+            return self.rng.choice(legal)
+        return max(visited, key=lambda node: node.visits).action
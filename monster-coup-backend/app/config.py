@@ -0,0 +1,91 @@
+# app/config.py
+import os
+
+# Todas as opções podem ser sobrescritas por variáveis de ambiente MONSTER_COUP_*.
+def _env(name: str, default: str) -> str:
+    return os.getenv(f"MONSTER_COUP_{name}", default)
+
+
+# --- Envio para os websockets (ConnectionManager) ---
+# Tamanho máximo da fila de saída de cada conexão.
+SEND_QUEUE_SIZE = int(_env("SEND_QUEUE_SIZE", "64"))
+# O que fazer quando a fila enche: DROP_OLDEST, COALESCE ou DISCONNECT.
+SEND_OVERFLOW_POLICY = _env("SEND_OVERFLOW_POLICY", "COALESCE")
+# Tempo máximo (segundos) para um envio antes de derrubar o cliente.
+SEND_TIMEOUT = float(_env("SEND_TIMEOUT", "5"))
+
+# --- Estado do jogo ---
+# Quantas versões do estado cada jogo guarda para gerar deltas; clientes mais atrasados recebem snapshot.
+STATE_HISTORY_SIZE = int(_env("STATE_HISTORY_SIZE", "32"))
+# Encoder JSON das mensagens enviadas: "orjson" (padrão quando instalado) ou "json".
+JSON_ENCODER = _env("JSON_ENCODER", "orjson")
+
+# --- Bots (app/ai) ---
+# Tempo de busca por jogada do bot, em milissegundos.
+BOT_MOVE_BUDGET_MS = int(_env("BOT_MOVE_BUDGET_MS", "200"))
+# Threads que rodam a busca MCTS fora do event loop.
+BOT_SEARCH_THREADS = int(_env("BOT_SEARCH_THREADS", "4"))
+# Processos para os rollouts em lote (0 = rollouts na própria thread da busca, disputando o GIL com o event loop).
+BOT_ROLLOUT_WORKERS = int(_env("BOT_ROLLOUT_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Rollouts avaliados por lote.
+BOT_ROLLOUT_BATCH = int(_env("BOT_ROLLOUT_BATCH", "16"))
+# Buscas seguidas que podem falhar antes de o bot jogar uma ação legal sorteada, em vez de buscar de novo para sempre.
+BOT_MAX_SEARCH_FAILURES = int(_env("BOT_MAX_SEARCH_FAILURES", "3"))
+
+# --- Jogos ---
+# Número de processos worker entre os quais os jogos são distribuídos (hash do game_id).
+# 0 mantém todos os jogos no processo do servidor.
+GAME_SHARDS = int(_env("GAME_SHARDS", "0"))
+
+# --- Remoção de jogos (reaper) ---
+# Segundos que um jogo pode ficar esperando jogadores antes de ser removido.
+GAME_TTL_WAITING = float(_env("GAME_TTL_WAITING", "900"))
+# Segundos que um jogo em andamento sem nenhum jogador conectado é mantido.
+GAME_TTL_ABANDONED = float(_env("GAME_TTL_ABANDONED", "300"))
+# Segundos que um jogo terminado é mantido para os clientes verem o resultado.
+GAME_TTL_FINISHED = float(_env("GAME_TTL_FINISHED", "60"))
+# Máximo de jogos por processo; ao criar um jogo além disso, o usado há mais tempo é removido.
+MAX_GAMES = int(_env("MAX_GAMES", "10000"))
+# Intervalo (segundos) entre as passadas do reaper (0 desliga).
+REAPER_INTERVAL = float(_env("REAPER_INTERVAL", "10"))
+
+# --- Log de eventos (recuperação após reinício) ---
+# Diretório dos segmentos do log e dos snapshots. Vazio (o padrão) desliga a persistência: um caminho
+# relativo gravaria onde quer que o servidor (ou os testes) fosse iniciado.
+EVENT_LOG_DIR = _env("EVENT_LOG_DIR", "")
+# Intervalo (segundos) entre as gravações em lote, cada uma com um único fsync.
+EVENT_LOG_FSYNC_INTERVAL = float(_env("EVENT_LOG_FSYNC_INTERVAL", "0.05"))
+# Tamanho a partir do qual o segmento atual é fechado e um novo é aberto.
+EVENT_LOG_SEGMENT_BYTES = int(_env("EVENT_LOG_SEGMENT_BYTES", str(64 * 1024 * 1024)))
+# Snapshot de todos os jogos após este número de eventos; limita o que é reprocessado ao reiniciar.
+SNAPSHOT_EVERY_EVENTS = int(_env("SNAPSHOT_EVERY_EVENTS", "50000"))
+# Snapshot também após este intervalo (segundos), se houve algum evento.
+SNAPSHOT_INTERVAL = float(_env("SNAPSHOT_INTERVAL", "60"))
+
+# --- Métricas (/metrics) e profiling ---
+# Liga as medições de tempo do caminho quente (histogramas); os contadores e gauges ficam sempre ativos.
+METRICS_ENABLED = _env("METRICS_ENABLED", "1") == "1"
+# Intervalo (segundos) entre as medições do atraso do event loop.
+EVENT_LOOP_LAG_INTERVAL = float(_env("EVENT_LOOP_LAG_INTERVAL", "0.25"))
+# Intervalo (segundos) entre as amostras do profiler de um jogo (ligado em /debug/profile/{game_id}).
+PROFILE_SAMPLE_INTERVAL = float(_env("PROFILE_SAMPLE_INTERVAL", "0.005"))
+
+# --- Reconexão ---
+# Mensagens guardadas por jogador para reenviar numa reconexão (?seq=N); além disso, sincroniza o estado.
+RESUME_BUFFER_SIZE = int(_env("RESUME_BUFFER_SIZE", "32"))
+
+# --- Matchmaking (/matchmake) ---
+# Tamanho da mesa quando o cliente não informa ?size (de 2 a 6).
+MATCH_SIZE = int(_env("MATCH_SIZE", "2"))
+# Largura de cada faixa de rating; 0 junta todos os ratings numa faixa só.
+MATCH_BRACKET_WIDTH = float(_env("MATCH_BRACKET_WIDTH", "100"))
+# A cada este intervalo (segundos) de espera, a busca inclui mais uma faixa vizinha de cada lado; 0 nunca alarga.
+MATCH_WIDEN_AFTER = float(_env("MATCH_WIDEN_AFTER", "10"))
+# Rating de quem não informa ?rating.
+MATCH_DEFAULT_RATING = float(_env("MATCH_DEFAULT_RATING", "1500"))
+
+# --- Espectadores (/ws/{game_id}/spectate) ---
+# Intervalo mínimo (segundos) entre dois envios a um espectador; as versões do meio são puladas. 0 envia todas.
+SPECTATOR_MIN_INTERVAL = float(_env("SPECTATOR_MIN_INTERVAL", "0.1"))
+# Atraso (segundos) com que os espectadores veem o jogo; 0 mostra em tempo real.
+SPECTATOR_DELAY = float(_env("SPECTATOR_DELAY", "0"))
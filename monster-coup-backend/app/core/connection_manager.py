@@ -0,0 +1,425 @@
+# app/core/connection_manager.py
+import asyncio
+import itertools
+import logging
+import time
+from collections import deque
+from enum import Enum
+from typing import Callable, Deque, Dict, List, NamedTuple, Tuple, Union
+
+from fastapi import WebSocket
+
+from .. import config
+from . import metrics, wire
+from .serialization import EncodedMessage, dumps, encode_message
+
+
+class OverflowPolicy(str, Enum):
+    DROP_OLDEST = "DROP_OLDEST"  # Descarta a atualização de estado mais antiga da fila
+    COALESCE = "COALESCE"        # Substitui a atualização de estado pendente pela nova
+    DISCONNECT = "DISCONNECT"    # Derruba o cliente que não está dando conta
+
+
+# Mensagens de estado podem ser descartadas/substituídas. Se um GAME_STATE_DELTA se perder,
+# o cliente percebe pelo base_version e pede um SYNC.
+STATE_MESSAGE_TYPES = {"GAME_STATE_UPDATE", "GAME_STATE_DELTA", "PRIVATE_STATE"}
+
+
+# Snapshots e broadcasts chegam já codificados; deltas e mensagens pontuais chegam como dict.
+Message = Union[dict, EncodedMessage]
+
+
+class Resume(NamedTuple):
+    # Resposta da sessão do jogo a uma conexão nova: libera o envio, começando por estas mensagens.
+    # replay=True: são as mensagens perdidas desde o seq do cliente e substituem o que já estava na fila
+    # (tudo ali já está entre elas). replay=False: sincronização de estado, enviada depois da fila, no
+    # lugar das atualizações de estado que esperavam nela.
+    connection_id: int
+    messages: List[Message]
+    replay: bool
+
+
+class SpectatorUpdate(NamedTuple):
+    # Estado público de uma nova versão para os espectadores do jogo: o mesmo texto para todos.
+    message: EncodedMessage
+
+
+def _message_type(message: Message) -> str | None:
+    return message.type if isinstance(message, EncodedMessage) else message.get("type")
+
+
+def _is_state_message(message: Message) -> bool:
+    return _message_type(message) in STATE_MESSAGE_TYPES
+
+
+class PlayerConnection:
+    # Cada conexão tem sua própria fila limitada e uma task escritora dedicada.
+    # Assim um cliente lento só atrasa a si mesmo, nunca o fan-out dos outros jogadores.
+    _ids = itertools.count(1)
+
+    def __init__(
+        self, websocket: WebSocket, max_queue: int, policy: OverflowPolicy, send_timeout: float, binary: bool = False,
+    ):
+        self.id = next(self._ids)
+        self.websocket = websocket
+        self.binary = binary  # Subprotocolo monster-coup.msgpack
+        self.max_queue = max_queue
+        self.policy = policy
+        self.send_timeout = send_timeout
+        self.queue: Deque[Message] = deque()
+        self.dropped = 0
+        self.closed = False
+        # Nada é enviado antes do Resume: a fila acumula o que chegar enquanto isso.
+        self.paused = True
+        self._ready = asyncio.Event()
+        self._writer_task: asyncio.Task | None = None
+
+    def start(self, on_failure: Callable[[], None]):
+        self._writer_task = asyncio.create_task(self._writer(on_failure))
+
+    def enqueue(self, message: Message) -> bool:
+        """Enfileira sem bloquear. Retorna False se a conexão deve ser derrubada."""
+        if self.closed:
+            return False
+        if len(self.queue) >= self.max_queue:
+            if self.policy == OverflowPolicy.DISCONNECT:
+                return False
+            self.dropped += 1
+            metrics.dropped_messages.inc()
+            if self.policy == OverflowPolicy.COALESCE and self._coalesce(message):
+                return True
+            self._drop_oldest()
+        self.queue.append(message)
+        self._ready.set()
+        return True
+
+    def _coalesce(self, message: Message) -> bool:
+        # O resultado sai da posição da atualização substituída e vai para o fim da fila: leva o seq da
+        # mensagem nova, e os seqs precisam chegar ao cliente em ordem crescente.
+        if not _is_state_message(message):
+            return False
+        for i in range(len(self.queue) - 1, -1, -1):
+            queued = self.queue[i]
+            if not _is_state_message(queued):
+                continue
+            if _message_type(message) != "GAME_STATE_DELTA":
+                # Um snapshot substitui qualquer atualização pendente.
+                del self.queue[i]
+                self.queue.append(message)
+                return True
+            if _message_type(queued) == "GAME_STATE_DELTA" and queued["version"] == message["base_version"]:
+                # Deltas consecutivos viram um só: os patches são aplicados em sequência.
+                merged = dict(queued, version=message["version"], patch=queued["patch"] + message["patch"])
+                if "seq" in message:
+                    merged["seq"] = message["seq"]  # O cliente passa a ter tudo até o seq do último
+                del self.queue[i]
+                self.queue.append(merged)
+                return True
+            return False
+        return False
+
+    def _drop_oldest(self):
+        for i, queued in enumerate(self.queue):
+            if _is_state_message(queued):
+                del self.queue[i]
+                return
+        self.queue.popleft()
+
+    async def _writer(self, on_failure: Callable[[], None]):
+        try:
+            while True:
+                while self.paused or not self.queue:
+                    self._ready.clear()
+                    await self._ready.wait()
+                message = self.queue.popleft()
+                message_type = _message_type(message)
+                started = time.perf_counter()
+                if self.binary:
+                    data = wire.pack(message)
+                    await asyncio.wait_for(self.websocket.send_bytes(data), self.send_timeout)
+                else:
+                    data = message.text if isinstance(message, EncodedMessage) else dumps(message)
+                    await asyncio.wait_for(self.websocket.send_text(data), self.send_timeout)
+                # Codificação (dos deltas) + escrita no socket, até o transporte aceitar os bytes.
+                metrics.phase_seconds.observe(time.perf_counter() - started, "send", message_type)
+                metrics.sent_messages.inc(1, message_type)
+                metrics.sent_bytes.inc(len(data))
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:  # Timeout ou socket morto
+            logging.warning(f"Dropping slow or dead connection: {exc!r}")
+            on_failure()
+
+    def resume(self, messages: List[Message], replay: bool):
+        if replay:
+            self.queue.clear()
+        elif any(map(_is_state_message, messages)):
+            # O snapshot da sincronização substitui as atualizações de estado que esperavam na fila:
+            # deltas de antes dele partem de versões que o cliente não tem.
+            self.queue = deque(m for m in self.queue if not _is_state_message(m))
+        self.queue.extend(messages)
+        self.paused = False
+        self._ready.set()
+
+    def close(self, code: int = 1011):
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.clear()
+        if self._writer_task and self._writer_task is not asyncio.current_task():
+            self._writer_task.cancel()
+        asyncio.create_task(self._close_socket(code))
+
+    async def _close_socket(self, code: int):
+        try:
+            await asyncio.wait_for(self.websocket.close(code=code), self.send_timeout)
+        except Exception:
+            pass
+
+
+class SpectatorGroup:
+    # Espectadores de um jogo. Não há fila por conexão: o grupo guarda só a última versão publicada e
+    # cada escritor envia a mais recente quando termina o envio anterior. Um espectador lento pula
+    # versões em vez de acumular atraso, e publicar custa o mesmo com 1 ou 5000 espectadores.
+    def __init__(self, delay: float, min_interval: float, send_timeout: float):
+        self.delay = delay
+        self.min_interval = min_interval
+        self.send_timeout = send_timeout
+        self.latest: EncodedMessage | None = None
+        self._packed: Tuple[EncodedMessage, bytes] | None = None  # latest em MessagePack, para os binários
+        self.connections: Dict[WebSocket, Tuple[asyncio.Task, Callable[[], None]]] = {}  # -> (escritor, on_failure)
+        self._sending: Dict[WebSocket, float] = {}  # Envios em andamento -> início
+        self._changed = asyncio.Event()
+        self._watchdog: asyncio.Task | None = None
+
+    def publish(self, message: EncodedMessage):
+        if self.delay > 0:
+            asyncio.get_running_loop().call_later(self.delay, self._publish, message)
+        else:
+            self._publish(message)
+
+    def _publish(self, message: EncodedMessage):
+        if self.latest is not None and message.version <= self.latest.version:
+            return  # Um espectador que entrou depois já trouxe esta versão (ou uma mais nova)
+        self.latest = message
+        # Acordar milhares de escritores custa milissegundos: fica para depois das tarefas já agendadas,
+        # entre elas os escritores dos jogadores que o mesmo comando acabou de acordar.
+        asyncio.get_running_loop().call_soon(self._wake)
+
+    def _wake(self):
+        # Acorda quem está esperando; os próximos esperam um evento novo.
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def add(self, websocket: WebSocket, on_failure: Callable[[], None], binary: bool = False):
+        self.connections[websocket] = (asyncio.create_task(self._writer(websocket, on_failure, binary)), on_failure)
+        if self._watchdog is None:
+            self._watchdog = asyncio.create_task(self._watch())
+
+    def remove(self, websocket: WebSocket) -> bool:
+        """Tira o espectador do grupo; False se ele já tinha saído."""
+        entry = self.connections.pop(websocket, None)
+        if entry is None:
+            return False
+        self._sending.pop(websocket, None)
+        if entry[0] is not asyncio.current_task():
+            entry[0].cancel()
+        if not self.connections and self._watchdog:
+            self._watchdog.cancel()
+            self._watchdog = None
+        return True
+
+    def _binary(self, message: EncodedMessage) -> bytes:
+        # Convertido uma vez por versão, na primeira conexão binária que a envia.
+        if self._packed is None or self._packed[0] is not message:
+            self._packed = (message, wire.pack(message))
+        return self._packed[1]
+
+    async def _writer(self, websocket: WebSocket, on_failure: Callable[[], None], binary: bool):
+        sent = None
+        try:
+            while True:
+                message = self.latest
+                if message is None or message is sent:
+                    await self._changed.wait()
+                    continue
+                started = self._sending[websocket] = time.perf_counter()
+                if binary:
+                    data = self._binary(message)
+                    await websocket.send_bytes(data)
+                else:
+                    data = message.text
+                    await websocket.send_text(data)
+                del self._sending[websocket]
+                metrics.phase_seconds.observe(time.perf_counter() - started, "send", "SPECTATOR")
+                metrics.sent_messages.inc(1, "SPECTATOR")
+                metrics.sent_bytes.inc(len(data))
+                sent = message
+                if self.min_interval > 0:
+                    await asyncio.sleep(self.min_interval)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:  # Socket morto
+            logging.warning(f"Dropping dead spectator: {exc!r}")
+            on_failure()
+
+    async def _watch(self):
+        # Prazo dos envios: um timer para o grupo todo em vez de um wait_for por envio, que com
+        # milhares de espectadores custa mais que o próprio envio.
+        while True:
+            await asyncio.sleep(self.send_timeout / 2)
+            deadline = time.perf_counter() - self.send_timeout
+            for websocket, started in list(self._sending.items()):
+                if started < deadline and websocket in self.connections:
+                    logging.warning("Dropping slow spectator: send timed out")
+                    self.connections[websocket][1]()
+
+
+class ConnectionManager:
+    # Estrutura para associar websocket ao player_id dentro de um jogo.
+    # Isso facilita o envio de mensagens privadas e o gerenciamento de reconexões.
+    def __init__(
+        self,
+        max_queue: int = config.SEND_QUEUE_SIZE,
+        policy: OverflowPolicy | str = config.SEND_OVERFLOW_POLICY,
+        send_timeout: float = config.SEND_TIMEOUT,
+        spectator_delay: float = config.SPECTATOR_DELAY,
+        spectator_min_interval: float = config.SPECTATOR_MIN_INTERVAL,
+    ):
+        self.active_connections: Dict[str, Dict[str, PlayerConnection]] = {}
+        # Espectadores ficam à parte: o fan-out dos jogadores nunca passa por eles.
+        self.spectators: Dict[str, SpectatorGroup] = {}
+        self.max_queue = max_queue
+        self.policy = OverflowPolicy(policy)
+        self.send_timeout = send_timeout
+        self.spectator_delay = spectator_delay
+        self.spectator_min_interval = spectator_min_interval
+
+    async def connect(self, websocket: WebSocket, game_id: str, player_id: str, subprotocol: str | None = None) -> int:
+        """Aceita o socket e devolve o id da conexão, que a sessão do jogo usa no Resume."""
+        await websocket.accept(subprotocol=subprotocol)
+        connections = self.active_connections.setdefault(game_id, {})
+        previous = connections.get(player_id)
+        if previous:
+            previous.close()
+        connection = PlayerConnection(websocket, self.max_queue, self.policy, self.send_timeout, wire.is_binary(subprotocol))
+        connections[player_id] = connection
+        connection.start(lambda: self.disconnect(game_id, player_id, websocket))
+        logging.info(f"Player {player_id} connected to game {game_id}")
+        return connection.id
+
+    def disconnect(self, game_id: str, player_id: str, websocket: WebSocket | None = None):
+        connections = self.active_connections.get(game_id)
+        connection = connections.get(player_id) if connections else None
+        if not connection:
+            return
+        # Uma reconexão pode já ter substituído este socket; não derruba a conexão nova.
+        if websocket is not None and connection.websocket is not websocket:
+            return
+        del connections[player_id]
+        if not connections:
+            del self.active_connections[game_id]
+        connection.close()
+        logging.info(f"Player {player_id} disconnected from game {game_id}")
+
+    async def spectate(self, websocket: WebSocket, game_id: str, subprotocol: str | None = None):
+        await websocket.accept(subprotocol=subprotocol)
+        group = self.spectators.get(game_id)
+        if group is None:
+            group = self.spectators[game_id] = SpectatorGroup(
+                self.spectator_delay, self.spectator_min_interval, self.send_timeout
+            )
+        group.add(websocket, lambda: self.stop_spectating(game_id, websocket, close=True), wire.is_binary(subprotocol))
+
+    def stop_spectating(self, game_id: str, websocket: WebSocket, close: bool = False, code: int = 1011) -> bool:
+        """Tira o espectador do jogo; False se ele já tinha saído (ex.: derrubado por lentidão)."""
+        group = self.spectators.get(game_id)
+        if group is None or not group.remove(websocket):
+            return False
+        if not group.connections:
+            del self.spectators[game_id]
+        if close:
+            asyncio.create_task(self._close_spectator(websocket, code))
+        return True
+
+    async def _close_spectator(self, websocket: WebSocket, code: int):
+        try:
+            await asyncio.wait_for(websocket.close(code=code), self.send_timeout)
+        except Exception:
+            pass
+
+    def close_game(self, game_id: str):
+        # O jogo foi removido: fecha as conexões restantes com 1001 (going away).
+        for connection in self.active_connections.pop(game_id, {}).values():
+            connection.close(code=1001)
+        group = self.spectators.get(game_id)
+        if group:
+            for websocket in list(group.connections):
+                self.stop_spectating(game_id, websocket, close=True, code=1001)
+
+    def _enqueue(self, game_id: str, player_id: str, connection: PlayerConnection, message: Message):
+        if not connection.enqueue(message):
+            self.disconnect(game_id, player_id, connection.websocket)
+
+    def broadcast_nowait(self, game_id: str, message: Message):
+        # Codifica uma única vez para todos os destinatários.
+        if isinstance(message, dict):
+            message = encode_message(message)
+        # Copia os itens: disconnect pode alterar o dicionário durante o fan-out.
+        for player_id, connection in list(self.active_connections.get(game_id, {}).items()):
+            self._enqueue(game_id, player_id, connection, message)
+
+    def send_to_player_nowait(self, game_id: str, player_id: str, message: Message):
+        connection = self.active_connections.get(game_id, {}).get(player_id)
+        if connection:
+            self._enqueue(game_id, player_id, connection, message)
+
+    def resume_player(self, game_id: str, player_id: str, resume: Resume):
+        connection = self.active_connections.get(game_id, {}).get(player_id)
+        # Se o jogador reconectou de novo nesse meio-tempo, a conexão nova espera o próprio Resume.
+        if connection and connection.id == resume.connection_id:
+            connection.resume(resume.messages, resume.replay)
+
+    async def broadcast(self, game_id: str, message: Message):
+        self.broadcast_nowait(game_id, message)
+
+    async def send_to_player(self, game_id: str, player_id: str, message: Message):
+        self.send_to_player_nowait(game_id, player_id, message)
+
+    def deliver(self, game_id: str, outbound: List[Tuple[str | None, Message]]):
+        """Entrega as mensagens produzidas por um comando de jogo (None = todos os jogadores; SpectatorUpdate = espectadores)."""
+        for player_id, message in outbound:
+            if isinstance(message, SpectatorUpdate):
+                group = self.spectators.get(game_id)
+                if group:
+                    group.publish(message.message)
+            elif player_id is None:
+                self.broadcast_nowait(game_id, message)
+            elif isinstance(message, Resume):
+                self.resume_player(game_id, player_id, message)
+            else:
+                self.send_to_player_nowait(game_id, player_id, message)
+
+    def queue_depths(self) -> List[int]:
+        return [len(c.queue) for connections in self.active_connections.values() for c in connections.values()]
+
+
+# Instância global para ser usada no app
+connection_manager = ConnectionManager()
+
+metrics.registry.gauge(
+    "monster_coup_connections", "Open player websockets",
+    lambda: sum(len(connections) for connections in connection_manager.active_connections.values()),
+)
+metrics.registry.gauge(
+    "monster_coup_spectators", "Open spectator websockets",
+    lambda: sum(len(group.connections) for group in connection_manager.spectators.values()),
+)
+metrics.registry.gauge(
+    "monster_coup_send_queue_messages", "Messages waiting in the per-connection send queues",
+    lambda: sum(connection_manager.queue_depths()),
+)
+metrics.registry.gauge(
+    "monster_coup_send_queue_max_messages", "Deepest per-connection send queue (the slowest client)",
+    lambda: max(connection_manager.queue_depths(), default=0),
+)
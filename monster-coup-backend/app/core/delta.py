@@ -0,0 +1,54 @@
+# app/core/delta.py
+import copy
+from typing import Any, List
+
+# Diffs no estilo JSON Patch (RFC 6902) entre dois estados serializáveis.
+# Dicionários são comparados chave a chave; listas e valores escalares são substituídos inteiros
+# (as listas do estado são pequenas, ex.: revealed_monsters).
+
+
+def _escape(key: str) -> str:
+    return str(key).replace("~", "~0").replace("/", "~1")
+
+
+def _unescape(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def diff(old: Any, new: Any, path: str = "") -> List[dict]:
+    if old == new:
+        return []
+    if not (isinstance(old, dict) and isinstance(new, dict)):
+        return [{"op": "replace", "path": path, "value": new}]
+
+    ops = []
+    for key, value in new.items():
+        key_path = f"{path}/{_escape(key)}"
+        if key not in old:
+            ops.append({"op": "add", "path": key_path, "value": value})
+        else:
+            ops.extend(diff(old[key], value, key_path))
+    for key in old:
+        if key not in new:
+            ops.append({"op": "remove", "path": f"{path}/{_escape(key)}"})
+    return ops
+
+
+def apply_patch(document: Any, ops: List[dict], in_place: bool = False) -> Any:
+    # Implementação de referência para clientes/ferramentas; o servidor só gera os patches.
+    # in_place: altera o documento e reaproveita os valores do patch (quem chama é dono dos dois).
+    clone = (lambda value: value) if in_place else copy.deepcopy
+    document = clone(document)
+    for op in ops:
+        if op["path"] == "":
+            document = clone(op.get("value"))
+            continue
+        *parents, last = [_unescape(t) for t in op["path"].split("/")[1:]]
+        target = document
+        for token in parents:
+            target = target[token]
+        if op["op"] == "remove":
+            del target[last]
+        else:
+            target[last] = clone(op["value"])
+    return document
@@ -0,0 +1,391 @@
+# app/core/engine.py
+# Motor de regras puro e sem I/O: o estado é imutável (tuplas e bytes) e toda transição é
+# apply(state, action) -> novo state. Cartas são ints pequenos, baralho e mãos são bytes e o
+# RNG (splitmix64) faz parte do próprio estado, então um jogo é totalmente determinado pela seed.
+# O Game de models.py é só um adaptador deste motor para o protocolo do websocket.
+from enum import IntEnum
+from typing import List, NamedTuple, Tuple
+
+
+class Card(IntEnum):
+    DRAGAO = 0
+    ESPECTRO = 1
+    FALCAO = 2
+    GOLEM = 3
+    SLIME = 4
+
+
+MONSTER_NAMES = ("Dragão", "Espectro", "Falcão", "Golem", "Slime")
+MONSTER_ABILITIES = (
+    "Destruir um monstro do oponente.",
+    "Roubar 2 moedas de um oponente.",
+    "Trocar uma de suas cartas com uma do baralho.",
+    "Bloquear a ação 'Caçar' de outro jogador.",
+    "Pegar 3 moedas do banco.",
+)
+CARD_BY_NAME = {name: Card(i) for i, name in enumerate(MONSTER_NAMES)}
+
+COPIES_PER_MONSTER = 3
+HAND_SIZE = 2
+STARTING_COINS = 2
+GOLPE_FINAL_COST = 7
+MAX_PLAYERS = len(MONSTER_NAMES) * COPIES_PER_MONSTER // HAND_SIZE
+
+# Habilidades que podem ser declaradas como ação de turno (Golem só bloqueia).
+CLAIMABLE = (Card.DRAGAO, Card.ESPECTRO, Card.FALCAO, Card.SLIME)
+TARGETED = (Card.DRAGAO, Card.ESPECTRO)
+
+
+class Phase(IntEnum):
+    IN_PROGRESS = 0
+    AWAITING_RESPONSE = 1
+    AWAITING_CHOICE = 2
+    FINISHED = 3
+
+
+class ActionKind(IntEnum):
+    TRAIN = 0         # Treinar
+    HUNT = 1          # Caçar
+    FINAL_STRIKE = 2  # Golpe Final
+    ABILITY = 3       # Declarar a habilidade de um monstro (card)
+    ALLOW = 4         # Responder sem contestar
+    BLOCK = 5         # Bloquear Caçar com Golem
+    CHALLENGE = 6     # Contestar a declaração
+    CHOOSE = 7        # Escolher a carta a perder (ou trocar, no Falcão)
+
+
+class Stage(IntEnum):
+    DECLARED = 0   # Aguardando resposta dos oponentes
+    PROVEN = 1     # Contestação falhou: a habilidade executa depois que o contestador perder uma carta
+    RESOLVING = 2  # A escolha pendente é o próprio efeito da habilidade (Dragão, Falcão)
+
+
+class ChoiceKind(IntEnum):
+    LOSE = 0
+    SWAP = 1
+
+
+class Action(NamedTuple):
+    kind: int
+    actor: int
+    target: int = -1
+    card: int = -1
+
+
+class Pending(NamedTuple):
+    kind: int    # ActionKind.HUNT ou ActionKind.ABILITY
+    card: int    # Monstro declarado (-1 para Caçar)
+    source: int
+    target: int
+    stage: int
+    passed: int = 0  # Bits dos assentos que já responderam ALLOW (mesas com mais de 2 jogadores)
+
+
+class PlayerState(NamedTuple):
+    coins: int
+    hand: bytes
+    revealed: bytes
+
+
+class State(NamedTuple):
+    players: Tuple[PlayerState, ...]
+    deck: bytes
+    rng: int
+    phase: int
+    turn: int
+    pending: Pending | None
+    chooser: int
+    choice: int
+    winner: int
+
+
+# --- RNG (splitmix64) ---
+_MASK64 = (1 << 64) - 1
+
+
+def _next_random(rng: int) -> Tuple[int, int]:
+    rng = (rng + 0x9E3779B97F4A7C15) & _MASK64
+    z = rng
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return rng, z ^ (z >> 31)
+
+
+def _shuffle(cards: bytes, rng: int) -> Tuple[bytes, int]:
+    items = bytearray(cards)
+    for i in range(len(items) - 1, 0, -1):
+        rng, value = _next_random(rng)
+        j = value % (i + 1)
+        items[i], items[j] = items[j], items[i]
+    return bytes(items), rng
+
+
+def _remove_card(hand: bytes, card: int) -> bytes:
+    i = hand.index(card)
+    return hand[:i] + hand[i + 1:]
+
+
+# --- Construção e consultas ---
+def new_game(n_players: int, seed: int) -> State:
+    if not 2 <= n_players <= MAX_PLAYERS:
+        raise ValueError(f"n_players must be between 2 and {MAX_PLAYERS}")
+    deck = bytes(card for card in Card for _ in range(COPIES_PER_MONSTER))
+    deck, rng = _shuffle(deck, seed & _MASK64)
+    players = []
+    for _ in range(n_players):
+        # Cada jogador compra do topo (fim) do baralho
+        players.append(PlayerState(STARTING_COINS, deck[-1:-HAND_SIZE - 1:-1], b""))
+        deck = deck[:-HAND_SIZE]
+    rng, value = _next_random(rng)
+    return State(tuple(players), deck, rng, Phase.IN_PROGRESS, value % n_players, None, -1, ChoiceKind.LOSE, -1)
+
+
+def is_alive(state: State, seat: int) -> bool:
+    return len(state.players[seat].hand) > 0
+
+
+def acting_players(state: State) -> List[int]:
+    """Quem pode agir agora: o jogador da vez, os que podem responder ou quem deve escolher."""
+    if state.phase == Phase.IN_PROGRESS:
+        return [state.turn]
+    if state.phase == Phase.AWAITING_RESPONSE:
+        return _responders(state)
+    if state.phase == Phase.AWAITING_CHOICE:
+        return [state.chooser]
+    return []
+
+
+def _responders(state: State) -> List[int]:
+    # Oponentes vivos que ainda não deixaram passar a ação pendente.
+    pending = state.pending
+    return [
+        s for s in range(len(state.players))
+        if s != pending.source and not pending.passed >> s & 1 and is_alive(state, s)
+    ]
+
+
+def legal_actions(state: State) -> List[Action]:
+    phase = state.phase
+    if phase == Phase.IN_PROGRESS:
+        actor = state.turn
+        actions = [
+            Action(ActionKind.TRAIN, actor),
+            Action(ActionKind.HUNT, actor),
+            Action(ActionKind.ABILITY, actor, -1, Card.FALCAO),
+            Action(ActionKind.ABILITY, actor, -1, Card.SLIME),
+        ]
+        can_strike = state.players[actor].coins >= GOLPE_FINAL_COST
+        for target in range(len(state.players)):
+            if target == actor or not is_alive(state, target):
+                continue
+            actions.append(Action(ActionKind.ABILITY, actor, target, Card.DRAGAO))
+            actions.append(Action(ActionKind.ABILITY, actor, target, Card.ESPECTRO))
+            if can_strike:
+                actions.append(Action(ActionKind.FINAL_STRIKE, actor, target))
+        return actions
+
+    if phase == Phase.AWAITING_RESPONSE:
+        can_block = state.pending.kind == ActionKind.HUNT
+        actions = []
+        for responder in acting_players(state):
+            actions.append(Action(ActionKind.ALLOW, responder))
+            actions.append(Action(ActionKind.CHALLENGE, responder))
+            if can_block:
+                actions.append(Action(ActionKind.BLOCK, responder, -1, Card.GOLEM))
+        return actions
+
+    if phase == Phase.AWAITING_CHOICE:
+        hand = state.players[state.chooser].hand
+        return [Action(ActionKind.CHOOSE, state.chooser, -1, card) for card in sorted(set(hand))]
+
+    return []
+
+
+# --- Transições ---
+def apply(state: State, action: Action) -> State:
+    """Aplica a ação e devolve o novo estado. Ações inválidas devolvem o próprio state."""
+    phase = state.phase
+    if phase == Phase.IN_PROGRESS:
+        if action.actor != state.turn:
+            return state
+        return _apply_turn(state, action)
+    if phase == Phase.AWAITING_RESPONSE:
+        pending = state.pending
+        if action.actor == pending.source or pending.passed >> action.actor & 1 or not is_alive(state, action.actor):
+            return state
+        return _apply_response(state, action)
+    if phase == Phase.AWAITING_CHOICE:
+        if action.kind != ActionKind.CHOOSE or action.actor != state.chooser:
+            return state
+        return _apply_choice(state, action.card)
+    return state
+
+
+def _with_player(state: State, seat: int, player: PlayerState) -> Tuple[PlayerState, ...]:
+    players = list(state.players)
+    players[seat] = player
+    return tuple(players)
+
+
+def _valid_target(state: State, actor: int, target: int) -> bool:
+    return 0 <= target < len(state.players) and target != actor and is_alive(state, target)
+
+
+def _apply_turn(state: State, action: Action) -> State:
+    actor, kind = action.actor, action.kind
+    player = state.players[actor]
+
+    if kind == ActionKind.TRAIN:
+        players = _with_player(state, actor, player._replace(coins=player.coins + 1))
+        return _next_turn(state._replace(players=players))
+
+    if kind == ActionKind.HUNT:
+        pending = Pending(ActionKind.HUNT, -1, actor, -1, Stage.DECLARED)
+        return state._replace(phase=Phase.AWAITING_RESPONSE, pending=pending)
+
+    if kind == ActionKind.FINAL_STRIKE:
+        if player.coins < GOLPE_FINAL_COST or not _valid_target(state, actor, action.target):
+            return state
+        players = _with_player(state, actor, player._replace(coins=player.coins - GOLPE_FINAL_COST))
+        return state._replace(
+            players=players, phase=Phase.AWAITING_CHOICE, chooser=action.target, choice=ChoiceKind.LOSE
+        )
+
+    if kind == ActionKind.ABILITY and action.card in CLAIMABLE:
+        target = action.target
+        if action.card in TARGETED:
+            if not _valid_target(state, actor, target):
+                return state
+        else:
+            target = -1
+        pending = Pending(ActionKind.ABILITY, action.card, actor, target, Stage.DECLARED)
+        return state._replace(phase=Phase.AWAITING_RESPONSE, pending=pending)
+
+    return state
+
+
+def _apply_response(state: State, action: Action) -> State:
+    pending = state.pending
+    kind = action.kind
+
+    if kind == ActionKind.ALLOW:
+        # A ação só acontece quando todos os oponentes deixaram passar; um bloqueio ou contestação decide na hora.
+        pending = pending._replace(passed=pending.passed | 1 << action.actor)
+        state = state._replace(pending=pending)
+        if _responders(state):
+            return state
+        return _execute(state, pending._replace(passed=0))
+
+    if kind == ActionKind.BLOCK:
+        if pending.kind != ActionKind.HUNT or action.card != Card.GOLEM:
+            return state
+        # Ação cancelada. Turno passa.
+        return _next_turn(state._replace(phase=Phase.IN_PROGRESS, pending=None))
+
+    if kind == ActionKind.CHALLENGE:
+        source = state.players[pending.source]
+        if pending.card >= 0 and pending.card in source.hand:
+            # A declaração era verdadeira: a carta revelada volta ao baralho e o jogador compra outra.
+            hand = _remove_card(source.hand, pending.card)
+            deck = state.deck
+            if deck:
+                hand, deck = hand + deck[-1:], deck[:-1]
+            deck, rng = _shuffle(deck + bytes((pending.card,)), state.rng)
+            players = _with_player(state, pending.source, source._replace(hand=hand))
+            return state._replace(
+                players=players, deck=deck, rng=rng, phase=Phase.AWAITING_CHOICE,
+                pending=pending._replace(stage=Stage.PROVEN, passed=0), chooser=action.actor, choice=ChoiceKind.LOSE,
+            )
+        # Blefe: quem declarou perde uma carta e a ação é cancelada.
+        return state._replace(
+            phase=Phase.AWAITING_CHOICE, pending=None, chooser=pending.source, choice=ChoiceKind.LOSE
+        )
+
+    return state
+
+
+def _apply_choice(state: State, card: int) -> State:
+    seat = state.chooser
+    player = state.players[seat]
+    hand = player.hand
+    if hand:
+        # Se o jogador escolheu uma carta que não tem, usamos a primeira.
+        if not 0 <= card < 256 or card not in hand:
+            card = hand[0]
+        hand = _remove_card(hand, card)
+        if state.choice == ChoiceKind.SWAP:
+            deck, rng = state.deck, state.rng
+            if deck:
+                hand, deck = hand + deck[-1:], deck[:-1]
+            deck, rng = _shuffle(deck + bytes((card,)), rng)
+            state = state._replace(deck=deck, rng=rng)
+            player = player._replace(hand=hand)
+        else:
+            player = player._replace(hand=hand, revealed=player.revealed + bytes((card,)))
+        state = state._replace(players=_with_player(state, seat, player))
+
+    pending = state.pending
+    state = state._replace(phase=Phase.IN_PROGRESS, pending=None, chooser=-1, choice=ChoiceKind.LOSE)
+    state = _check_for_winner(state)
+    if state.phase == Phase.FINISHED:
+        return state
+    if pending and pending.stage == Stage.PROVEN:
+        return _execute(state, pending)
+    return _next_turn(state)
+
+
+def _execute(state: State, pending: Pending) -> State:
+    source = state.players[pending.source]
+    state = state._replace(phase=Phase.IN_PROGRESS, pending=None)
+    card = pending.card
+
+    if pending.kind == ActionKind.HUNT:  # Se não foi bloqueado
+        players = _with_player(state, pending.source, source._replace(coins=source.coins + 2))
+        return _next_turn(state._replace(players=players))
+
+    if card == Card.SLIME:
+        players = _with_player(state, pending.source, source._replace(coins=source.coins + 3))
+        return _next_turn(state._replace(players=players))
+
+    if card == Card.ESPECTRO:
+        target = state.players[pending.target]
+        stolen = min(target.coins, 2)
+        players = list(state.players)
+        players[pending.target] = target._replace(coins=target.coins - stolen)
+        players[pending.source] = source._replace(coins=source.coins + stolen)
+        return _next_turn(state._replace(players=tuple(players)))
+
+    if card == Card.DRAGAO and is_alive(state, pending.target):
+        return state._replace(
+            phase=Phase.AWAITING_CHOICE, pending=pending._replace(stage=Stage.RESOLVING),
+            chooser=pending.target, choice=ChoiceKind.LOSE,
+        )
+
+    if card == Card.FALCAO:
+        return state._replace(
+            phase=Phase.AWAITING_CHOICE, pending=pending._replace(stage=Stage.RESOLVING),
+            chooser=pending.source, choice=ChoiceKind.SWAP,
+        )
+
+    return _next_turn(state)
+
+
+def _check_for_winner(state: State) -> State:
+    alive = [seat for seat in range(len(state.players)) if is_alive(state, seat)]
+    if len(alive) <= 1:
+        return state._replace(phase=Phase.FINISHED, winner=alive[0] if alive else -1)
+    return state
+
+
+def _next_turn(state: State) -> State:
+    state = _check_for_winner(state)
+    if state.phase == Phase.FINISHED:
+        return state
+    # Avança pelos assentos pulando jogadores eliminados (inclusive se o jogador da vez caiu).
+    n = len(state.players)
+    seat = state.turn
+    for _ in range(n):
+        seat = (seat + 1) % n
+        if is_alive(state, seat):
+            break
+    return state._replace(turn=seat)
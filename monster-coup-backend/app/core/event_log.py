@@ -0,0 +1,279 @@
+# app/core/event_log.py
+# Log de eventos append-only em arquivos de segmento, com snapshots periódicos dos jogos.
+#
+# O event loop só coloca os registros numa deque; uma thread escritora os codifica e grava em lote,
+# com um único fsync por lote (group commit). Nada de I/O no caminho do websocket: em caso de queda,
+# perdem-se no máximo os eventos do último intervalo de fsync.
+#
+# Um snapshot fecha o segmento atual e vale a partir do seguinte. Ao reiniciar, carrega-se o último
+# snapshot e reprocessam-se só os segmentos depois dele; os anteriores são apagados.
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Iterator, List, NamedTuple, Tuple
+
+from .. import config
+from . import engine
+from .serialization import dumps, loads
+
+SEGMENT_PREFIX = "segment-"
+SNAPSHOT_PREFIX = "snapshot-"
+
+
+class GameSnapshot(NamedTuple):
+    # Capturado no event loop; só referências a dados imutáveis, codificado depois pela thread escritora.
+    id: str
+    seed: int
+    player_ids: Tuple[str, ...]
+    bots: Tuple[str, ...]
+    version: int
+    state: engine.State | None
+    max_players: int
+
+
+class _SnapshotMarker(NamedTuple):
+    games: List[GameSnapshot]
+
+
+def encode_state(state: engine.State) -> list:
+    return [
+        [[player.coins, player.hand.hex(), player.revealed.hex()] for player in state.players],
+        state.deck.hex(),
+        state.rng,
+        int(state.phase),
+        state.turn,
+        [int(value) for value in state.pending] if state.pending else None,
+        state.chooser,
+        int(state.choice),
+        state.winner,
+    ]
+
+
+def decode_state(data: list) -> engine.State:
+    players, deck, rng, phase, turn, pending, chooser, choice, winner = data
+    return engine.State(
+        tuple(engine.PlayerState(coins, bytes.fromhex(hand), bytes.fromhex(revealed)) for coins, hand, revealed in players),
+        bytes.fromhex(deck),
+        rng,
+        engine.Phase(phase),
+        turn,
+        _decode_pending(pending) if pending else None,
+        chooser,
+        engine.ChoiceKind(choice),
+        winner,
+    )
+
+
+def _decode_pending(data: list) -> engine.Pending:
+    # Snapshots antigos não têm "passed" (só havia mesas de 2 jogadores).
+    kind, card, source, target, stage, *passed = data
+    return engine.Pending(engine.ActionKind(kind), card, source, target, engine.Stage(stage), *passed)
+
+
+def decode_action(data: list) -> engine.Action:
+    kind, actor, target, card = data
+    return engine.Action(engine.ActionKind(kind), actor, target, card)
+
+
+def _encode_game(game: GameSnapshot) -> dict:
+    return {
+        "id": game.id,
+        "seed": game.seed,
+        "players": list(game.player_ids),
+        "bots": list(game.bots),
+        "version": game.version,
+        "state": encode_state(game.state) if game.state else None,
+        "max_players": game.max_players,
+    }
+
+
+class EventLog:
+    def __init__(
+        self,
+        directory: str,
+        fsync_interval: float = config.EVENT_LOG_FSYNC_INTERVAL,
+        segment_bytes: int = config.EVENT_LOG_SEGMENT_BYTES,
+        snapshot_every: int = config.SNAPSHOT_EVERY_EVENTS,
+        snapshot_interval: float = config.SNAPSHOT_INTERVAL,
+    ):
+        self.directory = directory
+        self.fsync_interval = fsync_interval
+        self.segment_bytes = segment_bytes
+        self.snapshot_every = snapshot_every
+        self.snapshot_interval = snapshot_interval
+        self._queue: Deque[Any] = deque()  # append/popleft da deque são seguros entre threads
+        self._wakeup = threading.Event()
+        self._closing = False
+        self._thread: threading.Thread | None = None
+        self._file = None
+        self._segment = 0
+        self._segment_size = 0
+        self.events_since_snapshot = 0
+        self.last_snapshot = time.monotonic()
+        # Contadores (escritos só pela thread escritora)
+        self.events_written = 0
+        self.bytes_written = 0
+        self.fsyncs = 0
+        self.snapshots = 0
+
+    def _path(self, prefix: str, number: int, suffix: str) -> str:
+        return os.path.join(self.directory, f"{prefix}{number:08d}{suffix}")
+
+    def _numbers(self, prefix: str, suffix: str) -> List[int]:
+        numbers = []
+        for name in os.listdir(self.directory):
+            if name.startswith(prefix) and name.endswith(suffix):
+                number = name[len(prefix):-len(suffix)]
+                if number.isdigit():
+                    numbers.append(int(number))
+        return sorted(numbers)
+
+    # --- Recuperação ---
+    def recover(self) -> Tuple[List[dict], Iterator[dict]]:
+        """Jogos do último snapshot e os eventos gravados depois dele. Deve ser chamado antes de start()."""
+        os.makedirs(self.directory, exist_ok=True)
+        snapshots = self._numbers(SNAPSHOT_PREFIX, ".json")
+        base = snapshots[-1] if snapshots else 0
+        games = []
+        if snapshots:
+            with open(self._path(SNAPSHOT_PREFIX, base, ".json"), "rb") as f:
+                games = loads(f.read())["games"]
+        segments = [number for number in self._numbers(SEGMENT_PREFIX, ".log") if number >= base]
+        return games, self._read_segments(segments)
+
+    def _read_segments(self, segments: List[int]) -> Iterator[dict]:
+        for number in segments:
+            with open(self._path(SEGMENT_PREFIX, number, ".log"), "rb") as f:
+                for line in f:
+                    try:
+                        yield loads(line)
+                    except ValueError:
+                        # Linha cortada por uma queda no meio da gravação: o resto do segmento é descartado.
+                        logging.warning(f"Event log segment {number} has a torn record; ignoring the rest of it")
+                        break
+
+    # --- Escrita ---
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        # Nunca continua um segmento antigo: o fim dele pode ter ficado pela metade numa queda.
+        self._open_segment(max(self._numbers(SEGMENT_PREFIX, ".log"), default=-1) + 1)
+        self._thread = threading.Thread(target=self._run, name="event-log", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        if self._thread is None:
+            return
+        self._closing = True
+        self._wakeup.set()
+        self._thread.join()
+        self._thread = None
+        self._file.close()
+
+    def append(self, record: dict):
+        """Registra um evento. Não faz I/O: a gravação acontece no próximo lote da thread escritora."""
+        self._queue.append(record)
+        self.events_since_snapshot += 1
+
+    def pending(self) -> int:
+        """Registros (e marcadores de snapshot) ainda na fila, não gravados no disco."""
+        return len(self._queue)
+
+    def snapshot_due(self) -> bool:
+        if self.events_since_snapshot >= self.snapshot_every:
+            return True
+        return self.events_since_snapshot > 0 and time.monotonic() - self.last_snapshot >= self.snapshot_interval
+
+    def snapshot(self, games: List[GameSnapshot]):
+        # O marcador entra na mesma fila dos eventos: o snapshot corresponde exatamente a este ponto do log.
+        self._queue.append(_SnapshotMarker(games))
+        self.events_since_snapshot = 0
+        self.last_snapshot = time.monotonic()
+        self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.fsync_interval)
+            self._wakeup.clear()
+            closing = self._closing
+            try:
+                self._drain()
+            except Exception:
+                logging.exception("Event log write failed")
+            if closing:
+                return
+
+    def _drain(self):
+        batch = bytearray()
+        count = 0
+        while self._queue:
+            item = self._queue.popleft()
+            if isinstance(item, _SnapshotMarker):
+                self._write(batch, count)
+                batch, count = bytearray(), 0
+                self._write_snapshot(item.games)
+                continue
+            batch += dumps(item).encode()
+            batch += b"\n"
+            count += 1
+        self._write(batch, count)
+
+    def _write(self, batch: bytearray, count: int):
+        if not batch:
+            return
+        self._file.write(batch)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.fsyncs += 1
+        self.events_written += count
+        self.bytes_written += len(batch)
+        self._segment_size += len(batch)
+        if self._segment_size >= self.segment_bytes:
+            self._open_segment(self._segment + 1)
+
+    def _open_segment(self, number: int):
+        if self._file:
+            self._file.close()
+        self._segment = number
+        self._file = open(self._path(SEGMENT_PREFIX, number, ".log"), "ab")
+        self._segment_size = self._file.tell()
+
+    def _write_snapshot(self, games: List[GameSnapshot]):
+        self._open_segment(self._segment + 1)
+        path = self._path(SNAPSHOT_PREFIX, self._segment, ".json")
+        with open(path + ".tmp", "wb") as f:
+            f.write(dumps({"segment": self._segment, "games": [_encode_game(game) for game in games]}).encode())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+        self._fsync_directory()
+        self.snapshots += 1
+        # Tudo antes do novo segmento já está no snapshot.
+        for number in self._numbers(SEGMENT_PREFIX, ".log"):
+            if number < self._segment:
+                os.remove(self._path(SEGMENT_PREFIX, number, ".log"))
+        for number in self._numbers(SNAPSHOT_PREFIX, ".json"):
+            if number < self._segment:
+                os.remove(self._path(SNAPSHOT_PREFIX, number, ".json"))
+
+    def _fsync_directory(self):
+        # Garante que o rename do snapshot sobrevive a uma queda (não existe no Windows).
+        if not hasattr(os, "O_DIRECTORY"):
+            return
+        fd = os.open(self.directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def stats(self) -> dict:
+        return {
+            "segment": self._segment,
+            "events_written": self.events_written,
+            "bytes_written": self.bytes_written,
+            "fsyncs": self.fsyncs,
+            "snapshots": self.snapshots,
+            "queued": self.pending(),
+            "events_since_snapshot": self.events_since_snapshot,
+        }
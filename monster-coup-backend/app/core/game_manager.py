@@ -1,20 +1,293 @@
 # app/core/game_manager.py
+import asyncio
+import itertools
+import logging
+import sys
+import time
 import uuid
-from typing import Dict
-from .models import Game
+from collections import Counter, OrderedDict, deque
+from enum import Enum
+from typing import Any, Callable, Dict, List
+
+from .. import config
+from ..ai.bots import bot_manager
+from .connection_manager import connection_manager
+from . import metrics
+from .event_log import EventLog, GameSnapshot, decode_action, decode_state
+from .models import MIN_PLAYERS, Game, GameState
+from .session import Deliver, GameError, GameSession
+
+# Quantos jogos são medidos para estimar o tamanho médio de um jogo.
+SIZE_SAMPLE = 16
+
+
+def new_game_id() -> str:
+    return str(uuid.uuid4())[:8] # Gera um ID único de 8 caracteres
+
+
+def approx_size(obj: Any) -> int:
+    """Bytes aproximados de um objeto e de tudo que ele referencia (contando cada objeto uma vez)."""
+    seen = set()
+    total = 0
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, (type, Enum)) or callable(obj):
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+            stack.extend(obj)
+        elif hasattr(obj, "__dict__"):
+            stack.append(vars(obj))
+    return total
+
 
 class GameManager:
-    def __init__(self):
+    # Jogos deste processo. Cada jogo tem sua sessão (ator) que serializa os comandos.
+    # As sessões ficam em ordem de uso (LRU): o jogo usado há mais tempo é o primeiro da fila.
+    def __init__(
+        self,
+        deliver: Deliver = connection_manager.deliver,
+        close_game: Callable[[str], None] = connection_manager.close_game,
+        ttl_waiting: float = config.GAME_TTL_WAITING,
+        ttl_abandoned: float = config.GAME_TTL_ABANDONED,
+        ttl_finished: float = config.GAME_TTL_FINISHED,
+        max_games: int = config.MAX_GAMES,
+        reaper_interval: float = config.REAPER_INTERVAL,
+        log_dir: str = config.EVENT_LOG_DIR,
+    ):
         self.active_games: Dict[str, Game] = {}
+        self.sessions: OrderedDict[str, GameSession] = OrderedDict()
+        self.deliver = deliver
+        self.close_game = close_game
+        self.ttl_waiting = ttl_waiting
+        self.ttl_abandoned = ttl_abandoned
+        self.ttl_finished = ttl_finished
+        self.max_games = max_games
+        self.reaper_interval = reaper_interval
+        self.evicted: Counter = Counter()  # motivo -> jogos removidos
+        self._reaper_task: asyncio.Task | None = None
+        self.event_log = EventLog(log_dir) if log_dir else None
+        self.recovery: dict | None = None
+        self._snapshot_task: asyncio.Task | None = None
 
-    def create_game(self) -> Game:
-        game_id = str(uuid.uuid4())[:8] # Gera um ID único de 8 caracteres
-        game = Game(game_id)
-        self.active_games[game_id] = game
+    async def start(self):
+        self._register_metrics()
+        if self.event_log:
+            self.recover()
+            self.event_log.start()
+            if self.recovery["events"]:
+                # Compacta já: o próximo reinício não precisa reprocessar os mesmos eventos.
+                self.take_snapshot()
+            self._snapshot_task = asyncio.create_task(self._snapshotter())
+        if self.reaper_interval > 0:
+            self._reaper_task = asyncio.create_task(self._reaper())
+
+    async def stop(self):
+        for task in (self._reaper_task, self._snapshot_task):
+            if task:
+                task.cancel()
+        self._reaper_task = self._snapshot_task = None
+        if self.event_log:
+            # Snapshot no desligamento: o reinício carrega só ele.
+            self.take_snapshot()
+            self.event_log.close()
+        for session in self.sessions.values():
+            session.stop()
+        bot_manager.shutdown()
+
+    def _add_session(self, game: Game) -> GameSession:
+        self.active_games[game.id] = game
+        session = self.sessions[game.id] = GameSession(game, self.deliver, self.event_log)
+        return session
+
+    def create_game(self, game_id: str | None = None, max_players: int = MIN_PLAYERS) -> Game:
+        game = Game(game_id or new_game_id(), max_players=max_players)  # Valida o tamanho antes de remover alguém
+        while len(self.sessions) >= self.max_games:
+            self.evict(next(iter(self.sessions)), "lru")
+        self._add_session(game)
+        if self.event_log:
+            self.event_log.append({"t": "create", "g": game.id, "seed": game.seed, "n": max_players})
         return game
 
     def get_game(self, game_id: str) -> Game | None:
         return self.active_games.get(game_id)
 
+    async def new_game(self, max_players: int = MIN_PLAYERS) -> str:
+        return self.create_game(max_players=max_players).id
+
+    async def submit(self, game_id: str, command: str, *args) -> Any:
+        session = self.sessions.get(game_id)
+        if session is None:
+            raise GameError(404, "Game not found")
+        self.sessions.move_to_end(game_id)
+        return await session.submit(command, *args)
+
+    # --- Remoção ---
+    def _expiry_reason(self, session: GameSession, now: float) -> str | None:
+        idle = now - session.last_activity
+        state = session.game.game_state
+        if state == GameState.FINISHED:
+            return "finished" if idle > self.ttl_finished else None
+        if state == GameState.WAITING_FOR_PLAYERS:
+            return "waiting" if idle > self.ttl_waiting else None
+        if not session.connections and idle > self.ttl_abandoned:
+            return "abandoned"
+        return None
+
+    def reap(self, now: float | None = None) -> int:
+        """Remove os jogos que passaram do TTL do seu estado. Retorna quantos foram removidos."""
+        now = time.monotonic() if now is None else now
+        expired = []
+        for game_id, session in self.sessions.items():
+            reason = self._expiry_reason(session, now)
+            if reason:
+                expired.append((game_id, reason))
+        for game_id, reason in expired:
+            self.evict(game_id, reason)
+        return len(expired)
+
+    def evict(self, game_id: str, reason: str):
+        session = self.sessions.pop(game_id, None)
+        if session is None:
+            return
+        del self.active_games[game_id]
+        session.stop()
+        self.close_game(game_id)
+        if self.event_log:
+            self.event_log.append({"t": "evict", "g": game_id})
+        self.evicted[reason] += 1
+        logging.info(f"Game {game_id} evicted ({reason})")
+
+    async def _reaper(self):
+        while True:
+            await asyncio.sleep(self.reaper_interval)
+            try:
+                self.reap()
+            except Exception:
+                logging.exception("Game reaper failed")
+
+    # --- Log de eventos ---
+    def recover(self):
+        """Refaz os jogos a partir do último snapshot e dos eventos gravados depois dele."""
+        started = time.perf_counter()
+        snapshot, records = self.event_log.recover()
+        games: Dict[str, Game] = {}
+        bots: Dict[str, List[str]] = {}
+        for data in snapshot:
+            state = decode_state(data["state"]) if data["state"] else None
+            games[data["id"]] = Game.restore(
+                data["id"], data["seed"], data["players"], data["version"], state, data.get("max_players", MIN_PLAYERS)
+            )
+            bots[data["id"]] = data["bots"]
+        events = 0
+        for record in records:
+            events += 1
+            kind, game_id = record["t"], record["g"]
+            if kind == "create":
+                games[game_id] = Game(game_id, record["seed"], record.get("n", MIN_PLAYERS))
+                continue
+            if kind == "evict":
+                games.pop(game_id, None)
+                bots.pop(game_id, None)
+                continue
+            game = games.get(game_id)
+            if game is None:
+                continue
+            if kind == "action":
+                game.replay(decode_action(record["a"]), record["v"])
+            elif kind == "join":
+                game.add_player(record["p"])
+                if record["bot"]:
+                    bots.setdefault(game_id, []).append(record["p"])
+            elif kind == "start":
+                game.start_game()
+
+        for game in games.values():
+            game.rebase_history()
+            session = self._add_session(game)
+            for player_id in bots.get(game.id, ()):
+                bot_manager.add_bot(game, player_id)
+            if game.game_state != GameState.WAITING_FOR_PLAYERS:
+                session.post("schedule_bots")  # Bots da vez voltam a pensar
+
+        self.recovery = {
+            "games": len(games),
+            "snapshot_games": len(snapshot),
+            "events": events,
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+        logging.info(
+            f"Recovered {len(games)} games ({len(snapshot)} from snapshot, {events} events replayed) "
+            f"in {self.recovery['seconds']:.3f}s"
+        )
+
+    def take_snapshot(self):
+        # Só copia referências (o State do motor é imutável); a codificação fica com a thread do log.
+        games = [
+            GameSnapshot(
+                game.id, game.seed, tuple(game.player_ids), tuple(bot_manager.bots.get(game.id, ())),
+                game.version, game.state, game.max_players,
+            )
+            for game in self.active_games.values()
+        ]
+        self.event_log.snapshot(games)
+
+    async def _snapshotter(self):
+        while True:
+            await asyncio.sleep(1)
+            if self.event_log.snapshot_due():
+                self.take_snapshot()
+
+    # --- Contadores ---
+    def _register_metrics(self):
+        # Lidos só na coleta do /metrics; no modo com shards cada worker registra os seus.
+        metrics.registry.gauge("monster_coup_games", "Live games", lambda: len(self.sessions))
+        metrics.registry.gauge(
+            "monster_coup_game_inbox_commands", "Commands waiting in the game sessions' inboxes",
+            lambda: sum(session.inbox.qsize() for session in self.sessions.values()),
+        )
+        metrics.registry.gauge(
+            "monster_coup_evicted_games_total", "Games removed by the reaper or the game cap",
+            lambda: {(reason,): count for reason, count in self.evicted.items()}, ("reason",), "counter",
+        )
+        if self.event_log:
+            metrics.registry.gauge(
+                "monster_coup_event_log_queue_records", "Event log records not yet written to disk",
+                self.event_log.pending,
+            )
+
+    async def shard_metrics(self) -> List[metrics.Export]:
+        # Tudo roda neste processo: o registro global já tem as séries dos jogos.
+        return []
+
+    async def stats(self) -> dict:
+        # O tamanho é estimado a partir dos jogos mais recentes, para o custo não crescer com o número de jogos.
+        sample = list(itertools.islice(reversed(self.sessions.values()), SIZE_SAMPLE))
+        # Conta também o buffer de reconexão de cada jogador (session.streams).
+        approx_bytes = sum(approx_size((session.game, session.streams)) for session in sample) // len(sample) if sample else 0
+        stats = {
+            "live_games": len(self.sessions),
+            "evicted_games": sum(self.evicted.values()),
+            "evicted_by_reason": dict(self.evicted),
+            "approx_bytes_per_game": approx_bytes,
+        }
+        if self.event_log:
+            stats["event_log"] = self.event_log.stats()
+            stats["recovery"] = self.recovery
+        return stats
+
+
+def _create_game_manager():
+    if config.GAME_SHARDS > 0:
+        from .sharding import ShardedGameManager
+        return ShardedGameManager(config.GAME_SHARDS)
+    return GameManager()
+
+
 # Instância global para ser usada no app
-game_manager = GameManager()
+game_manager = _create_game_manager()
@@ -0,0 +1,194 @@
+# app/core/matchmaking.py
+# Fila de matchmaking: agrupa jogadores em mesas de 2 a 6, por tamanho de mesa e faixa de rating.
+#
+# Cada (tamanho, faixa) é um balde FIFO. Ao entrar um jogador, só o balde dele é olhado: quando
+# atinge o tamanho da mesa, os primeiros formam um jogo. Como um balde nunca passa de tamanho - 1
+# jogadores, entrar, sair e formar mesa custam O(1) mais um bisect na lista ordenada de faixas não
+# vazias (mexida só quando um balde surge ou esvazia); nada percorre a fila inteira, mesmo com
+# dezenas de milhares esperando.
+#
+# Quem espera demais alarga a busca: a cada MATCH_WIDEN_AFTER segundos de espera, o balde pode
+# completar a mesa com jogadores de uma faixa vizinha a mais (as mais próximas primeiro).
+import asyncio
+import logging
+import math
+import time
+from bisect import bisect_left, insort
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, NamedTuple, Tuple
+
+from .. import config
+from . import metrics
+from .game_manager import game_manager
+from .models import MAX_PLAYERS, MIN_PLAYERS
+
+
+class MatchmakingError(Exception):
+    pass
+
+
+class Ticket(NamedTuple):
+    player_id: str
+    rating: float
+    size: int
+    bracket: int
+    queued_at: float
+    future: asyncio.Future  # Recebe o game_id quando a mesa é formada
+
+
+# Cria o jogo de uma mesa formada e coloca os jogadores nele; devolve o game_id.
+StartMatch = Callable[[int, List[str]], Awaitable[str]]
+
+
+async def start_match(size: int, player_ids: List[str]) -> str:
+    game_id = await game_manager.new_game(size)
+    for player_id in player_ids:
+        await game_manager.submit(game_id, "join", player_id)  # O último a entrar inicia o jogo
+    return game_id
+
+
+class Matchmaker:
+    def __init__(
+        self,
+        start: StartMatch = start_match,
+        bracket_width: float = config.MATCH_BRACKET_WIDTH,
+        widen_after: float = config.MATCH_WIDEN_AFTER,
+    ):
+        self.start_match = start
+        self.bracket_width = bracket_width
+        self.widen_after = widen_after
+        self._buckets: Dict[Tuple[int, int], Deque[Ticket]] = {}  # (tamanho, faixa) -> fila
+        self._brackets: Dict[int, List[int]] = {}  # tamanho -> faixas não vazias, em ordem
+        self.tickets: Dict[str, Ticket] = {}  # player_id -> ticket na fila
+        self.matches = 0
+        self._widen_task: asyncio.Task | None = None
+
+    async def start(self):
+        if self.widen_after > 0:
+            self._widen_task = asyncio.create_task(self._widener())
+
+    async def stop(self):
+        if self._widen_task:
+            self._widen_task.cancel()
+            self._widen_task = None
+
+    # --- Fila ---
+    def enqueue(self, player_id: str, size: int = config.MATCH_SIZE, rating: float = config.MATCH_DEFAULT_RATING) -> Ticket:
+        if not MIN_PLAYERS <= size <= MAX_PLAYERS:
+            raise MatchmakingError(f"Game size must be between {MIN_PLAYERS} and {MAX_PLAYERS}")
+        if not math.isfinite(rating):
+            raise MatchmakingError("Rating must be a finite number")  # nan/inf não cabem em nenhuma faixa
+        if player_id in self.tickets:
+            raise MatchmakingError("Player is already in the matchmaking queue")
+        bracket = int(rating // self.bracket_width) if self.bracket_width > 0 else 0
+        ticket = Ticket(player_id, rating, size, bracket, time.monotonic(), asyncio.get_running_loop().create_future())
+        key = (size, bracket)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = deque()
+            insort(self._brackets.setdefault(size, []), bracket)
+        bucket.append(ticket)
+        self.tickets[player_id] = ticket
+        if len(bucket) >= size:
+            self._form(list(bucket)[:size])
+        return ticket
+
+    def cancel(self, player_id: str):
+        # O jogador desistiu (websocket fechado). Se a mesa já foi formada, não há o que desfazer.
+        ticket = self.tickets.get(player_id)
+        if ticket is not None:
+            self._remove(ticket)
+
+    def _remove(self, ticket: Ticket):
+        # Um balde tem menos jogadores que uma mesa, então o remove() da deque é barato.
+        del self.tickets[ticket.player_id]
+        key = (ticket.size, ticket.bracket)
+        bucket = self._buckets[key]
+        bucket.remove(ticket)
+        if not bucket:
+            del self._buckets[key]
+            brackets = self._brackets[ticket.size]
+            del brackets[bisect_left(brackets, ticket.bracket)]
+            if not brackets:
+                del self._brackets[ticket.size]
+
+    def _form(self, tickets: List[Ticket]):
+        now = time.monotonic()
+        for ticket in tickets:
+            self._remove(ticket)
+            metrics.match_wait_seconds.observe(now - ticket.queued_at)
+        self.matches += 1
+        metrics.matches.inc(1, str(len(tickets)))
+        asyncio.create_task(self._start(tickets))
+
+    async def _start(self, tickets: List[Ticket]):
+        try:
+            game_id = await self.start_match(tickets[0].size, [t.player_id for t in tickets])
+        except Exception as exc:
+            logging.exception("Could not start a matched game")
+            for t in tickets:
+                if not t.future.done():
+                    t.future.set_exception(MatchmakingError(f"Could not start the game: {exc}"))
+            return
+        for t in tickets:
+            if not t.future.done():
+                t.future.set_result(game_id)
+
+    # --- Faixas vizinhas ---
+    def widen(self, now: float | None = None) -> int:
+        """Completa mesas com faixas vizinhas para quem espera há muito tempo. Retorna quantas formou."""
+        now = time.monotonic() if now is None else now
+        formed = 0
+        for size in list(self._brackets):
+            for bracket in list(self._brackets.get(size, ())):
+                bucket = self._buckets.get((size, bracket))
+                if not bucket:
+                    continue  # Consumido por uma mesa formada nesta mesma passada
+                reach = int((now - bucket[0].queued_at) // self.widen_after)
+                if reach < 1:
+                    continue
+                group = self._gather(size, bracket, reach)
+                if group:
+                    self._form(group)
+                    formed += 1
+        return formed
+
+    def _gather(self, size: int, bracket: int, reach: int) -> List[Ticket] | None:
+        # Jogadores do próprio balde e, da mais próxima para a mais distante, das faixas a até `reach`.
+        # Anda para os dois lados a partir da posição da faixa: nunca visita mais faixas que o necessário.
+        brackets = self._brackets[size]
+        group = list(self._buckets[(size, bracket)])
+        right = bisect_left(brackets, bracket) + 1
+        left = right - 2
+        while len(group) < size:
+            below = bracket - brackets[left] if left >= 0 else None
+            above = brackets[right] - bracket if right < len(brackets) else None
+            if below is not None and (above is None or below <= above):
+                neighbour, distance, left = brackets[left], below, left - 1
+            elif above is not None:
+                neighbour, distance, right = brackets[right], above, right + 1
+            else:
+                return None
+            if distance > reach:
+                return None
+            group.extend(self._buckets[(size, neighbour)])
+        return group[:size]
+
+    async def _widener(self):
+        while True:
+            await asyncio.sleep(1)
+            try:
+                self.widen()
+            except Exception:
+                logging.exception("Matchmaking widen pass failed")
+
+    def stats(self) -> dict:
+        waiting: Dict[int, int] = {}
+        for (size, _), bucket in self._buckets.items():
+            waiting[size] = waiting.get(size, 0) + len(bucket)
+        return {"waiting": len(self.tickets), "waiting_by_size": waiting, "matches": self.matches}
+
+
+# Instância global para ser usada no app
+matchmaker = Matchmaker()
+metrics.registry.gauge("monster_coup_matchmaking_waiting", "Players waiting in the matchmaking queue", lambda: len(matchmaker.tickets))
@@ -0,0 +1,203 @@
+# app/core/metrics.py
+# Métricas do servidor no formato texto do Prometheus, sem dependências externas.
+#
+# Registrar uma medida custa um bisect e duas somas num dicionário; nada é formatado até o /metrics.
+# Os gauges são funções avaliadas só na hora da coleta. No modo com shards, cada worker exporta
+# as suas séries (export) e a frente soma tudo antes de renderizar (render).
+import asyncio
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from .. import config
+
+# Segundos: de 50us (um comando típico) até alguns segundos (cliente travado)
+DEFAULT_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+WAIT_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0)
+
+# Tipos de mensagem dos clientes; qualquer outro vira "other" para o número de séries não crescer.
+CLIENT_MESSAGE_TYPES = frozenset({"PLAYER_ACTION", "ACTION_RESPONSE", "CHOOSE_MONSTER", "SYNC"})
+
+Labels = Tuple[str | None, ...]
+# nome -> (tipo, ajuda, nomes dos labels, buckets, {labels: valores})
+Export = Dict[str, tuple]
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, label_names: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self.enabled = True
+        # labels -> [contagem por bucket (não cumulativa)..., +Inf, soma]
+        self.series: Dict[Labels, List[float]] = {}
+
+    def observe(self, value: float, *labels: str | None):
+        if not self.enabled:
+            return
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [0] * (len(self.buckets) + 2)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def export(self) -> tuple:
+        return ("histogram", self.help, self.label_names, self.buckets, {k: list(v) for k, v in self.series.items()})
+
+
+class Counter:
+    def __init__(self, name: str, help: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+        # Sem labels a série existe desde o início: o Prometheus vê 0 em vez de nenhuma amostra.
+        self.series: Dict[Labels, float] = {} if self.label_names else {(): 0}
+
+    def inc(self, amount: float = 1, *labels: str | None):
+        self.series[labels] = self.series.get(labels, 0) + amount
+
+    def export(self) -> tuple:
+        return ("counter", self.help, self.label_names, (), dict(self.series))
+
+
+class Gauge:
+    # O callback devolve um número ou um dicionário {labels: valor}.
+    # kind="counter" para totais que já são contados em outro lugar (ex.: GameManager.evicted).
+    def __init__(
+        self, name: str, help: str, callback: Callable[[], float | Dict[Labels, float]],
+        label_names: Sequence[str] = (), kind: str = "gauge",
+    ):
+        self.name = name
+        self.help = help
+        self.callback = callback
+        self.label_names = tuple(label_names)
+        self.kind = kind
+
+    def export(self) -> tuple:
+        value = self.callback()
+        series = value if isinstance(value, dict) else {(): value}
+        return (self.kind, self.help, self.label_names, (), series)
+
+
+class Registry:
+    def __init__(self, enabled: bool = True):
+        self.metrics: Dict[str, Histogram | Counter | Gauge] = {}
+        self.enabled = enabled
+
+    def histogram(self, name: str, help: str, label_names: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        histogram = self.metrics[name] = Histogram(name, help, label_names, buckets)
+        histogram.enabled = self.enabled
+        return histogram
+
+    def counter(self, name: str, help: str, label_names: Sequence[str] = ()) -> Counter:
+        counter = self.metrics[name] = Counter(name, help, label_names)
+        return counter
+
+    def gauge(self, name: str, help: str, callback: Callable, label_names: Sequence[str] = (), kind: str = "gauge") -> Gauge:
+        # Registrar de novo com o mesmo nome substitui o anterior (ex.: um novo GameManager).
+        gauge = self.metrics[name] = Gauge(name, help, callback, label_names, kind)
+        return gauge
+
+    def set_enabled(self, enabled: bool):
+        self.enabled = enabled
+        for metric in self.metrics.values():
+            if isinstance(metric, Histogram):
+                metric.enabled = enabled
+
+    def export(self) -> Export:
+        return {name: metric.export() for name, metric in self.metrics.items()}
+
+
+def message_label(message_type) -> str:
+    return message_type if message_type in CLIENT_MESSAGE_TYPES else "other"
+
+
+def _merge(exports: List[Export]) -> Export:
+    merged: Export = {}
+    for export in exports:
+        for name, (kind, help, label_names, buckets, series) in export.items():
+            if name not in merged:
+                merged[name] = (kind, help, label_names, buckets, {})
+            target = merged[name][4]
+            for labels, value in series.items():
+                if kind == "histogram":
+                    current = target.setdefault(labels, [0] * len(value))
+                    for i, v in enumerate(value):
+                        current[i] += v
+                else:
+                    target[labels] = target.get(labels, 0) + value
+    return merged
+
+
+def _escape(value: str | None) -> str:
+    return ("" if value is None else str(value)).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(names: Sequence[str], values: Labels, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render(exports: List[Export]) -> str:
+    """Texto de exposição do Prometheus, somando as séries de vários processos."""
+    lines = []
+    for name, (kind, help, label_names, buckets, series) in sorted(_merge(exports).items()):
+        lines.append(f"# HELP {name} {help}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in sorted(series.items(), key=lambda item: tuple(str(v) for v in item[0])):
+            if kind != "histogram":
+                lines.append(f"{name}{_label_text(label_names, labels)} {_number(value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets + (float("inf"),), value[:-1]):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                lines.append(f"{name}_bucket{_label_text(label_names, labels, le)} {cumulative}")
+            lines.append(f"{name}_sum{_label_text(label_names, labels)} {_number(value[-1])}")
+            lines.append(f"{name}_count{_label_text(label_names, labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+async def monitor_event_loop(interval: float = config.EVENT_LOOP_LAG_INTERVAL, process: str = "main"):
+    # Atraso do event loop: quanto o sleep acordou depois do previsto. Cada processo (frente ou shard) tem o seu.
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        event_loop_lag.observe(max(0.0, time.perf_counter() - started - interval), process)
+
+
+# Instância global para ser usada no app
+registry = Registry(config.METRICS_ENABLED)
+
+message_seconds = registry.histogram(
+    "monster_coup_message_seconds",
+    "Time to handle a client websocket message, from decoding to the game session applying it",
+    ("type",),
+)
+phase_seconds = registry.histogram(
+    "monster_coup_phase_seconds",
+    "Time spent per phase: decode, inbox (waiting in the game session), apply, state (building updates), send",
+    ("phase", "type"),
+)
+event_loop_lag = registry.histogram(
+    "monster_coup_event_loop_lag_seconds", "How late the event loop wakes up from a sleep", ("process",), LAG_BUCKETS
+)
+sent_messages = registry.counter("monster_coup_sent_messages_total", "Messages written to websockets", ("type",))
+sent_bytes = registry.counter("monster_coup_sent_bytes_total", "Characters (JSON) or bytes (MessagePack) written to websockets")
+dropped_messages = registry.counter("monster_coup_dropped_messages_total", "Outbound messages dropped or coalesced because a queue was full")
+resumes = registry.counter(
+    "monster_coup_resumes_total", "Reconnections with ?seq=N, by result: replay (from the buffer) or sync (state only)", ("result",)
+)
+replayed_messages = registry.counter("monster_coup_replayed_messages_total", "Messages resent from the buffer on reconnection")
+match_wait_seconds = registry.histogram(
+    "monster_coup_match_wait_seconds", "Time a player waited in the matchmaking queue before a game was formed", (), WAIT_BUCKETS
+)
+matches = registry.counter("monster_coup_matches_total", "Games formed by the matchmaker, by game size", ("size",))
@@ -1,8 +1,16 @@
 # app/core/models.py
+import functools
+import logging
 import random
-from typing import List, Dict
+from collections import deque
+from typing import Deque, List, Dict, Tuple
 from enum import Enum
 
+from .. import config
+from . import engine
+from .delta import diff
+from .serialization import EncodedMessage, add_payload_fields, dumps, splice_payload
+
 class GameState(str, Enum):
     WAITING_FOR_PLAYERS = "WAITING_FOR_PLAYERS"
     IN_PROGRESS = "IN_PROGRESS"
@@ -10,246 +18,313 @@ class GameState(str, Enum):
     AWAITING_CHOICE = "AWAITING_CHOICE"
     FINISHED = "FINISHED"
 
-# ... (Classes Monster, Deck, Player continuam as mesmas) ...
-class Monster:
-    def __init__(self, name: str, ability: str):
-        self.name = name
-        self.ability_description = ability
-
-class Deck:
-    def __init__(self):
-        self.cards: List[Monster] = self._create_deck()
-        self.shuffle()
-
-    def _create_deck(self) -> List[Monster]:
-        monsters_data = {
-            "Dragão": "Destruir um monstro do oponente.",
-            "Espectro": "Roubar 2 moedas de um oponente.",
-            "Falcão": "Trocar uma de suas cartas com uma do baralho.",
-            "Golem": "Bloquear a ação 'Caçar' de outro jogador.",
-            "Slime": "Pegar 3 moedas do banco.",
-        }
-        deck = []
-        for name, ability in monsters_data.items():
-            deck.extend([Monster(name, ability)] * 3)
-        return deck
-
-    def shuffle(self):
-        random.shuffle(self.cards)
-
-    def draw(self) -> Monster | None:
-        return self.cards.pop() if self.cards else None
-
-class Player:
-    def __init__(self, player_id: str):
-        self.id = player_id
-        self.monsters: List[Monster] = []
-        self.coins = 2
-        self.revealed_monsters: List[Monster] = []
-
-    def lose_monster(self, monster_name: str) -> bool:
-        monster_to_reveal = next((m for m in self.monsters if m.name == monster_name), None)
-        if monster_to_reveal:
-            self.monsters.remove(monster_to_reveal)
-            self.revealed_monsters.append(monster_to_reveal)
-            return True
-        return False
+
+def _mutation(method):
+    # Depois de cada método que pode alterar o jogo, registra uma nova versão do estado (se mudou).
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        self._record_version()
+        return result
+    return wrapper
+
+
+# (versão, estado público, {player_id: nomes de my_monsters})
+StateSnapshot = Tuple[int, dict, Dict[str, List[str]]]
+
+_PHASE_TO_GAME_STATE = {
+    engine.Phase.IN_PROGRESS: GameState.IN_PROGRESS,
+    engine.Phase.AWAITING_RESPONSE: GameState.AWAITING_RESPONSE,
+    engine.Phase.AWAITING_CHOICE: GameState.AWAITING_CHOICE,
+    engine.Phase.FINISHED: GameState.FINISHED,
+}
+
+# Nomes das ações de turno no protocolo -> monstro declarado (None para ações sem monstro)
+TURN_ACTIONS = {"Treinar": None, "Caçar": None, "Golpe Final": None}
+TURN_ACTIONS.update({engine.MONSTER_NAMES[card]: card for card in engine.CLAIMABLE})
+
+
+# Mesa máxima: com 7 jogadores sobraria uma única carta no baralho para as trocas.
+MIN_PLAYERS = 2
+MAX_PLAYERS = 6
+
+
+def _names(cards: bytes) -> List[str]:
+    return [engine.MONSTER_NAMES[card] for card in cards]
 
 
 class Game:
-    def __init__(self, game_id: str):
+    # Adaptador do motor de regras (engine.py) para o protocolo do websocket:
+    # traduz player_ids e payloads em assentos/Actions e o State imutável no dicionário público.
+    def __init__(self, game_id: str, seed: int | None = None, max_players: int = MIN_PLAYERS):
+        if not MIN_PLAYERS <= max_players <= MAX_PLAYERS:
+            raise ValueError(f"max_players must be between {MIN_PLAYERS} and {MAX_PLAYERS}")
         self.id = game_id
-        self.players: Dict[str, Player] = {}
-        self.deck = Deck()
-        self.current_turn_player_id: str = None
-        self.game_state: GameState = GameState.WAITING_FOR_PLAYERS
-        self.pending_action: Dict | None = None
-        self.player_to_choose: str | None = None
-
-    # ... (add_player, start_game, _check_for_winner são os mesmos) ...
+        self.seed = seed if seed is not None else random.getrandbits(63)
+        self.max_players = max_players  # O jogo começa quando a mesa enche
+        self.players: Dict[str, int] = {}  # player_id -> assento no motor
+        self.player_ids: List[str] = []    # assento -> player_id
+        self.state: engine.State | None = None
+        self.history: List[Tuple[engine.State, engine.Action]] = []  # (estado anterior, ação aceita)
+
+        # Versionamento do estado para envio de deltas em vez de snapshots completos.
+        self.version = 0
+        # Uma entrada por versão, a última no fim; None até alguém pedir a versão (_current).
+        self._history: Deque[StateSnapshot | None] = deque([None], maxlen=config.STATE_HISTORY_SIZE)
+        self._recorded: Tuple[engine.State | None, int] = (None, 0)  # (estado do motor, jogadores) da versão atual
+        self._public_patches: Dict[int, List[dict]] = {}  # base_version -> patch até a versão atual
+        self.sent_versions: Dict[str, int | None] = {}  # Última versão enviada a cada jogador
+        self._public_json: Tuple[int, str] | None = None  # Estado público já codificado, por versão
+        self._snapshots: Tuple[int, Dict[str, EncodedMessage]] | None = None  # Snapshots da versão, por tipo
+
+    @classmethod
+    def restore(
+        cls, game_id: str, seed: int, player_ids: List[str], version: int, state: engine.State | None,
+        max_players: int = MIN_PLAYERS,
+    ) -> "Game":
+        # Reconstrói um jogo a partir de um snapshot do log de eventos (sem o histórico de ações).
+        game = cls(game_id, seed, max_players)
+        game.player_ids = list(player_ids)
+        game.players = {pid: seat for seat, pid in enumerate(game.player_ids)}
+        game.state = state
+        game.version = version
+        game.rebase_history()
+        return game
+
+    def rebase_history(self):
+        # Descarta as versões guardadas e registra o estado atual como a versão self.version.
+        self._history.clear()
+        self._history.append(None)
+        self._recorded = (self.state, len(self.player_ids))
+        self._public_patches.clear()
+        self._public_json = None
+        self._snapshots = None
+
+    @property
+    def game_state(self) -> GameState:
+        if self.state is None:
+            return GameState.WAITING_FOR_PLAYERS
+        return _PHASE_TO_GAME_STATE[self.state.phase]
+
+    @property
+    def current_turn_player_id(self) -> str | None:
+        return self.player_ids[self.state.turn] if self.state else None
+
+    @property
+    def player_to_choose(self) -> str | None:
+        if self.state is None or self.state.phase != engine.Phase.AWAITING_CHOICE:
+            return None
+        return self.player_ids[self.state.chooser]
+
+    @property
+    def winner_id(self) -> str | None:
+        if self.state is None or self.state.winner < 0:
+            return None
+        return self.player_ids[self.state.winner]
+
+    @property
+    def pending_action(self) -> dict | None:
+        pending = self.state.pending if self.state else None
+        if pending is None:
+            return None
+        source_id = self.player_ids[pending.source]
+        if pending.kind == engine.ActionKind.HUNT:
+            action = {"action": "Caçar", "source_player_id": source_id}
+        else:
+            action = {
+                "action": engine.MONSTER_NAMES[pending.card],
+                "source_player_id": source_id,
+                "target_player_id": self.player_ids[pending.target] if pending.target >= 0 else None,
+            }
+        if self.state.choice == engine.ChoiceKind.SWAP and self.state.phase == engine.Phase.AWAITING_CHOICE:
+            action["is_swap"] = True
+        if self.state.phase == engine.Phase.AWAITING_RESPONSE:
+            # Com mais de 2 jogadores a ação espera todos os oponentes; estes já deixaram passar.
+            action["passed_player_ids"] = [pid for seat, pid in enumerate(self.player_ids) if pending.passed >> seat & 1]
+        return action
+
+    @_mutation
     def add_player(self, player_id: str) -> bool:
-        if player_id not in self.players and len(self.players) < 2:
-            player = Player(player_id)
-            self.players[player_id] = player
+        if player_id not in self.players and len(self.players) < self.max_players:
+            self.players[player_id] = len(self.player_ids)
+            self.player_ids.append(player_id)
             return True
         return False
 
+    @_mutation
     def start_game(self):
-        if len(self.players) == 2 and self.game_state == GameState.WAITING_FOR_PLAYERS:
-            for player in self.players.values():
-                player.monsters.append(self.deck.draw())
-                player.monsters.append(self.deck.draw())
-            player_ids = list(self.players.keys())
-            random.shuffle(player_ids)
-            self.current_turn_player_id = player_ids[0]
-            self.game_state = GameState.IN_PROGRESS
-
-    def next_turn(self):
-        # ... (lógica de next_turn é a mesma) ...
-        player_ids = list(self.players.keys())
-        active_player_ids = [pid for pid, p in self.players.items() if len(p.monsters) > 0]
-        if not active_player_ids or self.current_turn_player_id not in active_player_ids:
-             self._check_for_winner()
-             return
-        current_index = active_player_ids.index(self.current_turn_player_id)
-        next_index = (current_index + 1) % len(active_player_ids)
-        self.current_turn_player_id = active_player_ids[next_index]
-
-    def _check_for_winner(self):
-        active_players = [p for p in self.players.values() if len(p.monsters) > 0]
-        if len(active_players) <= 1:
-            self.game_state = GameState.FINISHED
-            print(f"Game Over! Winner is {active_players[0].id if active_players else 'None'}")
-
-
-    def handle_action(self, player_id: str, action_data: dict):
-        ### MUDANÇA FINAL: Trava de segurança
-        if self.game_state != GameState.IN_PROGRESS: return
-
-        action_name = action_data.get("action")
-        player = self.players[player_id]
+        if len(self.players) >= MIN_PLAYERS and self.state is None:
+            self.state = engine.new_game(len(self.player_ids), self.seed)
 
-        if action_name == "Treinar":
-            player.coins += 1
-            self.next_turn()
+    def _apply(self, action: engine.Action):
+        state = engine.apply(self.state, action)
+        if state is self.state:
             return
-
-        ### MUDANÇA FINAL: Caçar agora pode ser bloqueado
-        if action_name == "Caçar":
-            self.game_state = GameState.AWAITING_RESPONSE
-            self.pending_action = {
-                "action": "Caçar",
-                "source_player_id": player_id
-            }
+        self.history.append((self.state, action))
+        self.state = state
+        if self.state.phase == engine.Phase.FINISHED:
+            logging.info(f"Game {self.id} over! Winner is {self.winner_id}")
+
+    def replay(self, action: engine.Action, version: int):
+        # Reaplica uma ação aceita lida do log de eventos. A versão vem do log, então o estado público
+        # não precisa ser recalculado a cada ação: chame rebase_history() ao fim da replay.
+        self._apply(action)
+        self.version = version
+
+    @_mutation
+    def handle_action(self, player_id: str, action_name: str, target_player_id: str | None = None):
+        if self.game_state != GameState.IN_PROGRESS:
             return
-
-        if action_name == "Golpe Final":
-            target_id = action_data.get("target_player_id")
-            if player.coins >= 7 and target_id in self.players:
-                player.coins -= 7
-                self.game_state = GameState.AWAITING_CHOICE
-                self.player_to_choose = target_id
+        if action_name not in TURN_ACTIONS:
             return
+        seat = self.players[player_id]
+        target = self.players.get(target_player_id, -1)
 
-        # Ações de Monstro (que podem ser contestadas)
-        self.game_state = GameState.AWAITING_RESPONSE
-        self.pending_action = {
-            "action": action_name,
-            "source_player_id": player_id,
-            "target_player_id": action_data.get("target_player_id")
-        }
+        if action_name == "Treinar":
+            action = engine.Action(engine.ActionKind.TRAIN, seat)
+        elif action_name == "Caçar":
+            action = engine.Action(engine.ActionKind.HUNT, seat)
+        elif action_name == "Golpe Final":
+            action = engine.Action(engine.ActionKind.FINAL_STRIKE, seat, target)
+        else:
+            # Ações de Monstro (que podem ser contestadas)
+            action = engine.Action(engine.ActionKind.ABILITY, seat, target, TURN_ACTIONS[action_name])
+        self._apply(action)
 
-    def resolve_pending_action(self, responding_player_id: str, response_data: dict):
-        ### MUDANÇA FINAL: Trava de segurança
-        if self.game_state != GameState.AWAITING_RESPONSE: return
-
-        contested = response_data.get("contested", False)
-        block_with = response_data.get("block_with") # Ex: "Golem"
-
-        source_player = self.players[self.pending_action["source_player_id"]]
-        action_monster = self.pending_action["action"]
-
-        ### MUDANÇA FINAL: Lógica para bloqueio (ex: com Golem)
-        if block_with:
-            # O jogador declara que está bloqueando com um monstro. Isso pode ser contestado!
-            # Para simplificar, vamos assumir que o bloqueio não pode ser contestado.
-            # Se o bloqueio for válido (ex: Golem bloqueando Caçar), a ação é cancelada.
-            if action_monster == "Caçar" and block_with == "Golem":
-                # Ação cancelada. Turno passa.
-                self.pending_action = None
-                self.game_state = GameState.IN_PROGRESS
-                self.next_turn()
-                return
-
-        if not contested:
-            self._execute_monster_ability(source_player, self.pending_action)
+    @_mutation
+    def resolve_pending_action(self, responding_player_id: str, contested: bool = False, block_with: str | None = None):
+        if self.game_state != GameState.AWAITING_RESPONSE:
+            return
+        seat = self.players[responding_player_id]
+        if block_with == "Golem" and self.state.pending.kind == engine.ActionKind.HUNT:
+            action = engine.Action(engine.ActionKind.BLOCK, seat, -1, engine.Card.GOLEM)
+        elif contested:
+            action = engine.Action(engine.ActionKind.CHALLENGE, seat)
         else:
-            # A lógica de contestação continua a mesma...
-            has_monster = any(m.name == action_monster for m in source_player.monsters)
-            if has_monster:
-                self.game_state = GameState.AWAITING_CHOICE
-                self.player_to_choose = responding_player_id
-                monster_to_swap = next(m for m in source_player.monsters if m.name == action_monster)
-                source_player.monsters.remove(monster_to_swap)
-                new_card = self.deck.draw()
-                if new_card: source_player.monsters.append(new_card)
-                self.deck.cards.append(monster_to_swap)
-                self.deck.shuffle()
-            else:
-                self.game_state = GameState.AWAITING_CHOICE
-                self.player_to_choose = source_player.id
-                self.pending_action = None # Ação cancelada
+            action = engine.Action(engine.ActionKind.ALLOW, seat)
+        self._apply(action)
 
+    @_mutation
     def handle_player_choice(self, player_id: str, monster_name: str):
-        ### MUDANÇA FINAL: Trava de segurança
         if self.game_state != GameState.AWAITING_CHOICE or self.player_to_choose != player_id:
             return
+        card = engine.CARD_BY_NAME.get(monster_name, -1)
+        self._apply(engine.Action(engine.ActionKind.CHOOSE, self.players[player_id], -1, card))
 
-        player = self.players[player_id]
-        if not player.lose_monster(monster_name):
-            # O jogador tentou escolher uma carta que não tem, vamos apenas remover a primeira.
-            if player.monsters:
-                player.lose_monster(player.monsters[0].name)
-
-        if self.pending_action:
-             source_player = self.players[self.pending_action["source_player_id"]]
-             self._execute_monster_ability(source_player, self.pending_action)
-
-        self.pending_action = None
-        self.player_to_choose = None
-        self.game_state = GameState.IN_PROGRESS
-        self._check_for_winner()
-        if self.game_state != GameState.FINISHED:
-            self.next_turn()
-
-    def _execute_monster_ability(self, source_player: Player, action_data: dict):
-        action = action_data.get("action")
-        target_id = action_data.get("target_player_id")
-
-        # Não executa nada se não houver ação (caso de contestação perdida)
-        if not action: return
-
-        if action == "Caçar": # Se não foi bloqueado
-            source_player.coins += 2
-        elif action == "Dragão" and target_id:
-            self.game_state = GameState.AWAITING_CHOICE
-            self.player_to_choose = target_id
-        elif action == "Espectro" and target_id:
-            target = self.players[target_id]
-            stolen = min(target.coins, 2)
-            target.coins -= stolen
-            source_player.coins += stolen
-        elif action == "Slime":
-            source_player.coins += 3
-        ### MUDANÇA FINAL: Falcão agora depende de escolha
-        elif action == "Falcão":
-            self.game_state = GameState.AWAITING_CHOICE
-            self.player_to_choose = source_player.id
-            # A lógica da troca será feita em handle_player_choice para o Falcão
-            self.pending_action['is_swap'] = True # Adiciona um marcador
-
-    # ... (get_private_state e get_public_state são os mesmos) ...
     def get_private_state(self, player_id: str) -> dict:
-        player = self.players.get(player_id)
-        if not player: return {}
+        if player_id not in self.players:
+            return {}
         state = self.get_public_state()
-        state["my_monsters"] = [m.name for m in player.monsters]
+        state["my_monsters"] = self._hand_names(player_id)
         return state
 
+    def _hand_names(self, player_id: str) -> List[str]:
+        if self.state is None:
+            return []
+        return _names(self.state.players[self.players[player_id]].hand)
+
     def get_public_state(self) -> dict:
-        return {
-            "id": self.id,
-            "players": {
+        state = self.state
+        if state is None:
+            players = {
+                p_id: {"id": p_id, "coins": engine.STARTING_COINS, "monsters_count": 0, "revealed_monsters": []}
+                for p_id in self.player_ids
+            }
+            deck_size = len(engine.MONSTER_NAMES) * engine.COPIES_PER_MONSTER
+        else:
+            players = {
                 p_id: {
-                    "id": p.id,
+                    "id": p_id,
                     "coins": p.coins,
-                    "monsters_count": len(p.monsters),
-                    "revealed_monsters": [m.name for m in p.revealed_monsters]
-                } for p_id, p in self.players.items()
-            },
+                    "monsters_count": len(p.hand),
+                    "revealed_monsters": _names(p.revealed),
+                } for p_id, p in zip(self.player_ids, state.players)
+            }
+            deck_size = len(state.deck)
+        return {
+            "id": self.id,
+            "players": players,
             "current_turn_player_id": self.current_turn_player_id,
             "game_state": self.game_state.value, # Envia o valor da string do Enum
-            "deck_size": len(self.deck.cards),
+            "deck_size": deck_size,
             "pending_action": self.pending_action,
             "player_to_choose": self.player_to_choose
         }
+
+    def _record_version(self):
+        # O State do motor é imutável (uma ação recusada devolve o mesmo objeto) e jogadores só entram:
+        # comparar os dois basta. Nada é montado aqui; o estado público sai na primeira leitura da versão.
+        state, n_players = self._recorded
+        if self.state is state and len(self.player_ids) == n_players:
+            return
+        self._recorded = (self.state, len(self.player_ids))
+        self.version += 1
+        self._history.append(None)
+        self._public_patches.clear()
+
+    def _current(self) -> StateSnapshot:
+        current = self._history[-1]
+        if current is None:
+            private = {pid: self._hand_names(pid) for pid in self.player_ids}
+            current = self._history[-1] = (self.version, self.get_public_state(), private)
+        return current
+
+    def _snapshot_at(self, version: int | None) -> StateSnapshot | None:
+        # None também para uma versão nunca montada: nenhum jogador a recebeu, então vai o snapshot.
+        if version is None:
+            return None
+        index = len(self._history) - 1 - (self.version - version)
+        if 0 <= index < len(self._history):
+            return self._history[index]
+        return None
+
+    def sync_player(self, player_id: str, version: int | None):
+        # O cliente informa a versão que possui (reconexão ou SYNC após perder um delta).
+        self.sent_versions[player_id] = version
+
+    def get_public_json(self) -> str:
+        # Codificado uma vez por versão e compartilhado por todos os destinatários.
+        if self._public_json is None or self._public_json[0] != self.version:
+            self._public_json = (self.version, dumps(self._current()[1]))
+        return self._public_json[1]
+
+    def public_message(self, message_type: str) -> EncodedMessage:
+        return splice_payload(message_type, self.get_public_json())
+
+    def spectator_update(self) -> EncodedMessage:
+        # Só o estado público, sem my_monsters: o mesmo texto serve para todos os espectadores.
+        return self._snapshot("GAME_STATE_UPDATE")
+
+    def _snapshot(self, message_type: str) -> EncodedMessage:
+        # Um por tipo e versão, comum a todos os destinatários; cada jogador só acrescenta o my_monsters
+        # dele, e as conexões binárias convertem a parte comum uma vez (wire.pack).
+        if self._snapshots is None or self._snapshots[0] != self.version:
+            self._snapshots = (self.version, {})
+        messages = self._snapshots[1]
+        message = messages.get(message_type)
+        if message is None:
+            message = messages[message_type] = splice_payload(message_type, self.get_public_json(), self.version)
+        return message
+
+    def get_state_update(self, player_id: str, snapshot_type: str = "GAME_STATE_UPDATE") -> dict | EncodedMessage | None:
+        """Delta desde a última versão enviada ao jogador, ou snapshot completo se ela saiu do histórico."""
+        base_version = self.sent_versions.get(player_id)
+        if base_version == self.version:
+            return None
+        self.sent_versions[player_id] = self.version
+
+        current = self._current()
+        base = self._snapshot_at(base_version)
+        if base is None:
+            # Só a parte privada (my_monsters) é codificada por destinatário.
+            return add_payload_fields(self._snapshot(snapshot_type), my_monsters=current[2].get(player_id, []))
+
+        # A parte pública do patch é a mesma para todos os jogadores que partem da mesma versão.
+        patch = self._public_patches.get(base_version)
+        if patch is None:
+            patch = self._public_patches[base_version] = diff(base[1], current[1])
+        old_monsters, new_monsters = base[2].get(player_id), current[2].get(player_id, [])
+        if old_monsters != new_monsters:
+            op = "add" if old_monsters is None else "replace"
+            patch = patch + [{"op": op, "path": "/my_monsters", "value": new_monsters}]
+        return {"type": "GAME_STATE_DELTA", "base_version": base_version, "version": self.version, "patch": patch}
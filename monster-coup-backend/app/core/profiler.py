@@ -0,0 +1,75 @@
+# app/core/profiler.py
+# Profiler por amostragem para jogos específicos, ligado e desligado em tempo de execução.
+#
+# Um timer de CPU (setitimer/SIGPROF) interrompe o processo a cada intervalo. O handler roda na
+# thread principal, a do event loop, e recebe o frame que estava executando: se é um comando de um
+# jogo marcado, a pilha é guardada; senão a amostra é descartada sem percorrer nada.
+# (Uma thread amostradora não serve: com o GIL ela só roda quando o event loop está parado no
+# select, nunca no meio de um comando.) O resultado sai no formato "folded" (uma pilha por linha
+# com a contagem), aceito por flamegraph.pl e speedscope. Só existe em sistemas com setitimer.
+import os
+import signal
+from collections import Counter
+from types import CodeType, FrameType
+from typing import Dict, Tuple
+
+from .. import config
+
+
+class SamplingProfiler:
+    def __init__(self, interval: float = config.PROFILE_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.games: Dict[str, Counter] = {}  # game_id -> pilha ((código, linha), ...) -> amostras
+        # Jogo cujo comando está rodando agora no event loop (escrito pela GameSession).
+        self.current: str | None = None
+        self._previous_handler = None
+        self._installed = False  # O handler de SIGPROF e o timer são nossos
+
+    @property
+    def available(self) -> bool:
+        return hasattr(signal, "setitimer")
+
+    def start(self, game_id: str):
+        # Precisa ser chamado da thread principal (a do event loop): só ela instala handlers de sinal.
+        if not self.available:
+            raise RuntimeError("Sampling profiler needs signal.setitimer (not available on this platform)")
+        if not self.games:
+            self._previous_handler = signal.signal(signal.SIGPROF, self._sample)
+            signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+            self._installed = True
+        self.games.setdefault(game_id, Counter())
+
+    def stop(self, game_id: str) -> str:
+        """Desliga o profiler do jogo e devolve as pilhas amostradas no formato folded."""
+        samples = self.games.pop(game_id, None)
+        # Um stop de jogo que não estava sendo amostrado não mexe no SIGPROF (que pode ser de outro).
+        if samples is not None and not self.games and self._installed:
+            signal.setitimer(signal.ITIMER_PROF, 0, 0)
+            signal.signal(signal.SIGPROF, self._previous_handler or signal.SIG_DFL)
+            self._installed = False
+        samples = samples or Counter()
+        folded = Counter()
+        for stack, count in samples.items():
+            folded[_fold(stack)] += count
+        return "".join(f"{stack} {count}\n" for stack, count in folded.most_common())
+
+    def _sample(self, signum: int, frame: FrameType | None):
+        game_id = self.current
+        if game_id is None:
+            return
+        # Só (código, linha) na hora da amostra; os nomes são montados no stop().
+        stack = []
+        while frame is not None:
+            stack.append((frame.f_code, frame.f_lineno))
+            frame = frame.f_back
+        samples = self.games.get(game_id)
+        if samples is not None:
+            samples[tuple(stack)] += 1
+
+
+def _fold(stack: Tuple[Tuple[CodeType, int], ...]) -> str:
+    return ";".join(f"{code.co_name} ({os.path.basename(code.co_filename)}:{line})" for code, line in reversed(stack))
+
+
+# Instância global para ser usada no app
+profiler = SamplingProfiler()
@@ -0,0 +1,88 @@
+# app/core/serialization.py
+import json
+from typing import Any, Callable, NamedTuple, Tuple
+
+from .. import config
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional; sem ele usamos o json da stdlib
+    orjson = None
+
+
+def _dumps_stdlib(obj: Any) -> str:
+    # Mesmo formato compacto que o send_json do Starlette usa.
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def _dumps_orjson(obj: Any) -> str:
+    return orjson.dumps(obj).decode()
+
+
+ENCODERS: dict[str, Callable[[Any], str]] = {"json": _dumps_stdlib}
+if orjson is not None:
+    ENCODERS["orjson"] = _dumps_orjson
+
+dumps: Callable[[Any], str] = ENCODERS.get(config.JSON_ENCODER) or ENCODERS.get("orjson", _dumps_stdlib)
+
+
+# Leitura (log de eventos): orjson quando disponível.
+loads: Callable[[str | bytes], Any] = orjson.loads if orjson is not None else json.loads
+
+
+def set_encoder(name: str):
+    global dumps
+    dumps = ENCODERS[name]
+
+
+class PackCache:
+    # Parte comum a todos os destinatários de uma mensagem (o texto antes do seq e do my_monsters de
+    # cada um). O formato binário (app/core/wire.py) guarda aqui a conversão dela, feita uma vez só.
+    __slots__ = ("text", "parts")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.parts = None
+
+
+class EncodedMessage(NamedTuple):
+    # Mensagem já serializada: enviada como está, sem passar de novo pelo encoder.
+    type: str
+    text: str
+    version: int | None = None
+    shared: PackCache | None = None
+    payload_fields: Tuple[Tuple[str, Any], ...] = ()  # Acrescentados ao payload de shared.text
+    fields: Tuple[Tuple[str, Any], ...] = ()  # Acrescentados ao objeto de shared.text
+
+
+def encode_message(message: dict) -> EncodedMessage:
+    text = dumps(message)
+    return EncodedMessage(message.get("type"), text, message.get("version"), PackCache(text))
+
+
+def append_field(message: EncodedMessage, key: str, value: int) -> EncodedMessage:
+    # Acrescenta um campo numérico sem recodificar a mensagem (ex.: o seq de cada destinatário).
+    return message._replace(text=f'{message.text[:-1]},"{key}":{value}}}', fields=message.fields + ((key, value),))
+
+
+def add_payload_fields(message: EncodedMessage, **fields: Any) -> EncodedMessage:
+    # Campos de um destinatário (ex.: my_monsters) no fim do payload de uma mensagem de splice_payload.
+    # O payload é o último campo dela: vale só antes de append_field.
+    suffix = "".join(f',"{key}":{dumps(value)}' for key, value in fields.items())
+    return message._replace(
+        text=f"{message.text[:-2]}{suffix}}}}}", payload_fields=message.payload_fields + tuple(fields.items()),
+    )
+
+
+def splice_payload(message_type: str, payload_json: str, version: int | None = None, **extra_fields: Any) -> EncodedMessage:
+    """Monta {"type", "version", "payload"} reaproveitando um payload já codificado.
+
+    Campos extras (ex.: my_monsters) são inseridos no fim do objeto do payload.
+    Tipos de mensagem e nomes de campo são identificadores ASCII e não precisam de escape.
+    """
+    header = f'{{"type":"{message_type}",'
+    if version is not None:
+        header += f'"version":{version},'
+    text = f'{header}"payload":{payload_json}}}'
+    message = EncodedMessage(message_type, text, version, PackCache(text))
+    return add_payload_fields(message, **extra_fields) if extra_fields else message
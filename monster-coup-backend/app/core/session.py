@@ -0,0 +1,337 @@
+# app/core/session.py
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Set, Tuple
+
+from .. import config
+from ..ai.bots import BotPlayer, bot_manager
+from ..schemas import ClientMessage
+from .connection_manager import Message, Resume, SpectatorUpdate
+from .event_log import EventLog
+from .metrics import message_label, phase_seconds, replayed_messages, resumes
+from .models import Game, GameState
+from .profiler import profiler
+from .serialization import EncodedMessage, append_field, encode_message
+
+# Mensagens produzidas por um comando: (player_id destinatário ou None para todos, mensagem)
+Outbound = List[Tuple[str | None, Message]]
+Deliver = Callable[[str, Outbound], None]
+
+
+class GameError(Exception):
+    # Erro de um comando, já com o status HTTP correspondente.
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class MessageStream:
+    # Mensagens enviadas a um jogador, numeradas (campo "seq"), com as últimas guardadas para
+    # reenviar a um cliente que reconecta informando o último seq que recebeu.
+    def __init__(self, size: int = config.RESUME_BUFFER_SIZE):
+        # Começa no relógio (microssegundos): depois de um reinício os números seguem maiores que os
+        # já enviados, e um seq antigo nunca é confundido com um do stream novo.
+        self.seq = time.time_ns() // 1000
+        self.buffer: Deque[Message] = deque(maxlen=size)
+
+    def stamp(self, message: Message) -> Message:
+        self.seq += 1
+        if isinstance(message, EncodedMessage):
+            message = append_field(message, "seq", self.seq)
+        else:
+            message = dict(message, seq=self.seq)
+        self.buffer.append(message)
+        return message
+
+    def since(self, seq: int) -> List[Message] | None:
+        """Mensagens depois de seq, ou None se alguma já saiu do buffer (ou seq não é deste stream)."""
+        missed = self.seq - seq
+        if missed < 0 or missed > len(self.buffer):
+            return None
+        return list(self.buffer)[len(self.buffer) - missed:] if missed else []
+
+
+class GameSession:
+    # Ator de um jogo: todo comando (HTTP, websocket ou bot) entra na inbox e é aplicado
+    # em ordem por uma única task consumidora. Os comandos são síncronos e curtos; a task cede
+    # o event loop entre eles, então um jogo muito ativo não segura os demais.
+    def __init__(self, game: Game, deliver: Deliver, log: EventLog | None = None):
+        self.game = game
+        self.deliver = deliver
+        self.log = log
+        self.inbox: asyncio.Queue = asyncio.Queue()
+        self._outbox: Outbound = []
+        self._task: asyncio.Task | None = None
+        self._bot_tasks: Set[asyncio.Task] = set()  # Buscas de bots em andamento: referência forte até terminarem
+        self.closed = False
+        # Usados pelo reaper do GameManager para decidir quando remover o jogo.
+        self.last_activity = time.monotonic()
+        self.connections: Dict[str, int] = {}  # player_id -> websockets abertos
+        self.streams: Dict[str, MessageStream] = {}  # player_id -> mensagens numeradas (só jogadores humanos)
+        self.spectators = 0  # Websockets de espectadores abertos; sem nenhum, o estado público não é publicado
+        self._spectated_version: int | None = None
+
+    def _ensure_started(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        self.closed = True
+        bot_manager.remove_game(self.game.id)
+        if self.game.id in profiler.games:
+            profiler.stop(self.game.id)
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        for task in self._bot_tasks:
+            task.cancel()  # A thread da busca vai até o prazo dela, mas a jogada é descartada
+        # Comandos ainda na inbox não vão rodar: quem espera por eles recebe o mesmo erro de um jogo removido.
+        while not self.inbox.empty():
+            _, _, future, _ = self.inbox.get_nowait()
+            if future and not future.done():
+                future.set_exception(GameError(404, "Game not found"))
+
+    async def submit(self, command: str, *args) -> Any:
+        """Enfileira o comando e espera o resultado (ou a GameError) dele."""
+        future = asyncio.get_running_loop().create_future()
+        self.post(command, *args, future=future)
+        return await future
+
+    def post(self, command: str, *args, future: asyncio.Future | None = None):
+        if self.closed:
+            # Jogo já removido (ex.: um bot terminou de pensar depois do reaper passar).
+            if future:
+                future.set_exception(GameError(404, "Game not found"))
+            return
+        self._ensure_started()
+        self.inbox.put_nowait((getattr(self, f"_cmd_{command}"), args, future, time.perf_counter()))
+
+    async def _run(self):
+        while True:
+            handler, args, future, queued_at = await self.inbox.get()
+            self.last_activity = time.monotonic()
+            phase_seconds.observe(time.perf_counter() - queued_at, "inbox", handler.__name__[len("_cmd_"):])
+            # Profiler ligado para este jogo: a thread dele só amostra enquanto este comando roda.
+            profiled = self.game.id in profiler.games
+            if profiled:
+                profiler.current = self.game.id
+            try:
+                result = handler(*args)
+            except Exception as exc:
+                if not isinstance(exc, GameError):
+                    logging.exception(f"Command {handler.__name__} failed in game {self.game.id}")
+                if future and not future.done():
+                    future.set_exception(exc)
+            else:
+                if future and not future.done():
+                    future.set_result(result)
+            finally:
+                if profiled:
+                    profiler.current = None
+                if self.spectators and self.game.version != self._spectated_version:
+                    # Uma publicação por versão, qualquer que seja o comando que a criou.
+                    self._spectated_version = self.game.version
+                    self._outbox.append((None, SpectatorUpdate(self.game.spectator_update())))
+                if self._outbox:
+                    outbound, self._outbox = self._outbox, []
+                    self.deliver(self.game.id, outbound)
+            await asyncio.sleep(0)
+
+    # --- Saída ---
+    def _broadcast(self, message: Message):
+        # Cada jogador recebe a mensagem com o seu próprio seq; o corpo é codificado uma vez só.
+        if isinstance(message, dict):
+            message = encode_message(message)
+        for player_id in self.game.players:
+            self._send(player_id, message)
+
+    def _send(self, player_id: str, message: Message):
+        message = self._stamp(player_id, message)
+        if message is not None:
+            self._outbox.append((player_id, message))
+
+    def _stamp(self, player_id: str, message: Message) -> Message | None:
+        stream = self.streams.get(player_id)
+        if stream is None:
+            if player_id in bot_manager.bots.get(self.game.id, ()):
+                return None  # Bots leem o jogo direto; não têm websocket
+            stream = self.streams[player_id] = MessageStream()
+        return stream.stamp(message)
+
+    def _send_state_update(self, player_id: str, snapshot_type: str = "GAME_STATE_UPDATE"):
+        message = self.game.get_state_update(player_id, snapshot_type)
+        if message:
+            self._send(player_id, message)
+
+    def _push_state_updates(self, message_type: str | None = None):
+        # Otimização: Em vez de broadcast + loop de send_to_player,
+        # apenas o loop já é suficiente pois o estado privado contém o público.
+        # Cada jogador recebe apenas o delta desde a última versão que lhe foi enviada.
+        started = time.perf_counter()
+        for pid in self.game.players:
+            self._send_state_update(pid)
+        phase_seconds.observe(time.perf_counter() - started, "state", message_label(message_type))
+        self._schedule_bot_moves()
+
+    def _log(self, record: dict):
+        if self.log:
+            self.log.append(record)
+
+    # --- Regras ---
+    def _apply_player_message(self, player_id: str, message: ClientMessage) -> bool:
+        """Aplica uma mensagem de jogo, venha ela de um websocket ou de um bot. False se não é válida agora."""
+        game = self.game
+        n_actions = len(game.history)
+        message_type, payload = message.type, message.payload
+        started = time.perf_counter()
+        if message_type == "PLAYER_ACTION" and game.current_turn_player_id == player_id:
+            game.handle_action(player_id, payload.action, payload.target_player_id)
+
+        elif message_type == "ACTION_RESPONSE":
+            game.resolve_pending_action(player_id, payload.contested, payload.block_with)
+
+        elif message_type == "CHOOSE_MONSTER" and game.player_to_choose == player_id:
+            game.handle_player_choice(player_id, payload.monster_name)
+
+        else:
+            return False
+        # Só as regras: o estado público da versão nova é montado depois, no primeiro get_state_update.
+        phase_seconds.observe(time.perf_counter() - started, "apply", message_type)
+        if len(game.history) > n_actions:
+            # Só ações aceitas pelo motor vão para o log; a replay refaz o jogo a partir delas.
+            self._log({"t": "action", "g": game.id, "m": message_type, "a": list(game.history[-1][1]), "v": game.version})
+        return True
+
+    # --- Bots ---
+    def _schedule_bot_moves(self):
+        for bot in bot_manager.claim_bots_to_move(self.game):
+            task = asyncio.create_task(self._think(bot))
+            self._bot_tasks.add(task)
+            task.add_done_callback(self._bot_tasks.discard)
+
+    async def _think(self, bot: BotPlayer):
+        version = self.game.version
+        message = await bot_manager.choose_message(self.game, bot)
+        if message is None:
+            # O jogo mudou durante a busca (ex.: outro jogador respondeu primeiro) ou a busca falhou;
+            # reavalia. Falhas seguidas são limitadas em choose_message, então isso não se repete para sempre.
+            self.post("schedule_bots")
+        else:
+            self.post("bot_move", bot.player_id, message, version)
+
+    # --- Comandos ---
+    def _cmd_connect(self, player_id: str) -> bool:
+        if player_id not in self.game.players:
+            return False
+        # Contador e não conjunto: numa reconexão o socket novo chega antes do antigo sair.
+        self.connections[player_id] = self.connections.get(player_id, 0) + 1
+        return True
+
+    def _cmd_disconnect(self, player_id: str):
+        remaining = self.connections.get(player_id, 0) - 1
+        if remaining > 0:
+            # Reconexão: o socket antigo saiu, mas o jogador segue conectado pelo novo.
+            self.connections[player_id] = remaining
+            return
+        self.connections.pop(player_id, None)
+        self._broadcast({"type": "PLAYER_DISCONNECTED", "player_id": player_id})
+
+    def _cmd_spectate(self):
+        # O estado atual vai no fim do comando; o espectador já está no grupo dele na frente.
+        self.spectators += 1
+        self._spectated_version = None
+
+    def _cmd_unspectate(self):
+        self.spectators = max(0, self.spectators - 1)
+
+    def _cmd_join(self, player_id: str, bot: bool = False):
+        game = self.game
+        if game.game_state != GameState.WAITING_FOR_PLAYERS:
+            raise GameError(400, "Game has already started")
+        if player_id == "spectate":
+            raise GameError(400, "Player ID is reserved")  # /ws/{game_id}/spectate é a rota dos espectadores
+        ### MUDANÇA: Lógica de adicionar jogador simplificada para corresponder a models.py
+        if not game.add_player(player_id):
+            raise GameError(400, "Player ID already exists or game is full.")
+        self._log({"t": "join", "g": game.id, "p": player_id, "bot": bot})
+
+        self._broadcast(game.public_message("PLAYER_JOINED"))
+
+        if len(game.players) == game.max_players:  # Começa quando a mesa enche
+            game.start_game()
+            self._log({"t": "start", "g": game.id})
+            # Após o início, envia o estado público a todos
+            self._broadcast(game.public_message("GAME_START"))
+            # E o estado privado para cada um
+            for pid in game.players:
+                self._send_state_update(pid, "PRIVATE_STATE")
+            self._schedule_bot_moves()
+
+    def _cmd_add_bot(self) -> str:
+        player_id = bot_manager.new_bot_id(self.game)
+        # O bot é registrado antes de entrar: se ele completar a mesa, já joga o primeiro turno.
+        bot_manager.add_bot(self.game, player_id)
+        try:
+            self._cmd_join(player_id, bot=True)
+        except GameError:
+            bot_manager.remove_bot(self.game.id, player_id)
+            raise
+        return player_id
+
+    def _cmd_resume(self, player_id: str, connection_id: int, seq: int | None, version: int | None):
+        # Primeiro comando de toda conexão nova; a conexão só começa a enviar ao receber o Resume.
+        stream = self.streams.get(player_id)
+        missed = stream.since(seq) if stream is not None and seq is not None else None
+        if missed is not None:
+            # O cliente perdeu só estas: nem o estado precisa ser reenviado (os deltas formam uma cadeia).
+            resumes.inc(1, "replay")
+            replayed_messages.inc(len(missed))
+            self._outbox.append((player_id, Resume(connection_id, missed, True)))
+            return
+        if seq is not None:
+            resumes.inc(1, "sync")  # Buffer já passou do seq do cliente: sincroniza o estado
+        self.game.sync_player(player_id, version)
+        message = self.game.get_state_update(player_id, "PRIVATE_STATE")
+        messages = [self._stamp(player_id, message)] if message else []
+        self._outbox.append((player_id, Resume(connection_id, messages, False)))
+
+    def _cmd_sync(self, player_id: str, version: int | None, snapshot_type: str = "GAME_STATE_UPDATE"):
+        # Um cliente que (re)conecta ou perdeu um delta informa a versão que possui.
+        self.game.sync_player(player_id, version)
+        self._send_state_update(player_id, snapshot_type)
+
+    def _cmd_message(self, player_id: str, message: ClientMessage):
+        # A mensagem já chega validada (app/schemas.py), em JSON ou MessagePack.
+        if message.type == "SYNC":
+            # O cliente recebeu um delta com base_version diferente da sua versão (ou perdeu o estado).
+            self._cmd_sync(player_id, message.payload.version)
+
+        elif self._apply_player_message(player_id, message):
+            self._push_state_updates(message.type)
+
+        else:
+            self._send(player_id, {"type": "ERROR", "message": "Invalid action or not your turn."})
+
+    def _cmd_reject(self, player_id: str, detail: str):
+        # Mensagem que não passou na validação: só o erro volta, pelo stream numerado do jogador.
+        self._send(player_id, {"type": "ERROR", "message": f"Invalid message: {detail}"})
+
+    def _cmd_bot_move(self, player_id: str, message: ClientMessage, version: int):
+        if self.game.version != version:
+            self._schedule_bot_moves()
+        elif self._apply_player_message(player_id, message):
+            self._push_state_updates(message.type)
+
+    def _cmd_schedule_bots(self):
+        self._schedule_bot_moves()
+
+    def _cmd_profile_start(self):
+        if not profiler.available:
+            raise GameError(501, "Profiling is not supported on this platform")
+        profiler.start(self.game.id)
+
+    def _cmd_profile_stop(self) -> str:
+        return profiler.stop(self.game.id)
@@ -0,0 +1,237 @@
+# app/core/sharding.py
+# Modo com vários processos: cada worker roda seu próprio event loop com um GameManager local,
+# e o processo da frente (o do uvicorn) só mantém os websockets. Cada jogo mora no worker
+# crc32(game_id) % n_shards; os comandos vão por um Pipe e as mensagens de saída voltam pelo
+# mesmo Pipe para serem entregues pelo ConnectionManager da frente.
+import asyncio
+import itertools
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import zlib
+from collections import Counter
+from multiprocessing.connection import Connection
+from typing import Any, Dict, List, Set, Tuple
+
+from .. import config
+from . import metrics
+from .connection_manager import connection_manager
+from .models import MIN_PLAYERS
+from .session import GameError
+
+
+def shard_for(game_id: str, n_shards: int) -> int:
+    # crc32 em vez de hash(): precisa ser estável entre processos.
+    return zlib.crc32(game_id.encode()) % n_shards
+
+
+def _start_reader(conn: Connection, loop: asyncio.AbstractEventLoop, handle, on_close=None) -> threading.Thread:
+    # Connection.recv bloqueia; uma thread lê o Pipe e repassa cada mensagem para o event loop.
+    # on_close roda no event loop quando a outra ponta fecha (processo encerrado ou morto).
+    def read():
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                break
+            loop.call_soon_threadsafe(handle, message)
+        if on_close is not None:
+            loop.call_soon_threadsafe(on_close)
+
+    thread = threading.Thread(target=read, daemon=True)
+    thread.start()
+    return thread
+
+
+def _start_writer(conn: Connection, loop: asyncio.AbstractEventLoop, on_error) -> Tuple[queue.SimpleQueue, threading.Thread]:
+    # Connection.send também bloqueia quando o Pipe enche (a outra ponta não está lendo): uma thread
+    # escreve e o event loop só enfileira, então um shard lento não segura os jogos dos outros, nem uma
+    # frente lenta os jogos do shard. None é enviado à outra ponta e encerra a thread.
+    outbox: queue.SimpleQueue = queue.SimpleQueue()
+
+    def write():
+        while True:
+            message = outbox.get()
+            try:
+                conn.send(message)
+            except (OSError, ValueError):  # Pipe fechado
+                loop.call_soon_threadsafe(on_error)
+                return
+            if message is None:
+                return
+
+    thread = threading.Thread(target=write, daemon=True)
+    thread.start()
+    return outbox, thread
+
+
+# --- Lado do worker ---
+async def _serve(conn: Connection, shard: int):
+    # Import tardio: o worker importa este módulo antes de game_manager, que por sua vez importa este.
+    from .game_manager import GameManager
+
+    loop = asyncio.get_running_loop()
+    stopped = asyncio.Event()
+    outbox, writer = _start_writer(conn, loop, stopped.set)  # Pipe fechado: a frente encerrou
+    manager = GameManager(
+        deliver=lambda game_id, outbound: outbox.put(("deliver", game_id, outbound)),
+        close_game=lambda game_id: outbox.put(("close", game_id)),
+        # Cada shard tem seu próprio log; o número de shards não pode mudar entre reinícios.
+        log_dir=os.path.join(config.EVENT_LOG_DIR, f"shard-{shard}") if config.EVENT_LOG_DIR else "",
+    )
+
+    async def run(request_id: int, game_id: str, command: str, args: tuple):
+        try:
+            if command == "create":
+                manager.create_game(game_id, *args)
+                result = game_id
+            elif command == "stats":
+                result = await manager.stats()
+            elif command == "metrics":
+                result = metrics.registry.export()
+            else:
+                result = await manager.submit(game_id, command, *args)
+            outbox.put(("result", request_id, True, result))
+        except GameError as exc:
+            outbox.put(("result", request_id, False, (exc.status_code, exc.detail)))
+        except Exception as exc:
+            logging.exception(f"Shard command {command} failed for game {game_id}")
+            outbox.put(("result", request_id, False, (500, repr(exc))))
+
+    def handle(message):
+        if message is None:
+            stopped.set()
+            return
+        loop.create_task(run(*message))
+
+    _start_reader(conn, loop, handle, lambda: handle(None))  # Frente encerrada: o worker também para
+    await manager.start()
+    lag_monitor = asyncio.create_task(metrics.monitor_event_loop(process=f"shard-{shard}"))
+    await stopped.wait()
+    lag_monitor.cancel()
+    await manager.stop()
+    # O que o stop ainda entregou sai antes de o processo terminar (a thread é daemon).
+    outbox.put(None)
+    await loop.run_in_executor(None, writer.join, 5)
+
+
+def _worker_main(conn: Connection, shard: int):
+    logging.basicConfig(level=logging.INFO)
+    logging.info(f"Game shard {shard} started")
+    asyncio.run(_serve(conn, shard))
+
+
+# --- Lado da frente ---
+class ShardedGameManager:
+    def __init__(self, n_shards: int):
+        self.n_shards = n_shards
+        self._conns: List[Connection] = []
+        self._outboxes: List[queue.SimpleQueue] = []
+        self._processes: List[multiprocessing.Process] = []
+        self._pending: Dict[int, Tuple[int, asyncio.Future]] = {}  # request_id -> (shard, futuro)
+        self._ids = itertools.count()
+        self.lost: Set[int] = set()  # Shards cujo processo morreu: os jogos deles respondem 503
+        self._stopping = False
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        context = multiprocessing.get_context("spawn")
+        for shard in range(self.n_shards):
+            front, worker = context.Pipe()
+            process = context.Process(target=_worker_main, args=(worker, shard), daemon=True)
+            process.start()
+            worker.close()
+            self._conns.append(front)
+            self._processes.append(process)
+            outbox, _ = _start_writer(front, loop, lambda shard=shard: self._shard_lost(shard))
+            self._outboxes.append(outbox)
+            _start_reader(front, loop, self._handle, lambda shard=shard: self._shard_lost(shard))
+
+    async def stop(self):
+        self._stopping = True
+        for outbox in self._outboxes:
+            outbox.put(None)
+        for process in self._processes:
+            process.join(timeout=5)
+        self._conns.clear()
+        self._outboxes.clear()
+        self._processes.clear()
+
+    def _shard_lost(self, shard: int):
+        if self._stopping or shard in self.lost:
+            return
+        self.lost.add(shard)
+        logging.error(f"Game shard {shard} exited; its games are unavailable")
+        error = GameError(503, f"Game shard {shard} is unavailable")
+        for request_id, (request_shard, future) in list(self._pending.items()):
+            if request_shard == shard:
+                del self._pending[request_id]
+                if not future.done():
+                    future.set_exception(error)
+
+    def _handle(self, message):
+        if message is None:
+            return  # O worker está encerrando: não envia mais nada
+        if message[0] == "deliver":
+            _, game_id, outbound = message
+            connection_manager.deliver(game_id, outbound)
+            return
+        if message[0] == "close":
+            connection_manager.close_game(message[1])
+            return
+        _, request_id, ok, value = message
+        _, future = self._pending.pop(request_id, (None, None))
+        if future is None or future.done():
+            return
+        if ok:
+            future.set_result(value)
+        else:
+            future.set_exception(GameError(*value))
+
+    async def _request(self, game_id: str, command: str, args: tuple = (), shard: int | None = None) -> Any:
+        if shard is None:
+            shard = shard_for(game_id, self.n_shards)
+        if shard in self.lost:
+            raise GameError(503, f"Game shard {shard} is unavailable")
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = (shard, future)
+        self._outboxes[shard].put((request_id, game_id, command, args))
+        return await future
+
+    def _live_shards(self) -> List[int]:
+        return [shard for shard in range(self.n_shards) if shard not in self.lost]
+
+    async def new_game(self, max_players: int = MIN_PLAYERS) -> str:
+        from .game_manager import new_game_id
+        if not self._live_shards():
+            raise GameError(503, "No game shard is available")
+        game_id = new_game_id()
+        while shard_for(game_id, self.n_shards) in self.lost:
+            game_id = new_game_id()  # Jogos novos só vão para shards vivos
+        return await self._request(game_id, "create", (max_players,))
+
+    async def submit(self, game_id: str, command: str, *args) -> Any:
+        return await self._request(game_id, command, args)
+
+    async def shard_metrics(self) -> List[metrics.Export]:
+        return await asyncio.gather(*(self._request("", "metrics", shard=i) for i in self._live_shards()))
+
+    async def stats(self) -> dict:
+        shards = await asyncio.gather(*(self._request("", "stats", shard=i) for i in self._live_shards()))
+        live = sum(stats["live_games"] for stats in shards)
+        evicted_by_reason = Counter()
+        for stats in shards:
+            evicted_by_reason.update(stats["evicted_by_reason"])
+        # Média ponderada pelo número de jogos de cada shard.
+        approx_bytes = sum(stats["approx_bytes_per_game"] * stats["live_games"] for stats in shards) // live if live else 0
+        return {
+            "live_games": live,
+            "evicted_games": sum(evicted_by_reason.values()),
+            "evicted_by_reason": dict(evicted_by_reason),
+            "approx_bytes_per_game": approx_bytes,
+            "shards": shards,
+            "lost_shards": sorted(self.lost),
+        }
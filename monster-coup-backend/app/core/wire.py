@@ -0,0 +1,216 @@
+# app/core/wire.py
+# Formato das mensagens no websocket, escolhido por conexão pelo subprotocolo (Sec-WebSocket-Protocol):
+#
+#   monster-coup.json     texto JSON, o padrão (também sem subprotocolo);
+#   monster-coup.msgpack  binário MessagePack, com estados do jogo, ações, monstros, tipos de mensagem
+#                         e operações de patch trocados por inteiros pequenos (tabelas abaixo).
+#
+# As mensagens continuam sendo montadas e codificadas em JSON uma vez por versão; a conexão binária
+# converte na hora de enviar, uma vez por mensagem comum a vários destinatários (PackCache). Nos dois
+# formatos a entrada é validada pelos modelos de app/schemas.py.
+from typing import Any, Dict, Iterable
+
+from .. import schemas
+from . import engine
+from .models import TURN_ACTIONS, GameState
+from .serialization import EncodedMessage, PackCache, loads
+
+try:
+    import msgpack
+except ImportError:  # msgpack é opcional; sem ele só o JSON é oferecido
+    msgpack = None
+
+JSON = "monster-coup.json"
+MSGPACK = "monster-coup.msgpack"
+SUBPROTOCOLS = (MSGPACK, JSON) if msgpack is not None else (JSON,)
+_PAYLOAD_KEY = msgpack.packb("payload") if msgpack is not None else b""
+
+# Códigos do formato binário: a posição na tupla. Só se acrescentam nomes no fim, nunca se reordena.
+MESSAGE_TYPES = (
+    "PLAYER_ACTION", "ACTION_RESPONSE", "CHOOSE_MONSTER", "SYNC",
+    "PLAYER_JOINED", "GAME_START", "GAME_STATE_UPDATE", "PRIVATE_STATE", "GAME_STATE_DELTA",
+    "PLAYER_DISCONNECTED", "ERROR", "MATCH_FOUND",
+)
+GAME_STATES = tuple(state.value for state in GameState)
+ACTIONS = tuple(TURN_ACTIONS)
+MONSTERS = engine.MONSTER_NAMES  # O código de um monstro é a própria carta do motor
+PATCH_OPS = ("add", "replace", "remove")
+
+# Campo -> tabela. Vale onde quer que o campo apareça, inclusive como último segmento do caminho de
+# uma operação de patch (ex.: {"op": "replace", "path": "/game_state", "value": ...}).
+_FIELDS = {
+    "type": MESSAGE_TYPES, "game_state": GAME_STATES, "action": ACTIONS, "op": PATCH_OPS,
+    "monster_name": MONSTERS, "block_with": MONSTERS, "revealed_monsters": MONSTERS, "my_monsters": MONSTERS,
+}
+_TO_CODE: Dict[str, Dict[Any, Any]] = {field: {name: i for i, name in enumerate(names)} for field, names in _FIELDS.items()}
+_FROM_CODE: Dict[str, Dict[Any, Any]] = {field: dict(enumerate(names)) for field, names in _FIELDS.items()}
+
+
+def negotiate(offered: Iterable[str]) -> str | None:
+    """Primeiro subprotocolo oferecido pelo cliente que o servidor fala; None fica no JSON."""
+    for subprotocol in offered:
+        if subprotocol in SUBPROTOCOLS:
+            return subprotocol
+    return None
+
+
+def is_binary(subprotocol: str | None) -> bool:
+    return subprotocol == MSGPACK
+
+
+def _walk(obj: dict, tables: Dict[str, Dict[Any, Any]]) -> dict:
+    out = {}
+    for key, value in obj.items():
+        table = tables.get(key)
+        if key == "value" and "path" in obj:
+            # Numa operação de patch, o "value" é do campo nomeado no fim do caminho.
+            path = obj["path"]
+            table = tables.get(path[path.rfind("/") + 1:]) if isinstance(path, str) else None
+        cls = value.__class__
+        if cls is dict or cls is list:
+            out[key] = _convert(value, table, tables)
+        else:
+            out[key] = value if table is None else _code(value, table)
+    return out
+
+
+def _convert(value: Any, table: Dict[Any, Any] | None, tables: Dict[str, Dict[Any, Any]]) -> Any:
+    cls = value.__class__
+    if cls is dict:
+        return _walk(value, tables)
+    if cls is list:
+        return [_convert(item, table, tables) for item in value]
+    return value if table is None else _code(value, table)
+
+
+def _code(value: Any, table: Dict[Any, Any]) -> Any:
+    try:
+        return table.get(value, value)  # Nomes desconhecidos passam como estão
+    except TypeError:  # Valor não hasheável vindo do cliente; a validação recusa depois
+        return value
+
+
+def _compact_state(payload: dict) -> dict:
+    # Atalho para o payload de estado (get_public_state + my_monsters), a maior e mais frequente das
+    # mensagens: só os campos com tabela são copiados, em vez de percorrer o dicionário inteiro.
+    monsters = _TO_CODE["monster_name"]
+    out = dict(payload)
+    out["game_state"] = _code(payload["game_state"], _TO_CODE["game_state"])
+    out["players"] = {
+        player_id: {**info, "revealed_monsters": [monsters.get(name, name) for name in info["revealed_monsters"]]}
+        if info["revealed_monsters"] else info
+        for player_id, info in payload["players"].items()
+    }
+    pending = payload.get("pending_action")
+    if pending is not None:
+        out["pending_action"] = {**pending, "action": _code(pending["action"], _TO_CODE["action"])}
+    if "my_monsters" in payload:
+        out["my_monsters"] = [monsters.get(name, name) for name in payload["my_monsters"]]
+    return out
+
+
+def _compact_op(op: dict) -> dict:
+    # Operação de patch (delta.diff): o valor é convertido pela tabela do campo no fim do caminho.
+    path = op["path"]
+    out = {"op": _code(op["op"], _TO_CODE["op"]), "path": path}
+    if "value" in op:
+        out["value"] = _convert(op["value"], _TO_CODE.get(path[path.rfind("/") + 1:]), _TO_CODE)
+    return out
+
+
+def compact(message: dict) -> dict:
+    """Troca os nomes com tabela pelos códigos (servidor -> formato binário)."""
+    payload = message.get("payload")
+    if payload.__class__ is dict and "players" in payload and "game_state" in payload:
+        out = dict(message)
+        out["type"] = _code(message["type"], _TO_CODE["type"])
+        out["payload"] = _compact_state(payload)
+        return out
+    patch = message.get("patch")
+    if patch.__class__ is list:
+        out = dict(message)
+        out["type"] = _code(message["type"], _TO_CODE["type"])
+        out["patch"] = [_compact_op(op) for op in patch]
+        return out
+    return _walk(message, _TO_CODE)
+
+
+def expand(message: dict) -> dict:
+    """Inverso de compact: códigos de volta para os nomes."""
+    return _walk(message, _FROM_CODE)
+
+
+def _map_header(size: int) -> bytes:
+    return bytes((0x80 | size,)) if size < 16 else b"\xde" + size.to_bytes(2, "big")
+
+
+def _pack_pairs(items) -> bytes:
+    # Pares chave/valor de um mapa MessagePack, na ordem, sem o cabeçalho do mapa.
+    return b"".join(msgpack.packb(key) + msgpack.packb(value) for key, value in items)
+
+
+def _pack_fields(fields: tuple) -> bytes:
+    # Campos de um destinatário (seq, my_monsters): ainda com os nomes, trocados aqui pelos códigos.
+    # Um packb só, de um mapa pequeno (cabeçalho de um byte), do qual ficam só os pares.
+    if not fields:
+        return b""
+    return msgpack.packb({key: _convert(value, _TO_CODE.get(key), _TO_CODE) for key, value in fields})[1:]
+
+
+def _shared_parts(shared: PackCache) -> tuple:
+    # (campos sem o payload, quantos são, (campos do payload, quantos são) ou None), convertidos uma vez
+    # por mensagem comum. O payload fica separado quando é o último campo: é onde entra o my_monsters.
+    if shared.parts is None:
+        data = compact(loads(shared.text))
+        payload = None
+        if next(reversed(data), None) == "payload" and data["payload"].__class__ is dict:
+            fields = data.pop("payload")
+            payload = (_pack_pairs(fields.items()), len(fields))
+        shared.parts = (_pack_pairs(data.items()), len(data), payload)
+    return shared.parts
+
+
+def pack(message: EncodedMessage | dict) -> bytes:
+    if not isinstance(message, EncodedMessage):
+        return msgpack.packb(compact(message))
+    if message.shared is None:
+        return msgpack.packb(compact(loads(message.text)))
+    # Como o texto JSON: a parte comum convertida uma vez, mais os campos deste destinatário no fim.
+    fields, size, payload = _shared_parts(message.shared)
+    parts = [_map_header(size + (payload is not None) + len(message.fields)), fields]
+    if payload is not None:
+        payload_fields, payload_size = payload
+        parts += [
+            _PAYLOAD_KEY, _map_header(payload_size + len(message.payload_fields)), payload_fields,
+            _pack_fields(message.payload_fields),
+        ]
+    parts.append(_pack_fields(message.fields))
+    return b"".join(parts)
+
+
+def unpack(frame: bytes) -> Any:
+    data = msgpack.unpackb(frame)
+    return expand(data) if isinstance(data, dict) else data
+
+
+def decode(frame: str | bytes) -> schemas.ClientMessage:
+    """Valida uma mensagem do cliente: texto é JSON, binário é MessagePack. ValueError se inválida."""
+    if isinstance(frame, str):
+        return schemas.client_message.validate_json(frame)
+    if msgpack is None:
+        raise ValueError("Binary frames need the monster-coup.msgpack subprotocol")
+    try:
+        data = unpack(frame)
+    except (ValueError, TypeError) as exc:  # Bytes que não são MessagePack
+        raise ValueError(f"Malformed MessagePack frame ({type(exc).__name__})") from exc
+    return schemas.client_message.validate_python(data)
+
+
+def describe(exc: ValueError) -> str:
+    # Primeiro erro da validação ("payload.action: Input should be ..."), curto o bastante para o cliente.
+    errors = getattr(exc, "errors", None)
+    if errors is None:
+        return str(exc)
+    error = errors()[0]
+    location = ".".join(str(part) for part in error["loc"][1:])  # Sem a tag da união
+    return f"{location}: {error['msg']}" if location else error["msg"]
@@ -1,111 +1,205 @@
 # app/main.py
+import asyncio
+import time
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
-from typing import Dict, List
+from fastapi.responses import PlainTextResponse
 import logging
 
+from . import config
+from .core import metrics, wire
+from .core.connection_manager import connection_manager
 from .core.game_manager import game_manager
+from .core.matchmaking import MatchmakingError, matchmaker
+from .core.models import MAX_PLAYERS, MIN_PLAYERS
+from .core.session import GameError
 
 # Configuração de logging para depuração
 logging.basicConfig(level=logging.INFO)
 
-app = FastAPI()
 
-class ConnectionManager:
-    ### MUDANÇA: Estrutura para associar websocket ao player_id dentro de um jogo.
-    # Isso facilita o envio de mensagens privadas e o gerenciamento de reconexões.
-    def __init__(self):
-        self.active_connections: Dict[str, Dict[str, WebSocket]] = {}
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # No modo com shards, sobe os processos worker dos jogos.
+    await game_manager.start()
+    await matchmaker.start()
+    lag_monitor = asyncio.create_task(metrics.monitor_event_loop())
+    yield
+    lag_monitor.cancel()
+    await matchmaker.stop()
+    await game_manager.stop()
 
-    async def connect(self, websocket: WebSocket, game_id: str, player_id: str):
-        await websocket.accept()
-        if game_id not in self.active_connections:
-            self.active_connections[game_id] = {}
-        self.active_connections[game_id][player_id] = websocket
-        logging.info(f"Player {player_id} connected to game {game_id}")
 
-    def disconnect(self, game_id: str, player_id: str):
-        if game_id in self.active_connections and player_id in self.active_connections[game_id]:
-            del self.active_connections[game_id][player_id]
-            logging.info(f"Player {player_id} disconnected from game {game_id}")
+app = FastAPI(lifespan=lifespan)
 
-    async def broadcast(self, game_id: str, message: dict):
-        if game_id in self.active_connections:
-            for player_id, connection in self.active_connections[game_id].items():
-                await connection.send_json(message)
-
-    ### MUDANÇA: Função para enviar uma mensagem para um jogador específico.
-    async def send_to_player(self, game_id: str, player_id: str, message: dict):
-        if game_id in self.active_connections and player_id in self.active_connections[game_id]:
-            await self.active_connections[game_id][player_id].send_json(message)
 
+async def submit_or_http_error(game_id: str, command: str, *args):
+    try:
+        return await game_manager.submit(game_id, command, *args)
+    except GameError as exc:
+        raise HTTPException(status_code=exc.status_code, detail=exc.detail)
 
-connection_manager = ConnectionManager()
 
 @app.post("/create-game")
-async def handle_create_game():
-    game = game_manager.create_game()
-    return {"game_id": game.id}
+async def handle_create_game(players: int = MIN_PLAYERS):
+    # O jogo começa quando o último dos `players` lugares é ocupado.
+    if not MIN_PLAYERS <= players <= MAX_PLAYERS:
+        raise HTTPException(status_code=400, detail=f"players must be between {MIN_PLAYERS} and {MAX_PLAYERS}")
+    try:
+        game_id = await game_manager.new_game(players)
+    except GameError as exc:  # Nenhum shard disponível
+        raise HTTPException(status_code=exc.status_code, detail=exc.detail)
+    return {"game_id": game_id}
 
 @app.post("/join-game/{game_id}/{player_id}")
 async def handle_join_game(game_id: str, player_id: str):
-    game = game_manager.get_game(game_id)
-    if not game:
-        raise HTTPException(status_code=404, detail="Game not found")
-    if game.game_state.value != "WAITING_FOR_PLAYERS":
-        raise HTTPException(status_code=400, detail="Game has already started")
-
-    ### MUDANÇA: Lógica de adicionar jogador simplificada para corresponder a models.py
-    if not game.add_player(player_id):
-        raise HTTPException(status_code=400, detail="Player ID already exists or game is full.")
-
-    await connection_manager.broadcast(game_id, {"type": "PLAYER_JOINED", "payload": game.get_public_state()})
-
-    if len(game.players) == 2: # Define o número de jogadores para iniciar
-        game.start_game()
-        # Após o início, envia o estado público a todos
-        await connection_manager.broadcast(game_id, {"type": "GAME_START", "payload": game.get_public_state()})
-        # E o estado privado para cada um
-        for pid in game.players:
-            await connection_manager.send_to_player(game_id, pid, {"type": "PRIVATE_STATE", "payload": game.get_private_state(pid)})
-
+    await submit_or_http_error(game_id, "join", player_id)
     return {"message": f"Player {player_id} joined game {game_id}"}
 
+@app.post("/add-bot/{game_id}")
+async def handle_add_bot(game_id: str):
+    player_id = await submit_or_http_error(game_id, "add_bot")
+    return {"player_id": player_id, "message": f"Bot {player_id} joined game {game_id}"}
 
-@app.websocket("/ws/{game_id}/{player_id}")
-async def websocket_endpoint(websocket: WebSocket, game_id: str, player_id: str):
-    game = game_manager.get_game(game_id)
-    if not game or player_id not in game.players:
-        await websocket.close(code=1008)
-        return
 
-    await connection_manager.connect(websocket, game_id, player_id)
-    await connection_manager.send_to_player(game_id, player_id, {"type": "PRIVATE_STATE", "payload": game.get_private_state(player_id)})
+@app.get("/stats")
+async def handle_stats():
+    # Jogos vivos, removidos (por motivo), tamanho aproximado de um jogo em memória e fila de matchmaking.
+    return {**await game_manager.stats(), "matchmaking": matchmaker.stats()}
+
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def handle_metrics():
+    # Formato texto do Prometheus; no modo com shards soma as séries de todos os processos.
+    exports = [metrics.registry.export()] + await game_manager.shard_metrics()
+    return metrics.render(exports)
+
+
+@app.post("/debug/profile/{game_id}")
+async def handle_start_profile(game_id: str):
+    # Liga o profiler por amostragem só para os comandos deste jogo.
+    await submit_or_http_error(game_id, "profile_start")
+    return {"message": f"Profiling game {game_id}"}
+
+@app.delete("/debug/profile/{game_id}", response_class=PlainTextResponse)
+async def handle_stop_profile(game_id: str):
+    # Desliga e devolve as pilhas amostradas (formato folded, para flamegraph.pl ou speedscope).
+    return await submit_or_http_error(game_id, "profile_stop")
+
+
+async def _wait_disconnect(websocket: WebSocket):
+    # Enquanto espera na fila o cliente não tem o que enviar; qualquer mensagem é ignorada.
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
+
+
+@app.websocket("/matchmake")
+async def matchmake_endpoint(websocket: WebSocket):
+    # Fila de matchmaking: ?player_id=&size=&rating=. Quando a mesa fecha, o jogador já está no jogo e
+    # recebe MATCH_FOUND com o game_id; então conecta em /ws/{game_id}/{player_id} como de costume.
+    params = websocket.query_params
+    player_id = params.get("player_id", "")
+    await websocket.accept()
     try:
-        while True:
-            data = await websocket.receive_json()
-            message_type = data.get("type")
-            payload = data.get("payload", {})
+        if not player_id:
+            raise MatchmakingError("player_id is required")
+        try:
+            size = int(params.get("size", config.MATCH_SIZE))
+            rating = float(params.get("rating", config.MATCH_DEFAULT_RATING))
+        except ValueError:
+            raise MatchmakingError("size and rating must be numbers")
+        ticket = matchmaker.enqueue(player_id, size, rating)
+    except MatchmakingError as exc:
+        await websocket.send_json({"type": "ERROR", "message": str(exc)})
+        await websocket.close(code=1008)
+        return
 
-            if message_type == "PLAYER_ACTION" and game.current_turn_player_id == player_id:
-                game.handle_action(player_id, payload)
+    # Espera pela mesa ou pela desconexão do cliente, o que vier primeiro.
+    disconnected = asyncio.create_task(_wait_disconnect(websocket))
+    await asyncio.wait((ticket.future, disconnected), return_when=asyncio.FIRST_COMPLETED)
+    if not ticket.future.done():
+        matchmaker.cancel(player_id)
+        return
+    disconnected.cancel()
+    try:
+        message = {"type": "MATCH_FOUND", "game_id": ticket.future.result(), "size": ticket.size}
+    except MatchmakingError as exc:
+        message = {"type": "ERROR", "message": str(exc)}
+    try:
+        await websocket.send_json(message)
+        await websocket.close()
+    except (WebSocketDisconnect, RuntimeError):
+        pass  # O cliente saiu depois de a mesa fechar; o lugar fica com ele até o reaper
+
+
+# Declarada antes de /ws/{game_id}/{player_id} para ter precedência sobre ela.
+@app.websocket("/ws/{game_id}/spectate")
+async def spectate_endpoint(websocket: WebSocket, game_id: str):
+    # Espectador: recebe só o estado público (GAME_STATE_UPDATE, sem my_monsters), no máximo a cada
+    # SPECTATOR_MIN_INTERVAL e com SPECTATOR_DELAY de atraso. Não envia nada.
+    await connection_manager.spectate(websocket, game_id, wire.negotiate(websocket.scope.get("subprotocols", ())))
+    try:
+        await game_manager.submit(game_id, "spectate")
+    except GameError:
+        connection_manager.stop_spectating(game_id, websocket)
+        await websocket.close(code=1008)
+        return
+    try:
+        await _wait_disconnect(websocket)
+    except RuntimeError:
+        pass  # Socket fechado pelo servidor (espectador lento derrubado ou jogo removido)
+    connection_manager.stop_spectating(game_id, websocket)
+    try:
+        await game_manager.submit(game_id, "unspectate")
+    except GameError:
+        pass  # O jogo já foi removido pelo reaper
 
-            elif message_type == "ACTION_RESPONSE":
-                ### MUDANÇA FINAL: Passando o payload inteiro
-                game.resolve_pending_action(player_id, payload)
 
-            elif message_type == "CHOOSE_MONSTER" and game.player_to_choose == player_id:
-                game.handle_player_choice(player_id, payload.get("monster_name"))
+@app.websocket("/ws/{game_id}/{player_id}")
+async def websocket_endpoint(websocket: WebSocket, game_id: str, player_id: str):
+    try:
+        is_player = await game_manager.submit(game_id, "connect", player_id)
+    except GameError:
+        is_player = False
+    if not is_player:
+        await websocket.close(code=1008)
+        return
 
-            else:
-                await connection_manager.send_to_player(game_id, player_id, {"type": "ERROR", "message": "Invalid action or not your turn."})
-                continue
+    # Um cliente que reconecta informa o último seq recebido (?seq=N) e recebe só as mensagens perdidas.
+    # Se o buffer não cobre mais esse seq, ou sem ?seq, recebe o estado: delta desde ?version=N ou snapshot.
+    known_seq = websocket.query_params.get("seq", "")
+    seq = int(known_seq) if known_seq.isdigit() else None
+    known_version = websocket.query_params.get("version", "")
+    version = int(known_version) if known_version.isdigit() else None
 
-            # Otimização: Em vez de broadcast + loop de send_to_player,
-            # apenas o loop já é suficiente pois o estado privado contém o público.
-            for pid in game.players:
-                await connection_manager.send_to_player(game_id, pid, {"type": "GAME_STATE_UPDATE", "payload": game.get_private_state(pid)})
+    # Formato da conexão pelo subprotocolo (app/core/wire.py): MessagePack se o cliente oferecer, senão JSON.
+    subprotocol = wire.negotiate(websocket.scope.get("subprotocols", ()))
 
-    except WebSocketDisconnect:
-        connection_manager.disconnect(game_id, player_id)
-        await connection_manager.broadcast(game_id, {"type": "PLAYER_DISCONNECTED", "player_id": player_id})
+    try:
+        connection_id = await connection_manager.connect(websocket, game_id, player_id, subprotocol)
+        await game_manager.submit(game_id, "resume", player_id, connection_id, seq, version)
+        while True:
+            frame = await websocket.receive()
+            if frame["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(frame.get("code", 1000))
+            started = time.perf_counter()
+            try:
+                message = wire.decode(frame["text"] if frame.get("text") is not None else frame["bytes"])
+            except ValueError as exc:
+                # JSON/MessagePack malformado ou fora dos modelos: responde ERROR e segue na conexão.
+                metrics.phase_seconds.observe(time.perf_counter() - started, "decode", "other")
+                await game_manager.submit(game_id, "reject", player_id, wire.describe(exc))
+                continue
+            metrics.phase_seconds.observe(time.perf_counter() - started, "decode", message.type)
+            # A sessão do jogo aplica as mensagens em ordem e entrega as respostas pelo connection_manager.
+            await game_manager.submit(game_id, "message", player_id, message)
+            metrics.message_seconds.observe(time.perf_counter() - started, message.type)
+
+    except (WebSocketDisconnect, RuntimeError, GameError):
+        # RuntimeError: o socket foi fechado pelo servidor (cliente lento derrubado).
+        # GameError: o jogo deixou de existir.
+        connection_manager.disconnect(game_id, player_id, websocket)
+        try:
+            await game_manager.submit(game_id, "disconnect", player_id)
+        except GameError:
+            pass  # O jogo já foi removido pelo reaper
@@ -1 +1,165 @@
-# (Opcional, mas recomendado) Modelos Pydantic para eventos WebSocket
+# app/schemas.py
+# Modelos das mensagens do WebSocket, validados pelo pydantic (validador compilado do pydantic-core).
+#
+# São NamedTuples, como as Actions do motor: imutáveis, com acesso por atributo, e a mensagem validada
+# atravessa o pipe dos shards com metade do custo de pickle de um BaseModel. Campos não previstos são
+# recusados. Os modelos do servidor descrevem o que os clientes recebem; o servidor continua montando
+# e codificando essas mensagens uma vez por versão (models.py, serialization.py).
+from typing import Annotated, Any, Dict, Literal, NamedTuple, Tuple, Union
+
+from pydantic import Discriminator, Tag, TypeAdapter
+
+from .core import engine
+from .core.models import TURN_ACTIONS, GameState
+
+MonsterName = Literal[engine.MONSTER_NAMES]
+TurnAction = Literal[tuple(TURN_ACTIONS)]
+
+
+def _message_type(value: Any) -> str | None:
+    return value.get("type") if isinstance(value, dict) else getattr(value, "type", None)
+
+
+# --- Cliente -> servidor ---
+class PlayerActionPayload(NamedTuple):
+    action: TurnAction
+    target_player_id: str | None = None
+
+
+class PlayerAction(NamedTuple):
+    type: Literal["PLAYER_ACTION"]
+    payload: PlayerActionPayload
+
+
+class ActionResponsePayload(NamedTuple):
+    contested: bool = False
+    block_with: MonsterName | None = None  # Ex.: "Golem" contra Caçar
+
+
+class ActionResponse(NamedTuple):
+    type: Literal["ACTION_RESPONSE"]
+    payload: ActionResponsePayload = ActionResponsePayload()
+
+
+class ChooseMonsterPayload(NamedTuple):
+    monster_name: MonsterName
+
+
+class ChooseMonster(NamedTuple):
+    type: Literal["CHOOSE_MONSTER"]
+    payload: ChooseMonsterPayload
+
+
+class SyncPayload(NamedTuple):
+    version: int | None = None  # Versão que o cliente possui; None pede o estado completo
+
+
+class Sync(NamedTuple):
+    type: Literal["SYNC"]
+    payload: SyncPayload = SyncPayload()
+
+
+ClientMessage = Annotated[
+    Union[
+        Annotated[PlayerAction, Tag("PLAYER_ACTION")],
+        Annotated[ActionResponse, Tag("ACTION_RESPONSE")],
+        Annotated[ChooseMonster, Tag("CHOOSE_MONSTER")],
+        Annotated[Sync, Tag("SYNC")],
+    ],
+    Discriminator(_message_type),
+]
+
+
+# --- Servidor -> cliente ---
+class PlayerInfo(NamedTuple):
+    id: str
+    coins: int
+    monsters_count: int
+    revealed_monsters: Tuple[MonsterName, ...]
+
+
+class PendingAction(NamedTuple):
+    action: TurnAction
+    source_player_id: str
+    target_player_id: str | None = None
+    is_swap: bool = False
+    passed_player_ids: Tuple[str, ...] = ()  # Oponentes que já deixaram passar (mesas com mais de 2)
+
+
+class GameStatePayload(NamedTuple):
+    id: str
+    players: Dict[str, PlayerInfo]
+    current_turn_player_id: str | None
+    game_state: GameState
+    deck_size: int
+    pending_action: PendingAction | None
+    player_to_choose: str | None
+    my_monsters: Tuple[MonsterName, ...] | None = None  # Só no estado privado de um jogador
+
+
+class GameEvent(NamedTuple):
+    type: Literal["PLAYER_JOINED", "GAME_START"]
+    payload: GameStatePayload
+    seq: int | None = None
+
+
+class GameStateSnapshot(NamedTuple):
+    type: Literal["GAME_STATE_UPDATE", "PRIVATE_STATE"]
+    version: int
+    payload: GameStatePayload
+    seq: int | None = None
+
+
+class PatchOp(NamedTuple):
+    op: Literal["add", "replace", "remove"]
+    path: str
+    value: Any = None
+
+
+class GameStateDelta(NamedTuple):
+    type: Literal["GAME_STATE_DELTA"]
+    base_version: int
+    version: int
+    patch: Tuple[PatchOp, ...]
+    seq: int | None = None
+
+
+class PlayerDisconnected(NamedTuple):
+    type: Literal["PLAYER_DISCONNECTED"]
+    player_id: str
+    seq: int | None = None
+
+
+class Error(NamedTuple):
+    type: Literal["ERROR"]
+    message: str
+    seq: int | None = None
+
+
+class MatchFound(NamedTuple):
+    type: Literal["MATCH_FOUND"]
+    game_id: str
+    size: int
+
+
+_SERVER_TAGS = {
+    "PLAYER_JOINED": "event", "GAME_START": "event",
+    "GAME_STATE_UPDATE": "snapshot", "PRIVATE_STATE": "snapshot",
+    "GAME_STATE_DELTA": "delta", "PLAYER_DISCONNECTED": "disconnected", "ERROR": "error", "MATCH_FOUND": "match",
+}
+
+ServerMessage = Annotated[
+    Union[
+        Annotated[GameEvent, Tag("event")],
+        Annotated[GameStateSnapshot, Tag("snapshot")],
+        Annotated[GameStateDelta, Tag("delta")],
+        Annotated[PlayerDisconnected, Tag("disconnected")],
+        Annotated[Error, Tag("error")],
+        Annotated[MatchFound, Tag("match")],
+    ],
+    Discriminator(lambda value: _SERVER_TAGS.get(_message_type(value))),
+]
+
+# Validadores compilados uma vez, na importação.
+client_message: TypeAdapter[ClientMessage] = TypeAdapter(ClientMessage)
+server_message: TypeAdapter[ServerMessage] = TypeAdapter(ServerMessage)
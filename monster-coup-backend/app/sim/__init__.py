@@ -0,0 +1,8 @@
+# app/sim/__init__.py
+# Simulação em lote do motor de regras (app/core/engine.py) para balanceamento e treino de bots.
+#
+#   python -m app.sim --games 100000 --players 2 --policies honest,bluffer --workers 8
+from .policies import POLICIES
+from .runner import SimulationStats, run_simulation
+
+__all__ = ["POLICIES", "SimulationStats", "run_simulation"]
@@ -0,0 +1,79 @@
+# app/sim/__main__.py
+import argparse
+import os
+import sys
+import time
+
+from ..core import engine
+from ..core.engine import ActionKind
+from ..core.models import MAX_PLAYERS, MIN_PLAYERS
+from .policies import POLICIES
+from .runner import HAND_LABELS, N_CARDS, GameResult, run_simulation
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.sim", description="Simulação em lote de partidas de Monster Coup.")
+    parser.add_argument("--games", type=int, default=10_000)
+    # Os limites de mesa do servidor: o motor aceitaria 7, mas nenhum jogo real tem tantos jogadores.
+    parser.add_argument("--players", type=int, default=2, choices=range(MIN_PLAYERS, MAX_PLAYERS + 1))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument(
+        "--policies", default="honest",
+        help=f"Políticas por assento, separadas por vírgula e repetidas em ciclo ({', '.join(POLICIES)}).",
+    )
+    parser.add_argument("--games-out", help="Arquivo para gravar uma linha por jogo (streaming).")
+    args = parser.parse_args(argv)
+    args.policies = args.policies.split(",")
+    unknown = [p for p in args.policies if p not in POLICIES]
+    if unknown:
+        parser.error(f"unknown policies: {', '.join(unknown)}")
+    return args
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    games_out = open(args.games_out, "w") if args.games_out else None
+
+    def write_game(result: GameResult):
+        hands = " ".join(HAND_LABELS[h] for h in result.hands)
+        games_out.write(f"{result.index} {result.seed} {result.winner} {result.first_player} {result.length} {hands}\n")
+
+    started = time.perf_counter()
+    try:
+        stats = run_simulation(
+            args.games, args.players, args.policies, args.seed, args.workers, args.chunk_size,
+            on_result=write_game if games_out else None,
+        )
+    finally:
+        if games_out:
+            games_out.close()
+    elapsed = time.perf_counter() - started
+
+    out = sys.stdout
+    out.write(f"games: {stats.games}  players: {args.players}  policies: {','.join(args.policies)}  seed: {args.seed}\n")
+    out.write(f"workers: {args.workers}  elapsed: {elapsed:.2f}s  throughput: {stats.games / elapsed:.0f} games/s\n")
+    out.write(f"average length: {stats.average_length:.2f} actions  unfinished: {stats.unfinished}\n\n")
+
+    out.write("wins by seat (0 = first to play):\n")
+    for position, wins in enumerate(stats.position_wins):
+        out.write(f"  {position}: {wins / max(stats.games, 1):.4f}\n")
+
+    out.write("\nwin rate by starting hand:\n")
+    rates = stats.hand_win_rates()
+    for i in sorted(range(len(HAND_LABELS)), key=lambda i: -rates[i]):
+        out.write(f"  {HAND_LABELS[i]:<20} {rates[i]:.4f}  ({stats.hand_games[i]} hands)\n")
+
+    out.write("\naction frequencies:\n")
+    freqs = stats.action_frequencies()
+    card_labels = list(engine.MONSTER_NAMES) + ["-"]
+    for kind in ActionKind:
+        row = freqs[kind]
+        for column in range(N_CARDS + 1):
+            if stats.action_counts[kind, column]:
+                out.write(f"  {kind.name:<13} {card_labels[column]:<9} {row[column]:.4f}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# app/sim/policies.py
+# Políticas scriptadas para a simulação. Uma política recebe o estado, o assento que vai agir,
+# as ações legais desse assento e um random.Random próprio do jogo, e devolve uma Action.
+# Por convenção ela só olha a própria mão e a informação pública (moedas, cartas reveladas).
+import random
+from typing import Callable, Dict, List, Sequence
+
+from ..core import engine
+from ..core.engine import Action, ActionKind, Card, State
+
+Policy = Callable[[State, int, List[Action], random.Random], Action]
+
+# Valor de manter cada carta na mão (maior = mais útil), usado para escolher o que perder/trocar.
+CARD_VALUE = {Card.ESPECTRO: 4, Card.SLIME: 3, Card.DRAGAO: 2, Card.GOLEM: 1, Card.FALCAO: 0}
+
+
+def random_policy(state: State, seat: int, actions: List[Action], rng: random.Random) -> Action:
+    return rng.choice(actions)
+
+
+def _visible_copies(state: State, seat: int, card: int) -> int:
+    # Cópias que o jogador consegue ver: as da própria mão e todas as reveladas.
+    return state.players[seat].hand.count(card) + sum(p.revealed.count(card) for p in state.players)
+
+
+def _richest_opponent(state: State, actions: List[Action]) -> int:
+    targets = {a.target for a in actions if a.target >= 0}
+    return max(targets, key=lambda t: (len(state.players[t].hand), state.players[t].coins))
+
+
+def _scripted(bluff_rate: float, challenge_rate: float) -> Policy:
+    def policy(state: State, seat: int, actions: List[Action], rng: random.Random) -> Action:
+        phase = state.phase
+        hand = state.players[seat].hand
+
+        if phase == engine.Phase.AWAITING_CHOICE:
+            return min(actions, key=lambda a: CARD_VALUE[a.card])
+
+        if phase == engine.Phase.AWAITING_RESPONSE:
+            pending = state.pending
+            if pending.kind == ActionKind.HUNT and Card.GOLEM in hand:
+                return Action(ActionKind.BLOCK, seat, -1, Card.GOLEM)
+            # Contesta quando é impossível o oponente ter a carta, ou por desconfiança aleatória.
+            impossible = pending.card >= 0 and _visible_copies(state, seat, pending.card) >= engine.COPIES_PER_MONSTER
+            if impossible or rng.random() < challenge_rate:
+                return Action(ActionKind.CHALLENGE, seat)
+            return Action(ActionKind.ALLOW, seat)
+
+        # Turno
+        strikes = [a for a in actions if a.kind == ActionKind.FINAL_STRIKE]
+        if strikes:
+            target = _richest_opponent(state, strikes)
+            return next(a for a in strikes if a.target == target)
+
+        bluffing = rng.random() < bluff_rate
+        for card in (Card.ESPECTRO, Card.SLIME, Card.DRAGAO):
+            if card not in hand and not bluffing:
+                continue
+            claims = [a for a in actions if a.kind == ActionKind.ABILITY and a.card == card]
+            if card == Card.ESPECTRO:
+                claims = [a for a in claims if state.players[a.target].coins > 0]
+            if claims:
+                if claims[0].target < 0:
+                    return claims[0]
+                target = _richest_opponent(state, claims)
+                return next(a for a in claims if a.target == target)
+        if Card.FALCAO in hand and min(CARD_VALUE[c] for c in hand) <= CARD_VALUE[Card.GOLEM]:
+            return Action(ActionKind.ABILITY, seat, -1, Card.FALCAO)
+        return Action(ActionKind.HUNT if rng.random() < 0.5 else ActionKind.TRAIN, seat)
+
+    return policy
+
+
+POLICIES: Dict[str, Policy] = {
+    "random": random_policy,
+    "honest": _scripted(bluff_rate=0.0, challenge_rate=0.05),
+    "bluffer": _scripted(bluff_rate=0.4, challenge_rate=0.25),
+}
+
+
+def next_action(state: State, policies: Sequence[Policy], rng: random.Random) -> Action:
+    """Próxima ação do jogo, com a política de cada assento (policies[seat])."""
+    legal = engine.legal_actions(state)
+    if state.phase != engine.Phase.AWAITING_RESPONSE:
+        seat = legal[0].actor
+        return policies[seat](state, seat, legal, rng)
+    # Os oponentes respondem um por vez, em ordem de assento: cada ALLOW é aplicado (e marcado em
+    # pending.passed) antes de consultar o próximo, e a primeira reação diferente de ALLOW decide.
+    # Assim cada oponente é consultado uma vez só por ação pendente.
+    passed = state.pending.passed
+    seat = next(s for s in engine.acting_players(state) if not passed >> s & 1)
+    return policies[seat](state, seat, [a for a in legal if a.actor == seat], rng)
@@ -0,0 +1,141 @@
+# app/sim/runner.py
+import multiprocessing
+import random
+from typing import Callable, Iterator, List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+from ..core import engine
+from ..core.engine import ActionKind
+from .policies import POLICIES, next_action
+
+# Mãos iniciais são pares não ordenados de cartas: 15 combinações para 5 monstros.
+N_CARDS = len(engine.Card)
+HAND_INDEX = np.full((N_CARDS, N_CARDS), -1, dtype=np.int64)
+HAND_LABELS: List[str] = []
+for _a in range(N_CARDS):
+    for _b in range(_a, N_CARDS):
+        HAND_INDEX[_a, _b] = HAND_INDEX[_b, _a] = len(HAND_LABELS)
+        HAND_LABELS.append(f"{engine.MONSTER_NAMES[_a]}+{engine.MONSTER_NAMES[_b]}")
+N_HANDS = len(HAND_LABELS)
+
+N_ACTION_KINDS = len(ActionKind)
+# Ações sem monstro (card == -1) ficam na última coluna.
+N_ACTION_CARDS = N_CARDS + 1
+
+# Teto de passos por jogo, para nunca travar um worker com uma combinação de políticas que não converge.
+MAX_STEPS = 10_000
+
+
+class GameResult(NamedTuple):
+    index: int
+    seed: int
+    winner: int  # Assento vencedor (-1 se nenhum)
+    first_player: int
+    length: int
+    hands: Tuple[int, ...]  # Índice da mão inicial de cada assento
+    actions: np.ndarray  # Contagem [N_ACTION_KINDS, N_ACTION_CARDS]
+
+
+def game_seed(base_seed: int, index: int) -> int:
+    # A seed de cada jogo depende só da seed base e do índice: o resultado não depende de como
+    # os jogos são divididos entre os workers.
+    _, value = engine._next_random((base_seed + index * 0x9E3779B97F4A7C15) & engine._MASK64)
+    return value
+
+
+def play_game(seed: int, n_players: int, policy_names: Sequence[str], index: int = 0) -> GameResult:
+    policies = [POLICIES[policy_names[seat % len(policy_names)]] for seat in range(n_players)]
+    rng = random.Random(seed)
+    state = engine.new_game(n_players, seed)
+    hands = tuple(int(HAND_INDEX[p.hand[0], p.hand[1]]) for p in state.players)
+    first_player = state.turn
+    actions = np.zeros((N_ACTION_KINDS, N_ACTION_CARDS), dtype=np.int64)
+
+    length = 0
+    while state.phase != engine.Phase.FINISHED and length < MAX_STEPS:
+        action = next_action(state, policies, rng)
+        actions[action.kind, action.card] += 1
+        state = engine.apply(state, action)
+        length += 1
+    return GameResult(index, seed, state.winner, first_player, length, hands, actions)
+
+
+def _run_chunk(args) -> List[GameResult]:
+    base_seed, start, stop, n_players, policy_names = args
+    return [play_game(game_seed(base_seed, i), n_players, policy_names, i) for i in range(start, stop)]
+
+
+def iter_results(
+    n_games: int,
+    n_players: int,
+    policy_names: Sequence[str],
+    seed: int = 0,
+    workers: int = 1,
+    chunk_size: int = 500,
+) -> Iterator[GameResult]:
+    """Gera os resultados jogo a jogo, em ordem de índice, sem manter o lote inteiro em memória."""
+    chunks = [
+        (seed, start, min(start + chunk_size, n_games), n_players, tuple(policy_names))
+        for start in range(0, n_games, chunk_size)
+    ]
+    if workers <= 1:
+        for chunk in chunks:
+            yield from _run_chunk(chunk)
+        return
+    with multiprocessing.Pool(workers) as pool:
+        # imap preserva a ordem dos chunks: a agregação é determinística.
+        for results in pool.imap(_run_chunk, chunks):
+            yield from results
+
+
+class SimulationStats:
+    def __init__(self, n_players: int):
+        self.n_players = n_players
+        self.games = 0
+        self.unfinished = 0
+        self.hand_games = np.zeros(N_HANDS, dtype=np.int64)
+        self.hand_wins = np.zeros(N_HANDS, dtype=np.int64)
+        # Vitórias por posição relativa ao primeiro jogador (0 = começou o jogo)
+        self.position_wins = np.zeros(n_players, dtype=np.int64)
+        self.lengths = np.zeros(MAX_STEPS + 1, dtype=np.int64)
+        self.action_counts = np.zeros((N_ACTION_KINDS, N_ACTION_CARDS), dtype=np.int64)
+
+    def add(self, result: GameResult):
+        self.games += 1
+        self.lengths[result.length] += 1
+        self.action_counts += result.actions
+        hands = np.fromiter(result.hands, dtype=np.int64, count=len(result.hands))
+        np.add.at(self.hand_games, hands, 1)
+        if result.winner < 0:
+            self.unfinished += 1
+            return
+        self.hand_wins[result.hands[result.winner]] += 1
+        self.position_wins[(result.winner - result.first_player) % self.n_players] += 1
+
+    @property
+    def average_length(self) -> float:
+        return float(np.dot(np.arange(self.lengths.size), self.lengths) / max(self.games, 1))
+
+    def hand_win_rates(self) -> np.ndarray:
+        return np.divide(self.hand_wins, self.hand_games, out=np.zeros(N_HANDS), where=self.hand_games > 0)
+
+    def action_frequencies(self) -> np.ndarray:
+        return self.action_counts / max(int(self.action_counts.sum()), 1)
+
+
+def run_simulation(
+    n_games: int,
+    n_players: int,
+    policy_names: Sequence[str],
+    seed: int = 0,
+    workers: int = 1,
+    chunk_size: int = 500,
+    on_result: Callable[[GameResult], None] | None = None,
+) -> SimulationStats:
+    stats = SimulationStats(n_players)
+    for result in iter_results(n_games, n_players, policy_names, seed, workers, chunk_size):
+        stats.add(result)
+        if on_result:
+            on_result(result)
+    return stats
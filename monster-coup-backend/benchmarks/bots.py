@@ -0,0 +1,73 @@
+# benchmarks/bots.py
+# Atraso do event loop enquanto jogos só de bots rodam no processo, com os rollouts na thread da busca
+# (--workers 0) e num pool de processos. Uma tarefa acorda a cada --tick ms e mede quanto acordou
+# atrasada: é o atraso que qualquer websocket do servidor sofreria no mesmo momento.
+#
+#   python -m benchmarks.bots --games 0,4,16 --workers 0,4
+import argparse
+import asyncio
+import os
+import time
+
+from app import config
+from app.ai.bots import bot_manager
+from app.core import engine
+from app.core.game_manager import GameManager
+
+
+def percentile(values: list, p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] if values else 0.0
+
+
+async def add_bot_game(manager: GameManager, players: int) -> str:
+    game_id = await manager.new_game(players)
+    for _ in range(players):
+        await manager.submit(game_id, "add_bot")  # O último bot completa a mesa e o jogo começa
+    return game_id
+
+
+async def run(n_games: int, players: int, seconds: float, tick: float) -> dict:
+    manager = GameManager(deliver=lambda game_id, outbound: None, close_game=lambda game_id: None,
+                          reaper_interval=0, log_dir="")
+    game_ids = [await add_bot_game(manager, players) for _ in range(n_games)]
+    moves, lags = 0, []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        await asyncio.sleep(tick)
+        lags.append(time.perf_counter() - started - tick)
+        # Jogo terminado dá lugar a outro: a carga de bots fica constante até o fim da medida.
+        for i, game_id in enumerate(game_ids):
+            game = manager.get_game(game_id)
+            if game.state.phase == engine.Phase.FINISHED:
+                moves += len(game.history)
+                manager.evict(game_id, "finished")
+                game_ids[i] = await add_bot_game(manager, players)
+    moves += sum(len(manager.get_game(game_id).history) for game_id in game_ids)
+    await manager.stop()
+    return {"moves": moves / seconds, "p50": percentile(lags, 0.5), "p99": percentile(lags, 0.99), "max": max(lags)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Atraso do event loop com jogos de bots rodando")
+    parser.add_argument("--games", default="0,4,16", help="jogos só de bots simultâneos, por nível")
+    parser.add_argument("--players", type=int, default=2)
+    parser.add_argument("--workers", default=f"0,{min(4, os.cpu_count() or 1)}", help="processos de rollout, por nível")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--tick", type=float, default=10, help="intervalo da tarefa que mede o atraso, em ms")
+    args = parser.parse_args()
+    print(f"budget {config.BOT_MOVE_BUDGET_MS} ms/move, {config.BOT_SEARCH_THREADS} search threads")
+    print(f"{'workers':>7} {'games':>6} {'moves/s':>8} {'lag p50 ms':>11} {'lag p99 ms':>11} {'lag max ms':>11}")
+    for workers in (int(n) for n in args.workers.split(",")):
+        bot_manager.shutdown()
+        bot_manager._rollout_workers = workers
+        for n_games in (int(n) for n in args.games.split(",")):
+            r = asyncio.run(run(n_games, args.players, args.seconds, args.tick / 1000))
+            print(f"{workers:>7} {n_games:>6} {r['moves']:>8.1f} {r['p50'] * 1e3:>11.2f} "
+                  f"{r['p99'] * 1e3:>11.2f} {r['max'] * 1e3:>11.2f}")
+    bot_manager.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,330 @@
+# benchmarks/load.py
+# Gerador de carga pelos endpoints reais: cria jogos em /create-game, entra com /join-game e joga partidas
+# aleatórias válidas até o fim por /ws, com N jogos simultâneos por nível de concorrência.
+#
+#   python -m benchmarks.load --concurrency 10,50,200 --duration 10
+#   python -m benchmarks.load --save-baseline          # grava benchmarks/baselines/load.json
+#   python -m benchmarks.load --check                  # compara com o baseline e sai com 1 se regrediu
+#
+# Sem --server, sobe o app com uvicorn num subprocesso em localhost (ou no mesmo event loop com --in-process).
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import httpx
+import websockets
+
+from app.core.delta import apply_patch
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baselines", "load.json")
+STATE_TYPES = {"PRIVATE_STATE", "GAME_STATE_UPDATE"}
+CLAIMS = ("Falcão", "Slime")              # Habilidades sem alvo
+TARGETED_CLAIMS = ("Dragão", "Espectro")  # Habilidades com alvo
+GOLPE_FINAL_COST = 7
+
+
+class LevelStats:
+    def __init__(self):
+        self.latencies: List[float] = []  # Ida e volta de cada ação: envio -> próxima atualização de estado
+        self.messages = 0
+        self.bytes = 0
+        self.actions = 0
+        self.games = 0
+        self.errors = 0
+        self.elapsed = 0.0
+        self.client_cpu = 0.0
+
+
+# --- Cliente ---
+def choose_message(state: dict, player_id: str, rng: random.Random) -> dict | None:
+    """Uma mensagem válida para o estado visto pelo jogador, ou None se não é a vez dele."""
+    game_state = state["game_state"]
+    players = state["players"]
+    if game_state == "IN_PROGRESS" and state["current_turn_player_id"] == player_id:
+        targets = [pid for pid, p in players.items() if pid != player_id and p["monsters_count"] > 0]
+        options = [("Treinar", None), ("Caçar", None)] + [(name, None) for name in CLAIMS]
+        options += [(name, target) for name in TARGETED_CLAIMS for target in targets]
+        if players[player_id]["coins"] >= GOLPE_FINAL_COST:
+            options += [("Golpe Final", target) for target in targets]
+        action, target = rng.choice(options)
+        return {"type": "PLAYER_ACTION", "payload": {"action": action, "target_player_id": target}}
+
+    pending = state["pending_action"]
+    if (game_state == "AWAITING_RESPONSE" and pending["source_player_id"] != player_id
+            and player_id not in pending["passed_player_ids"] and players[player_id]["monsters_count"] > 0):
+        options = [{"contested": False}, {"contested": True}]
+        if pending["action"] == "Caçar":
+            options.append({"block_with": "Golem"})
+        return {"type": "ACTION_RESPONSE", "payload": rng.choice(options)}
+
+    if game_state == "AWAITING_CHOICE" and state["player_to_choose"] == player_id:
+        return {"type": "CHOOSE_MONSTER", "payload": {"monster_name": rng.choice(state["my_monsters"])}}
+    return None
+
+
+async def play(ws_url: str, player_id: str, stats: LevelStats, rng: random.Random, idle_timeout: float, think: float = 0):
+    async with websockets.connect(ws_url, max_size=None) as ws:
+        state, version, sent_at, acted_at = None, None, None, None
+        while True:
+            raw = await asyncio.wait_for(ws.recv(), idle_timeout)
+            stats.messages += 1
+            stats.bytes += len(raw) if isinstance(raw, bytes) else len(raw.encode())
+            message = json.loads(raw)
+            if message["type"] == "GAME_STATE_DELTA":
+                if message["base_version"] != version:
+                    # Um delta se perdeu (fila do servidor cheia): pede o estado de novo.
+                    await ws.send(json.dumps({"type": "SYNC", "payload": {"version": version}}))
+                    continue
+                state = apply_patch(state, message["patch"], in_place=True)
+            elif message["type"] in STATE_TYPES:
+                state = message["payload"]
+            else:
+                continue
+            version = message["version"]
+            if sent_at is not None:
+                stats.latencies.append(time.perf_counter() - sent_at)
+                sent_at = None
+            if state["game_state"] == "FINISHED":
+                return
+            # Uma resposta por versão: se outro jogador respondeu antes, a versão muda e decidimos de novo.
+            if acted_at == version:
+                continue
+            reply = choose_message(state, player_id, rng)
+            if reply:
+                if think:
+                    await asyncio.sleep(think)  # Jogo mais lento, como entre pessoas (benchmarks.spectators)
+                acted_at = version
+                sent_at = time.perf_counter()
+                stats.actions += 1
+                await ws.send(json.dumps(reply))
+
+
+async def run_game(client: httpx.AsyncClient, ws_base: str, n_players: int, stats: LevelStats, rng: random.Random, idle_timeout: float):
+    game_id = (await client.post("/create-game", params={"players": n_players})).json()["game_id"]
+    player_ids = [f"p{i}" for i in range(n_players)]
+    for player_id in player_ids:
+        response = await client.post(f"/join-game/{game_id}/{player_id}")
+        response.raise_for_status()
+    await asyncio.gather(*(
+        play(f"{ws_base}/ws/{game_id}/{player_id}", player_id, stats, random.Random(rng.random()), idle_timeout)
+        for player_id in player_ids
+    ))
+    stats.games += 1
+
+
+async def run_level(base_url: str, concurrency: int, duration: float, n_players: int, seed: int, idle_timeout: float) -> LevelStats:
+    stats = LevelStats()
+    ws_base = "ws" + base_url[len("http"):]
+    deadline = time.monotonic() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        async def slot(index: int):
+            rng = random.Random(seed * 1_000_003 + index)
+            while time.monotonic() < deadline:
+                try:
+                    await run_game(client, ws_base, n_players, stats, rng, idle_timeout)
+                except Exception:
+                    stats.errors += 1
+
+        started, cpu_started = time.perf_counter(), time.process_time()
+        await asyncio.gather(*(slot(i) for i in range(concurrency)))
+        stats.elapsed = time.perf_counter() - started
+        # CPU do próprio gerador: perto de 100% quer dizer que o gargalo é o cliente, não o servidor.
+        stats.client_cpu = (time.process_time() - cpu_started) / stats.elapsed
+    return stats
+
+
+# --- Servidor ---
+def rss_bytes(pid: int) -> int | None:
+    """RSS do processo e de seus filhos (workers de shard) pelo /proc; None fora do Linux."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            rss = next(int(line.split()[1]) * 1024 for line in f if line.startswith("VmRSS:"))
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            children = [int(child) for child in f.read().split()]
+    except (OSError, StopIteration):
+        return None
+    return rss + sum(rss_bytes(child) or 0 for child in children)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _wait_until_up(base_url: str, timeout: float = 20):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while True:
+            try:
+                await client.get("/stats")
+                return
+            except httpx.TransportError:
+                if time.monotonic() > deadline:
+                    raise
+                await asyncio.sleep(0.1)
+
+
+class LocalServer:
+    # Sobe o app em localhost: num subprocesso uvicorn (padrão) ou como task no event loop atual.
+    def __init__(self, in_process: bool):
+        self.in_process = in_process
+        self.port = _free_port()
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        self._log_dir = tempfile.TemporaryDirectory()
+        self._process: subprocess.Popen | None = None
+        self._server = None
+        self._task = None
+
+    @property
+    def pid(self) -> int:
+        return self._process.pid if self._process else os.getpid()
+
+    async def __aenter__(self):
+        # Não suja o diretório do projeto com o log de eventos dos jogos de teste.
+        os.environ.setdefault("MONSTER_COUP_EVENT_LOG_DIR", self._log_dir.name)
+        if self.in_process:
+            import uvicorn
+            from app.main import app
+            self._server = uvicorn.Server(uvicorn.Config(app, port=self.port, log_level="warning"))
+            self._task = asyncio.create_task(self._server.serve())
+        else:
+            command = [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(self.port), "--log-level", "warning"]
+            self._process = subprocess.Popen(command, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        await _wait_until_up(self.base_url)
+        return self
+
+    async def __aexit__(self, *exc):
+        if self._server:
+            self._server.should_exit = True
+            await self._task
+        if self._process:
+            self._process.terminate()
+            self._process.wait(timeout=20)
+        self._log_dir.cleanup()
+
+
+# --- Relatório ---
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def summarize(concurrency: int, stats: LevelStats, rss: int | None) -> Dict[str, float]:
+    elapsed = stats.elapsed
+    return {
+        "concurrency": concurrency,
+        "games": stats.games,
+        "errors": stats.errors,
+        "games_per_sec": round(stats.games / elapsed, 2),
+        "actions": stats.actions,
+        "messages_per_sec": round(stats.messages / elapsed, 1),
+        "bytes_per_sec": round(stats.bytes / elapsed, 1),
+        "p50_ms": round(_percentile(stats.latencies, 0.5) * 1000, 3),
+        "p99_ms": round(_percentile(stats.latencies, 0.99) * 1000, 3),
+        "p999_ms": round(_percentile(stats.latencies, 0.999) * 1000, 3),
+        "rss_mb": round(rss / 2**20, 1) if rss is not None else None,
+        "client_cpu": round(stats.client_cpu, 2),
+    }
+
+
+def print_table(results: List[dict]):
+    print(f"{'conc':>5} {'games':>6} {'err':>4} {'games/s':>8} {'msgs/s':>9} {'KB/s':>8} "
+          f"{'p50 ms':>8} {'p99 ms':>8} {'p999 ms':>8} {'rss MB':>7} {'cli cpu':>7}")
+    for r in results:
+        rss = f"{r['rss_mb']:>7.1f}" if r["rss_mb"] is not None else f"{'-':>7}"
+        print(f"{r['concurrency']:>5} {r['games']:>6} {r['errors']:>4} {r['games_per_sec']:>8.1f} "
+              f"{r['messages_per_sec']:>9.0f} {r['bytes_per_sec'] / 1024:>8.1f} "
+              f"{r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f} {r['p999_ms']:>8.2f} {rss} {r['client_cpu']:>6.0%}")
+
+
+def _host() -> dict:
+    return {"platform": platform.platform(), "python": platform.python_version(), "cpus": os.cpu_count()}
+
+
+def check_regressions(results: List[dict], baseline: dict, tolerance: float) -> List[str]:
+    """Compara p99 e msgs/s de cada nível com o baseline; devolve as regressões encontradas."""
+    if baseline.get("host") != _host():
+        print(f"warning: baseline was recorded on {baseline.get('host')}, this host is {_host()}")
+    by_concurrency = {level["concurrency"]: level for level in baseline["results"]}
+    problems = []
+    for r in results:
+        base = by_concurrency.get(r["concurrency"])
+        if base is None:
+            print(f"warning: no baseline for concurrency {r['concurrency']}")
+            continue
+        if r["errors"] > base["errors"]:
+            problems.append(f"concurrency {r['concurrency']}: {r['errors']} errors (baseline {base['errors']})")
+        if r["p99_ms"] > base["p99_ms"] * (1 + tolerance):
+            problems.append(f"concurrency {r['concurrency']}: p99 {r['p99_ms']:.2f} ms (baseline {base['p99_ms']:.2f} ms)")
+        if r["messages_per_sec"] < base["messages_per_sec"] * (1 - tolerance):
+            problems.append(
+                f"concurrency {r['concurrency']}: {r['messages_per_sec']:.0f} msgs/s (baseline {base['messages_per_sec']:.0f})"
+            )
+    return problems
+
+
+async def run(args) -> List[dict]:
+    levels = [int(level) for level in args.concurrency.split(",")]
+    results = []
+    if args.server:
+        for concurrency in levels:
+            stats = await run_level(args.server, concurrency, args.duration, args.players, args.seed, args.idle_timeout)
+            results.append(summarize(concurrency, stats, None))
+        return results
+    async with LocalServer(args.in_process) as server:
+        for concurrency in levels:
+            stats = await run_level(server.base_url, concurrency, args.duration, args.players, args.seed, args.idle_timeout)
+            results.append(summarize(concurrency, stats, rss_bytes(server.pid)))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.load", description="Teste de carga pelos endpoints HTTP e websocket.")
+    parser.add_argument("--concurrency", default="10,50,200", help="jogos simultâneos por nível, separados por vírgula")
+    parser.add_argument("--duration", type=float, default=10, help="segundos por nível (jogos em andamento terminam)")
+    parser.add_argument("--players", type=int, default=2, help="jogadores por jogo")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--idle-timeout", type=float, default=30, help="segundos sem mensagem até desistir de um jogo")
+    parser.add_argument("--server", help="URL de um servidor já rodando (ex.: http://127.0.0.1:8000); RSS não é medido")
+    parser.add_argument("--in-process", action="store_true", help="roda o servidor no mesmo event loop do gerador")
+    parser.add_argument("--baseline", default=BASELINE, help="arquivo de baseline")
+    parser.add_argument("--save-baseline", action="store_true", help="grava o resultado como baseline")
+    parser.add_argument("--check", action="store_true", help="compara com o baseline e sai com 1 se regrediu")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="piora relativa tolerada no --check")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print_table(results)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump({"host": _host(), "duration": args.duration, "players": args.players, "results": results}, f, indent=2)
+            f.write("\n")
+        print(f"baseline saved to {args.baseline}")
+    if args.check:
+        with open(args.baseline) as f:
+            problems = check_regressions(results, json.load(f), args.tolerance)
+        for problem in problems:
+            print(f"REGRESSION {problem}")
+        if problems:
+            sys.exit(1)
+        print("no regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# benchmarks/matchmaking.py
+# Custo da fila de matchmaking com dezenas de milhares de jogadores esperando, sem sockets nem jogos:
+# a mesa formada vai para um start_match que só devolve um id.
+#
+#   python -m benchmarks.matchmaking --waiting 10000,50000 --size 4
+import argparse
+import asyncio
+import random
+import time
+
+from app.core.matchmaking import Matchmaker
+
+
+async def fake_start(size, player_ids):
+    return "game"
+
+
+async def run(waiting: int, size: int, joins: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    # Faixas estreitas e ratings espalhados: quase todo balde fica incompleto e a fila só cresce.
+    spread = waiting * size
+    matchmaker = Matchmaker(start=fake_start, bracket_width=1, widen_after=10)
+    ids = iter(range(10**9))
+    for _ in range(waiting):
+        matchmaker.enqueue(f"w{next(ids)}", size, rng.uniform(0, spread))
+    queued = len(matchmaker.tickets)
+
+    # Entradas e saídas com a fila cheia: cada uma olha só o próprio balde.
+    started = time.perf_counter()
+    for _ in range(joins):
+        matchmaker.enqueue(f"j{next(ids)}", size, rng.uniform(0, spread))
+    enqueue = (time.perf_counter() - started) / joins
+    leaving = rng.sample(list(matchmaker.tickets), min(joins, len(matchmaker.tickets) // 2))
+    started = time.perf_counter()
+    for player_id in leaving:
+        matchmaker.cancel(player_id)
+    cancel = (time.perf_counter() - started) / max(len(leaving), 1)
+
+    # Passada de alargamento com todo mundo esperando há muito tempo: forma o máximo de mesas de uma vez.
+    remaining = len(matchmaker.tickets)
+    before = matchmaker.matches
+    started = time.perf_counter()
+    matchmaker.widen(time.monotonic() + 10**6)
+    widen = time.perf_counter() - started
+    formed = matchmaker.matches - before
+    await asyncio.sleep(0)  # Deixa as tarefas de início das mesas terminarem
+    return {"queued": queued, "enqueue": enqueue, "cancel": cancel, "remaining": remaining, "widen": widen, "formed": formed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da fila de matchmaking")
+    parser.add_argument("--waiting", default="1000,10000,50000", help="jogadores na fila antes das medidas")
+    parser.add_argument("--size", type=int, default=4, help="jogadores por mesa")
+    parser.add_argument("--joins", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    print(f"{'waiting':>8} {'enqueue us':>11} {'cancel us':>10} {'widen ms':>9} {'tables/s':>10}")
+    for waiting in (int(n) for n in args.waiting.split(",")):
+        r = asyncio.run(run(waiting, args.size, args.joins, args.seed))
+        rate = r["formed"] / r["widen"] if r["widen"] else 0
+        print(f"{r['queued']:>8} {r['enqueue'] * 1e6:>11.2f} {r['cancel'] * 1e6:>10.2f} {r['widen'] * 1e3:>9.1f} {rate:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
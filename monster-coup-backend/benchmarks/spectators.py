@@ -0,0 +1,122 @@
+# benchmarks/spectators.py
+# Espectadores em massa num jogo em destaque: enquanto jogos comuns rodam como no benchmarks.load,
+# N websockets assistem a um jogo jogado mais devagar (--think entre as jogadas).
+# Mede o p99 das ações dos jogadores (o fan-out deles não pode piorar com os espectadores), quantas
+# mensagens cada espectador recebeu, quanto tempo separa o primeiro e o último espectador a ver o fim
+# do jogo, e a CPU do servidor. Numa máquina só, milhares de clientes Python pesam mais que o servidor.
+#
+#   python -m benchmarks.spectators --spectators 0,500,2000
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from typing import List
+
+import httpx
+import websockets
+
+from .load import LevelStats, LocalServer, _percentile, play, rss_bytes, run_level
+
+
+class Watch:
+    def __init__(self):
+        self.messages = 0
+        self.leaks = 0  # Mensagens com my_monsters: nunca deveria acontecer
+        self.finished_at: float | None = None
+
+
+async def spectate(ws_url: str, watch: Watch, idle_timeout: float):
+    async with websockets.connect(ws_url, max_size=None) as ws:
+        while True:
+            message = json.loads(await asyncio.wait_for(ws.recv(), idle_timeout))
+            watch.messages += 1
+            payload = message.get("payload", {})
+            if "my_monsters" in payload:
+                watch.leaks += 1
+            if payload.get("game_state") == "FINISHED":
+                watch.finished_at = time.perf_counter()
+                return
+
+
+async def featured_game(base_url: str, n_spectators: int, n_players: int, think: float, idle_timeout: float) -> dict:
+    ws_base = "ws" + base_url[len("http"):]
+    async with httpx.AsyncClient(base_url=base_url, timeout=30) as client:
+        game_id = (await client.post("/create-game", params={"players": n_players})).json()["game_id"]
+        watches = [Watch() for _ in range(n_spectators)]
+        # Conecta em lotes para não estourar o backlog do listen do servidor.
+        spectators = []
+        for i in range(0, n_spectators, 100):
+            batch = [asyncio.create_task(spectate(f"{ws_base}/ws/{game_id}/spectate", w, idle_timeout)) for w in watches[i:i + 100]]
+            spectators += batch
+            await asyncio.sleep(0.05)
+        player_ids = [f"p{i}" for i in range(n_players)]
+        for player_id in player_ids:
+            (await client.post(f"/join-game/{game_id}/{player_id}")).raise_for_status()
+        stats = LevelStats()
+        await asyncio.gather(*(
+            play(f"{ws_base}/ws/{game_id}/{pid}", pid, stats, random.Random(i), idle_timeout, think)
+            for i, pid in enumerate(player_ids)
+        ))
+        results = await asyncio.gather(*spectators, return_exceptions=True)
+    seen = [w.finished_at for w in watches if w.finished_at is not None]
+    return {
+        "actions": stats.actions,
+        "watch_errors": sum(isinstance(r, Exception) for r in results),
+        "leaks": sum(w.leaks for w in watches),
+        "msgs": sum(w.messages for w in watches) / max(n_spectators, 1),
+        "spread": max(seen) - min(seen) if seen else float("nan"),
+    }
+
+
+async def run(args) -> List[dict]:
+    rows = []
+    async with LocalServer(args.in_process) as server:
+        for n_spectators in (int(n) for n in args.spectators.split(",")):
+            cpu_started, started = cpu_seconds(server.pid), time.perf_counter()
+            featured = asyncio.create_task(featured_game(server.base_url, n_spectators, args.players, args.think, args.idle_timeout))
+            background = await run_level(server.base_url, args.concurrency, args.duration, 2, args.seed, args.idle_timeout)
+            watched = await featured
+            server_cpu = (cpu_seconds(server.pid) - cpu_started) / (time.perf_counter() - started)
+            rows.append({
+                "spectators": n_spectators,
+                "p99_ms": _percentile(background.latencies, 0.99) * 1000,
+                "games": background.games,
+                "errors": background.errors,
+                "rss_mb": (rss_bytes(server.pid) or 0) / 2**20,
+                "server_cpu": server_cpu,
+                **watched,
+            })
+    return rows
+
+
+def cpu_seconds(pid: int) -> float:
+    # utime + stime do processo do servidor pelo /proc (Linux).
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.spectators", description="Espectadores num jogo em destaque")
+    parser.add_argument("--spectators", default="0,500,2000", help="espectadores do jogo em destaque, por nível")
+    parser.add_argument("--concurrency", type=int, default=10, help="jogos comuns simultâneos")
+    parser.add_argument("--duration", type=float, default=10, help="segundos de jogos comuns por nível")
+    parser.add_argument("--players", type=int, default=4, help="jogadores do jogo em destaque")
+    parser.add_argument("--think", type=float, default=0.05, help="segundos antes de cada jogada no jogo em destaque")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--idle-timeout", type=float, default=60)
+    parser.add_argument("--in-process", action="store_true", help="servidor no mesmo processo (sem uvicorn em subprocesso)")
+    args = parser.parse_args()
+    rows = asyncio.run(run(args))
+    print(f"{'watch':>6} {'p99 ms':>8} {'games':>6} {'err':>4} {'w.err':>5} {'leaks':>5} {'msgs/watcher':>12} "
+          f"{'end spread':>10} {'srv cpu':>7} {'rss MB':>7}")
+    for r in rows:
+        print(f"{r['spectators']:>6} {r['p99_ms']:>8.2f} {r['games']:>6} {r['errors']:>4} {r['watch_errors']:>5} {r['leaks']:>5} "
+              f"{r['msgs']:>12.1f} {r['spread'] * 1000:>8.0f}ms {r['server_cpu']:>7.0%} {r['rss_mb']:>7.1f}")
+    print("(actions in the featured game: " + ", ".join(str(r["actions"]) for r in rows) + ")")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# benchmarks/state_encoding.py
+# Custo de codificação por atualização de estado, antes e depois do cache do estado público.
+#
+#   python -m benchmarks.state_encoding
+import json
+import timeit
+
+from app.core import engine
+from app.core.models import Game
+
+RECIPIENTS = (2, 6, 50)
+
+
+def _make_game(n_players: int) -> Game:
+    game = Game("bench", seed=1)
+    for i in range(n_players):
+        game.player_ids.append(f"p{i}")
+        game.players[f"p{i}"] = i
+    # add_player limita o número de jogadores; para o benchmark montamos a mesa diretamente.
+    game.state = engine.new_game(n_players, game.seed)
+    game._record_version()
+    return game
+
+
+def _recipients(game: Game, n: int):
+    # Mais destinatários do que lugares na mesa: repete os jogadores.
+    return [game.player_ids[i % len(game.player_ids)] for i in range(n)]
+
+
+def _before(game: Game, recipients):
+    # Um get_private_state + json.dumps (formato do send_json do Starlette) por destinatário.
+    for pid in recipients:
+        message = {"type": "GAME_STATE_UPDATE", "payload": game.get_private_state(pid)}
+        json.dumps(message, ensure_ascii=False, separators=(",", ":"))
+
+
+def _after(game: Game, recipients):
+    # Estado público codificado uma vez; apenas my_monsters é codificado por destinatário.
+    game._public_json = None  # Simula uma nova versão a cada atualização
+    for pid in recipients:
+        game.sent_versions[pid] = None
+        game.get_state_update(pid)
+
+
+def main():
+    print(f"{'recipients':>10} {'before (us)':>12} {'after (us)':>12} {'speedup':>8}")
+    for n in RECIPIENTS:
+        game = _make_game(min(n, engine.MAX_PLAYERS))
+        recipients = _recipients(game, n)
+        loops = max(200, 20000 // n)
+        before = min(timeit.repeat(lambda: _before(game, recipients), number=loops, repeat=5)) / loops * 1e6
+        after = min(timeit.repeat(lambda: _after(game, recipients), number=loops, repeat=5)) / loops * 1e6
+        print(f"{n:>10} {before:>12.1f} {after:>12.1f} {before / after:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+# benchmarks/wire.py
+# Custo por mensagem dos dois formatos do websocket (app/core/wire.py), com mensagens de jogos reais
+# jogados pelo motor: bytes no fio, codificação no servidor (o que o escritor da conexão faz antes do
+# send), decodificação crua no cliente e decodificação + validação pelos modelos de app/schemas.py.
+# As ações do cliente medem o caminho inverso: codificação no cliente, decodificação + validação no servidor.
+#
+#   python -m benchmarks.wire --players 2,6
+import argparse
+import json
+import random
+import time
+from typing import Callable, Dict, List
+
+import msgpack
+
+from app.ai.bots import action_to_message
+from app.core import engine, wire
+from app.core.models import Game
+from app.core.serialization import EncodedMessage, append_field, dumps
+from app.schemas import client_message, server_message
+
+
+def apply(game: Game, player_id: str, message):
+    # O mesmo despacho da sessão (session._apply_player_message), sem o resto do ator.
+    payload = message.payload
+    if message.type == "PLAYER_ACTION":
+        game.handle_action(player_id, payload.action, payload.target_player_id)
+    elif message.type == "ACTION_RESPONSE":
+        game.resolve_pending_action(player_id, payload.contested, payload.block_with)
+    else:
+        game.handle_player_choice(player_id, payload.monster_name)
+
+
+def with_seq(message, seq: int):
+    # Como o MessageStream numera cada mensagem antes de entregá-la.
+    if isinstance(message, EncodedMessage):
+        return append_field(message, "seq", seq)
+    return {**message, "seq": seq}
+
+
+def collect(n_players: int, n_games: int, seed: int) -> Dict[str, list]:
+    rng = random.Random(seed)
+    samples = {"PRIVATE_STATE": [], "GAME_STATE_DELTA": [], "GAME_STATE_UPDATE": [], "client action": []}
+    seq = 0
+    for g in range(n_games):
+        game = Game(f"g{g}", seed=rng.getrandbits(63), max_players=n_players)
+        for i in range(n_players):
+            game.add_player(f"player-{i}")
+        game.start_game()
+        for player_id in game.player_ids:
+            game.get_state_update(player_id)  # Estado inicial já enviado: daqui em diante, deltas
+        while game.state.phase != engine.Phase.FINISHED:
+            action = rng.choice(engine.legal_actions(game.state))
+            message = action_to_message(game, action)
+            samples["client action"].append(message._asdict() | {"payload": message.payload._asdict()})
+            apply(game, game.player_ids[action.actor], message)
+            for player_id in game.player_ids:
+                seq += 1
+                update = game.get_state_update(player_id)
+                if update is not None:
+                    samples["GAME_STATE_DELTA"].append(with_seq(update, seq))
+            # Um snapshot (reconexão) e a atualização dos espectadores a cada versão.
+            game.sent_versions[game.player_ids[0]] = None
+            samples["PRIVATE_STATE"].append(with_seq(game.get_state_update(game.player_ids[0], "PRIVATE_STATE"), seq))
+            samples["GAME_STATE_UPDATE"].append(game.spectator_update())
+    return samples
+
+
+def per_message(fn: Callable, items: list, min_time: float = 0.2) -> float:
+    # Segundos por item: repete a lista inteira até somar min_time.
+    rounds, elapsed = 0, 0.0
+    while elapsed < min_time:
+        started = time.perf_counter()
+        for item in items:
+            fn(item)
+        elapsed += time.perf_counter() - started
+        rounds += 1
+    return elapsed / (rounds * len(items))
+
+
+def server_rows(kind: str, messages: list) -> List[dict]:
+    texts = [m.text if isinstance(m, EncodedMessage) else dumps(m) for m in messages]
+    frames = [wire.pack(m) for m in messages]
+    return [
+        {
+            "kind": kind, "format": "json", "bytes": sum(map(len, texts)) / len(texts),
+            "encode": per_message(lambda m: m.text if isinstance(m, EncodedMessage) else dumps(m), messages),
+            "decode": per_message(json.loads, texts),
+            "validate": per_message(server_message.validate_json, texts),
+        },
+        {
+            "kind": kind, "format": "msgpack", "bytes": sum(map(len, frames)) / len(frames),
+            "encode": per_message(wire.pack, messages),
+            "decode": per_message(msgpack.unpackb, frames),
+            "validate": per_message(lambda f: server_message.validate_python(wire.unpack(f)), frames),
+        },
+    ]
+
+
+def client_rows(messages: List[dict]) -> List[dict]:
+    texts = [json.dumps(m) for m in messages]
+    frames = [msgpack.packb(wire.compact(m)) for m in messages]
+    return [
+        {
+            "kind": "client action", "format": "json", "bytes": sum(map(len, texts)) / len(texts),
+            "encode": per_message(json.dumps, messages),
+            "decode": per_message(json.loads, texts),
+            "validate": per_message(client_message.validate_json, texts),
+        },
+        {
+            "kind": "client action", "format": "msgpack", "bytes": sum(map(len, frames)) / len(frames),
+            "encode": per_message(lambda m: msgpack.packb(wire.compact(m)), messages),
+            "decode": per_message(msgpack.unpackb, frames),
+            "validate": per_message(wire.decode, frames),
+        },
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Custo por mensagem: JSON x MessagePack")
+    parser.add_argument("--players", default="2,6", help="jogadores por jogo, por nível")
+    parser.add_argument("--games", type=int, default=20, help="jogos aleatórios de onde saem as mensagens")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    print("encode: servidor (ações: cliente); decode: parse cru; validate: parse + modelos de app/schemas.py")
+    print(f"{'players':>7} {'message':<18} {'format':<8} {'bytes':>7} {'encode us':>10} {'decode us':>10} {'validate us':>12}")
+    for n_players in (int(n) for n in args.players.split(",")):
+        samples = collect(n_players, args.games, args.seed)
+        actions = samples.pop("client action")
+        rows = [row for kind, messages in samples.items() for row in server_rows(kind, messages)] + client_rows(actions)
+        for r in rows:
+            print(f"{n_players:>7} {r['kind']:<18} {r['format']:<8} {r['bytes']:>7.0f} {r['encode'] * 1e6:>10.2f} "
+                  f"{r['decode'] * 1e6:>10.2f} {r['validate'] * 1e6:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# tests/conftest.py
+# Fixtures comuns aos módulos de teste; nenhum módulo de teste importa outro.
+import asyncio
+import time
+
+import pytest
+
+from app.core.game_manager import GameManager
+from app.core.models import Game
+
+
+@pytest.fixture
+def make_manager():
+    """Fábrica de GameManager sem websockets e sem reaper; log de eventos só se log_dir for dado."""
+    def make(log_dir="", **kwargs) -> GameManager:
+        kwargs.setdefault("deliver", lambda game_id, outbound: None)
+        kwargs.setdefault("close_game", lambda game_id: None)
+        return GameManager(reaper_interval=0, log_dir=str(log_dir), **kwargs)
+    return make
+
+
+@pytest.fixture
+def crash():
+    """Para um GameManager como uma queda do processo: sem o snapshot do desligamento."""
+    def stop(manager: GameManager):
+        for task in (manager._reaper_task, manager._snapshot_task):
+            if task:
+                task.cancel()
+        manager.event_log.close()
+        for session in manager.sessions.values():
+            session.stop()
+    return stop
+
+
+@pytest.fixture
+def apply_message():
+    """Aplica no Game uma mensagem de cliente, com o mesmo despacho da sessão."""
+    def apply(game: Game, player_id: str, message):
+        payload = message.payload
+        if message.type == "PLAYER_ACTION":
+            game.handle_action(player_id, payload.action, payload.target_player_id)
+        elif message.type == "ACTION_RESPONSE":
+            game.resolve_pending_action(player_id, payload.contested, payload.block_with)
+        else:
+            game.handle_player_choice(player_id, payload.monster_name)
+    return apply
+
+
+class FakeSocket:
+    # WebSocket que guarda o que recebe; delay atrasa cada envio e stall nunca o completa.
+    def __init__(self, delay: float = 0, stall: bool = False):
+        self.delay = delay
+        self.stall = stall
+        self.sent = []  # (instante, dados)
+        self.closed_with = None
+
+    async def _send(self, data):
+        if self.stall:
+            await asyncio.Event().wait()
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.sent.append((time.perf_counter(), data))
+
+    async def send_text(self, data: str):
+        await self._send(data)
+
+    async def send_bytes(self, data: bytes):
+        await self._send(data)
+
+    async def accept(self, subprotocol=None):
+        pass
+
+    async def close(self, code: int = 1000):
+        self.closed_with = code
+
+
+@pytest.fixture
+def fake_socket():
+    return FakeSocket
@@ -0,0 +1,103 @@
+# tests/test_bots.py
+import asyncio
+import time
+
+import pytest
+
+from app.ai.bots import BotManager, BotPlayer, bot_manager
+from app.ai.mcts import ISMCTS
+from app.core.models import Game
+
+
+def started_game() -> Game:
+    game = Game("g1", seed=5)
+    game.add_player("p0")
+    game.add_player("bot-1")
+    game.start_game()
+    return game
+
+
+def test_bot_out_of_turn_returns_none_without_searching():
+    async def scenario():
+        manager = BotManager(move_budget_ms=5000, search_threads=1, rollout_workers=0)
+        game = started_game()
+        waiting = game.player_ids[1 - game.state.turn]
+        bot = manager.add_bot(game, waiting)
+        started = time.monotonic()
+        assert await manager.choose_message(game, bot) is None
+        assert time.monotonic() - started < 1
+        assert not bot.thinking
+
+    asyncio.run(scenario())
+
+
+def test_repeated_search_failures_end_in_a_legal_move(monkeypatch):
+    def broken_search(self, *args):
+        raise RuntimeError("search failed")
+
+    async def scenario():
+        monkeypatch.setattr(BotPlayer, "decide", broken_search)
+        manager = BotManager(move_budget_ms=50, search_threads=1, rollout_workers=0, max_failures=3)
+        game = started_game()
+        bot = manager.add_bot(game, game.current_turn_player_id)
+        for failures in (1, 2):
+            assert await manager.choose_message(game, bot) is None
+            assert bot.failures == failures
+        message = await manager.choose_message(game, bot)
+        assert message.type == "PLAYER_ACTION" and bot.failures == 0
+        version = game.version
+        game.handle_action(bot.player_id, message.payload.action, message.payload.target_player_id)
+        assert game.version == version + 1  # O motor aceitou a jogada
+
+    asyncio.run(scenario())
+
+
+def test_search_without_a_legal_action_fails_fast():
+    game = started_game()
+    searcher = ISMCTS(1 - game.state.turn)
+    with pytest.raises(ValueError):
+        searcher.search(game.state, time.monotonic() + 5)
+
+
+def test_bot_ids_follow_the_ids_already_in_the_game():
+    game = Game("g1", seed=5, max_players=6)
+    manager = BotManager(rollout_workers=0)
+    assert manager.new_bot_id(game) == "bot-1"
+    for player_id in ("bot-1", "bot-7", "bot-x", "p0"):
+        game.add_player(player_id)
+    assert manager.new_bot_id(game) == "bot-8"
+
+
+def test_bots_added_after_a_restart_do_not_collide_with_recovered_ones(tmp_path, make_manager, crash):
+    async def scenario():
+        manager = make_manager(tmp_path)
+        await manager.start()
+        game_id = await manager.new_game(4)
+        assert [await manager.submit(game_id, "add_bot") for _ in range(2)] == ["bot-1", "bot-2"]
+        crash(manager)
+        bot_manager.remove_game(game_id)
+
+        recovered = make_manager(tmp_path)
+        await recovered.start()
+        assert set(bot_manager.bots[game_id]) == {"bot-1", "bot-2"}
+        assert await recovered.submit(game_id, "add_bot") == "bot-3"
+        assert recovered.get_game(game_id).player_ids == ["bot-1", "bot-2", "bot-3"]
+        await recovered.stop()
+        bot_manager.remove_game(game_id)
+
+    asyncio.run(scenario())
+
+
+def test_rollouts_run_in_the_process_pool():
+    async def scenario():
+        manager = BotManager(move_budget_ms=100, search_threads=1, rollout_workers=1)
+        try:
+            game = started_game()
+            bot = manager.add_bot(game, game.player_ids[game.state.turn])
+            message = await manager.choose_message(game, bot)
+            assert message is not None and manager._rollout_pool is not None
+        finally:
+            manager.shutdown()
+        assert manager._rollout_pool is None
+
+    asyncio.run(scenario())
@@ -0,0 +1,119 @@
+# tests/test_connection_manager.py
+import asyncio
+import time
+
+from app.core.connection_manager import ConnectionManager, OverflowPolicy, PlayerConnection, Resume
+
+
+def connection(max_queue: int = 16, policy: OverflowPolicy = OverflowPolicy.COALESCE) -> PlayerConnection:
+    return PlayerConnection(websocket=None, max_queue=max_queue, policy=policy, send_timeout=1)
+
+
+def delta(base: int, seq: int) -> dict:
+    return {"type": "GAME_STATE_DELTA", "base_version": base, "version": base + 1,
+            "patch": [{"op": "replace", "path": "/version", "value": base + 1}], "seq": seq}
+
+
+def test_sync_snapshot_replaces_state_messages_queued_while_paused():
+    async def scenario():
+        conn = connection()
+        error = {"type": "ERROR", "message": "Invalid action or not your turn.", "seq": 3}
+        for message in (delta(1, 1), delta(2, 2), error):
+            assert conn.enqueue(message)
+        snapshot = {"type": "PRIVATE_STATE", "payload": {"version": 3}, "seq": 4}
+        conn.resume([snapshot], replay=False)
+        assert list(conn.queue) == [error, snapshot]
+
+    asyncio.run(scenario())
+
+
+def test_sync_without_a_snapshot_keeps_the_queue():
+    async def scenario():
+        conn = connection()
+        conn.enqueue(delta(1, 1))
+        conn.resume([], replay=False)
+        assert list(conn.queue) == [delta(1, 1)]
+
+    asyncio.run(scenario())
+
+
+def test_coalesced_state_goes_to_the_tail_in_seq_order():
+    async def scenario():
+        conn = connection(max_queue=3)
+        error = {"type": "ERROR", "message": "Invalid action or not your turn.", "seq": 2}
+        for message in (delta(1, 1), error, {"type": "PLAYER_JOINED", "seq": 3}):
+            assert conn.enqueue(message)
+        assert conn.enqueue(delta(2, 4))  # Fila cheia: junta com o delta 1 -> 2
+        assert [m["seq"] for m in conn.queue] == [2, 3, 4]
+        assert conn.queue[-1]["base_version"] == 1 and conn.queue[-1]["version"] == 3
+        snapshot = {"type": "PRIVATE_STATE", "payload": {"version": 3}, "seq": 5}
+        assert conn.enqueue(snapshot)
+        assert [m["seq"] for m in conn.queue] == [2, 3, 5]
+        assert conn.queue[-1] is snapshot
+
+    asyncio.run(scenario())
+
+
+def test_drop_oldest_drops_state_before_anything_else():
+    async def scenario():
+        conn = connection(max_queue=3, policy=OverflowPolicy.DROP_OLDEST)
+        error = {"type": "ERROR", "message": "x", "seq": 1}
+        for message in (error, delta(1, 2), delta(2, 3), delta(3, 4)):
+            assert conn.enqueue(message)
+        assert [m["seq"] for m in conn.queue] == [1, 3, 4] and conn.dropped == 1
+        full_of_errors = connection(max_queue=2, policy=OverflowPolicy.DROP_OLDEST)
+        for seq in range(3):
+            full_of_errors.enqueue({"type": "ERROR", "message": "x", "seq": seq})
+        assert [m["seq"] for m in full_of_errors.queue] == [1, 2]  # Sem estado na fila: sai a mais antiga
+
+    asyncio.run(scenario())
+
+
+def test_disconnect_policy_drops_the_client_with_a_full_queue(fake_socket):
+    async def scenario():
+        manager = ConnectionManager(max_queue=2, policy=OverflowPolicy.DISCONNECT, send_timeout=1)
+        sockets = {"p1": fake_socket(), "p2": fake_socket()}
+        for player_id, socket in sockets.items():
+            await manager.connect(socket, "g1", player_id)
+        manager.resume_player("g1", "p2", Resume(manager.active_connections["g1"]["p2"].id, [], False))
+        for seq in range(3):  # p1 ainda espera o Resume: a fila dele enche; a de p2 se esvazia
+            manager.broadcast_nowait("g1", {"type": "ERROR", "message": "x", "seq": seq})
+            await asyncio.sleep(0.001)
+        assert list(manager.active_connections["g1"]) == ["p2"]
+        await asyncio.sleep(0.01)
+        assert sockets["p1"].closed_with == 1011
+        assert len(sockets["p2"].sent) == 3
+
+    asyncio.run(scenario())
+
+
+def test_slow_client_does_not_delay_the_others(fake_socket):
+    async def scenario():
+        manager = ConnectionManager(max_queue=64, policy=OverflowPolicy.COALESCE, send_timeout=0.2)
+        sockets = {"slow": fake_socket(stall=True), "p1": fake_socket(), "p2": fake_socket()}
+        for player_id, socket in sockets.items():
+            connection_id = await manager.connect(socket, "g1", player_id)
+            manager.resume_player("g1", player_id, Resume(connection_id, [], False))
+        started = time.perf_counter()
+        for seq in range(5):
+            manager.broadcast_nowait("g1", {"type": "PLAYER_JOINED", "seq": seq})
+        await asyncio.sleep(0.02)
+        for player_id in ("p1", "p2"):
+            assert len(sockets[player_id].sent) == 5
+            assert sockets[player_id].sent[-1][0] - started < 0.1
+        await asyncio.sleep(0.3)  # O envio travado passa do send_timeout: só o lento cai
+        assert sorted(manager.active_connections["g1"]) == ["p1", "p2"]
+
+    asyncio.run(scenario())
+
+
+def test_fan_out_survives_disconnects_during_the_loop(fake_socket):
+    async def scenario():
+        manager = ConnectionManager(max_queue=1, policy=OverflowPolicy.DISCONNECT, send_timeout=1)
+        for i in range(10):
+            await manager.connect(fake_socket(), "g1", f"p{i}")  # Sem Resume: a segunda mensagem derruba
+        manager.broadcast_nowait("g1", {"type": "PLAYER_JOINED"})
+        manager.broadcast_nowait("g1", {"type": "PLAYER_JOINED"})  # Cada enqueue remove do dicionário
+        assert "g1" not in manager.active_connections
+
+    asyncio.run(scenario())
@@ -0,0 +1,77 @@
+# tests/test_delta.py
+import random
+
+import pytest
+
+from app.ai.bots import action_to_message
+from app.core import engine
+from app.core.delta import apply_patch, diff
+from app.core.models import Game
+from app.core.serialization import EncodedMessage, loads
+
+
+def receive(client_state: dict | None, update) -> dict:
+    # O que um cliente faz com cada atualização: snapshot substitui, delta aplica sobre a base.
+    if isinstance(update, EncodedMessage):
+        return loads(update.text)["payload"]
+    return apply_patch(client_state, update["patch"])
+
+
+@pytest.mark.parametrize("old, new", [
+    ({}, {"a": 1}),
+    ({"a": 1, "b": {"c": [1, 2]}}, {"a": 2, "b": {"c": [1]}}),
+    ({"a": {"x": 1}, "b": 2}, {"b": 2}),
+    ({"a/b": 1, "c~d": 2}, {"a/b": 3, "c~d": None}),
+    ({"a": None}, {"a": {"nested": True}}),
+])
+def test_diff_then_apply_patch_gives_the_new_document(old, new):
+    assert apply_patch(old, diff(old, new)) == new
+
+
+def test_apply_patch_leaves_the_original_untouched():
+    old = {"players": {"p0": {"coins": 2}}}
+    apply_patch(old, diff(old, {"players": {"p0": {"coins": 5}}}))
+    assert old == {"players": {"p0": {"coins": 2}}}
+
+
+@pytest.mark.parametrize("n_players, seed", [(2, 1), (3, 2), (6, 3)])
+def test_clients_applying_deltas_track_the_private_state(n_players, seed, apply_message):
+    rng = random.Random(seed)
+    game = Game("g1", seed=seed, max_players=n_players)
+    for i in range(n_players):
+        game.add_player(f"p{i}")
+    game.start_game()
+    clients = {pid: receive(None, game.get_state_update(pid, "PRIVATE_STATE")) for pid in game.player_ids}
+    deltas = 0
+    while game.state.phase != engine.Phase.FINISHED:
+        action = rng.choice(engine.legal_actions(game.state))
+        apply_message(game, game.player_ids[action.actor], action_to_message(game, action))
+        for pid in game.player_ids:
+            update = game.get_state_update(pid)
+            if update is None:
+                continue
+            deltas += not isinstance(update, EncodedMessage)
+            clients[pid] = receive(clients[pid], update)
+            assert clients[pid] == game.get_private_state(pid)
+    assert deltas > 0
+
+
+def test_sync_from_an_old_version_gets_a_snapshot_and_from_a_recent_one_a_delta():
+    game = Game("g1", seed=5)
+    game.add_player("p0")
+    game.add_player("p1")
+    game.start_game()
+    first = game.version
+    while game.version <= first + game._history.maxlen:
+        game.handle_action(game.current_turn_player_id, "Treinar")  # Nunca termina o jogo
+
+    game.sync_player("p0", first)  # Saiu do histórico
+    assert isinstance(game.get_state_update("p0"), EncodedMessage)
+    game.sync_player("p0", game.version - 1)  # Ninguém recebeu essa versão: nem foi montada
+    assert isinstance(game.get_state_update("p0"), EncodedMessage)
+    game.handle_action(game.current_turn_player_id, "Treinar")
+    game.sync_player("p0", game.version - 1)  # A que p0 acabou de receber
+    update = game.get_state_update("p0")
+    assert update["type"] == "GAME_STATE_DELTA" and update["base_version"] == game.version - 1
+    game.sync_player("p0", game.version)
+    assert game.get_state_update("p0") is None
@@ -0,0 +1,253 @@
+# tests/test_engine.py
+import random
+from collections import Counter
+
+import pytest
+
+from app.core import engine
+from app.core.engine import Action, ActionKind, Card, ChoiceKind, Phase, PlayerState, Stage, State
+
+D, E, F, G, S = Card.DRAGAO, Card.ESPECTRO, Card.FALCAO, Card.GOLEM, Card.SLIME
+
+
+def make_state(*hands, coins=None, turn=0, deck=None) -> State:
+    """Estado em IN_PROGRESS com as mãos dadas; o baralho leva o resto das cartas."""
+    coins = coins or [engine.STARTING_COINS] * len(hands)
+    if deck is None:
+        remaining = Counter({card: engine.COPIES_PER_MONSTER for card in Card})
+        remaining.subtract(card for hand in hands for card in hand)
+        deck = bytes(sorted(remaining.elements()))
+    players = tuple(PlayerState(c, bytes(hand), b"") for c, hand in zip(coins, hands))
+    return State(players, deck, 12345, Phase.IN_PROGRESS, turn, None, -1, ChoiceKind.LOSE, -1)
+
+
+def card_count(state: State) -> Counter:
+    cards = Counter(state.deck)
+    for player in state.players:
+        cards.update(player.hand)
+        cards.update(player.revealed)
+    return cards
+
+
+def play(state: State, *actions: Action) -> State:
+    for action in actions:
+        state = engine.apply(state, action)
+    return state
+
+
+def random_game(n_players: int, seed: int):
+    rng = random.Random(seed)
+    state = engine.new_game(n_players, seed)
+    states = [state]
+    while state.phase != Phase.FINISHED:
+        state = engine.apply(state, rng.choice(engine.legal_actions(state)))
+        states.append(state)
+    return states
+
+
+# --- Construção e determinismo ---
+@pytest.mark.parametrize("n_players", [2, 4, engine.MAX_PLAYERS])
+def test_new_game_deals_two_cards_from_a_full_deck(n_players):
+    state = engine.new_game(n_players, 7)
+    assert all(len(p.hand) == engine.HAND_SIZE and p.coins == engine.STARTING_COINS for p in state.players)
+    assert card_count(state) == Counter({card: engine.COPIES_PER_MONSTER for card in Card})
+    assert 0 <= state.turn < n_players
+
+
+@pytest.mark.parametrize("n_players", [1, engine.MAX_PLAYERS + 1])
+def test_new_game_rejects_table_sizes(n_players):
+    with pytest.raises(ValueError):
+        engine.new_game(n_players, 1)
+
+
+def test_same_seed_same_game():
+    assert engine.new_game(4, 99) == engine.new_game(4, 99)
+    assert random_game(4, 99) == random_game(4, 99)
+    assert len({engine.new_game(4, seed) for seed in range(20)}) > 1
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_random_games_conserve_cards_and_finish_with_one_survivor(seed):
+    states = random_game(2 + seed % 5, seed)
+    full = Counter({card: engine.COPIES_PER_MONSTER for card in Card})
+    assert all(card_count(state) == full for state in states)
+    final = states[-1]
+    alive = [seat for seat in range(len(final.players)) if engine.is_alive(final, seat)]
+    assert alive == [final.winner]
+
+
+# --- Ações de turno ---
+def test_train_gives_one_coin_and_passes_the_turn():
+    state = play(make_state([D, E], [F, G]), Action(ActionKind.TRAIN, 0))
+    assert state.players[0].coins == 3
+    assert state.turn == 1 and state.phase == Phase.IN_PROGRESS
+
+
+def test_only_the_current_player_acts():
+    state = make_state([D, E], [F, G])
+    assert engine.apply(state, Action(ActionKind.TRAIN, 1)) is state
+
+
+def test_uncontested_hunt_gives_two_coins():
+    state = play(make_state([D, E], [F, S]), Action(ActionKind.HUNT, 0))
+    assert state.phase == Phase.AWAITING_RESPONSE
+    state = engine.apply(state, Action(ActionKind.ALLOW, 1))
+    assert state.players[0].coins == 4 and state.turn == 1 and state.pending is None
+
+
+def test_golem_blocks_hunt():
+    state = play(make_state([D, E], [G, S]), Action(ActionKind.HUNT, 0), Action(ActionKind.BLOCK, 1, -1, G))
+    assert state.players[0].coins == 2
+    assert state.turn == 1 and state.phase == Phase.IN_PROGRESS
+
+
+def test_golem_cannot_block_an_ability():
+    state = play(make_state([S, E], [G, D]), Action(ActionKind.ABILITY, 0, -1, S))
+    assert engine.apply(state, Action(ActionKind.BLOCK, 1, -1, G)) is state
+
+
+def test_final_strike_costs_seven_and_makes_the_target_lose_a_card():
+    state = make_state([D, E], [F, G], coins=[7, 2])
+    assert engine.apply(state, Action(ActionKind.FINAL_STRIKE, 0, 0)) is state  # Alvo inválido
+    state = engine.apply(state, Action(ActionKind.FINAL_STRIKE, 0, 1))
+    assert state.players[0].coins == 0
+    assert state.phase == Phase.AWAITING_CHOICE and state.chooser == 1 and state.choice == ChoiceKind.LOSE
+    state = engine.apply(state, Action(ActionKind.CHOOSE, 1, -1, G))
+    assert state.players[1].hand == bytes([F]) and state.players[1].revealed == bytes([G])
+    assert state.turn == 1
+
+
+def test_final_strike_needs_seven_coins():
+    state = make_state([D, E], [F, G], coins=[6, 2])
+    assert engine.apply(state, Action(ActionKind.FINAL_STRIKE, 0, 1)) is state
+
+
+# --- Habilidades sem contestação ---
+def test_slime_takes_three_coins():
+    state = play(make_state([S, E], [F, G]), Action(ActionKind.ABILITY, 0, -1, S), Action(ActionKind.ALLOW, 1))
+    assert state.players[0].coins == 5 and state.turn == 1
+
+
+@pytest.mark.parametrize("target_coins, stolen", [(5, 2), (1, 1), (0, 0)])
+def test_espectro_steals_up_to_two_coins(target_coins, stolen):
+    state = make_state([E, D], [F, G], coins=[2, target_coins])
+    state = play(state, Action(ActionKind.ABILITY, 0, 1, E), Action(ActionKind.ALLOW, 1))
+    assert state.players[0].coins == 2 + stolen
+    assert state.players[1].coins == target_coins - stolen
+
+
+def test_dragao_makes_the_target_reveal_a_card():
+    state = play(make_state([D, E], [F, G]), Action(ActionKind.ABILITY, 0, 1, D), Action(ActionKind.ALLOW, 1))
+    assert state.phase == Phase.AWAITING_CHOICE and state.chooser == 1
+    assert state.pending.stage == Stage.RESOLVING
+    state = engine.apply(state, Action(ActionKind.CHOOSE, 1, -1, F))
+    assert state.players[1].revealed == bytes([F]) and state.players[1].hand == bytes([G])
+    assert state.turn == 1 and state.pending is None
+
+
+def test_dragao_needs_a_living_opponent_as_target():
+    state = make_state([D, E], [F, G])
+    assert engine.apply(state, Action(ActionKind.ABILITY, 0, 0, D)) is state
+    assert engine.apply(state, Action(ActionKind.ABILITY, 0, 5, D)) is state
+
+
+def test_falcao_swaps_a_card_with_the_deck_without_revealing_it():
+    state = play(make_state([F, E], [D, G]), Action(ActionKind.ABILITY, 0, -1, F), Action(ActionKind.ALLOW, 1))
+    assert state.phase == Phase.AWAITING_CHOICE and state.chooser == 0 and state.choice == ChoiceKind.SWAP
+    before = state
+    state = engine.apply(state, Action(ActionKind.CHOOSE, 0, -1, F))
+    player = state.players[0]
+    assert len(player.hand) == 2 and E in player.hand and player.revealed == b""
+    assert len(state.deck) == len(before.deck)
+    assert card_count(state) == card_count(before)
+    assert state.turn == 1
+
+
+def test_choosing_a_card_not_in_hand_loses_the_first_one():
+    state = play(make_state([D, E], [F, G]), Action(ActionKind.ABILITY, 0, 1, D), Action(ActionKind.ALLOW, 1))
+    state = engine.apply(state, Action(ActionKind.CHOOSE, 1, -1, S))
+    assert state.players[1].revealed == bytes([F])
+
+
+# --- Contestação ---
+def test_challenged_bluff_cancels_the_action_and_costs_the_bluffer_a_card():
+    state = play(make_state([D, E], [F, G]), Action(ActionKind.ABILITY, 0, -1, S), Action(ActionKind.CHALLENGE, 1))
+    assert state.phase == Phase.AWAITING_CHOICE and state.chooser == 0 and state.pending is None
+    state = engine.apply(state, Action(ActionKind.CHOOSE, 0, -1, D))
+    assert state.players[0].revealed == bytes([D])
+    assert state.players[0].coins == 2  # O Slime não aconteceu
+    assert state.turn == 1
+
+
+def test_failed_challenge_costs_the_challenger_a_card_and_the_ability_still_runs():
+    start = make_state([S, E], [F, G])
+    state = play(start, Action(ActionKind.ABILITY, 0, -1, S), Action(ActionKind.CHALLENGE, 1))
+    # A carta provada volta ao baralho e o jogador compra outra no lugar.
+    assert state.pending.stage == Stage.PROVEN
+    assert state.chooser == 1 and len(state.players[0].hand) == 2 and E in state.players[0].hand
+    assert card_count(state) == card_count(start)
+    state = engine.apply(state, Action(ActionKind.CHOOSE, 1, -1, G))
+    assert state.players[1].revealed == bytes([G])
+    assert state.players[0].coins == 5
+    assert state.turn == 1
+
+
+def test_challenging_a_hunt_costs_the_hunter_a_card():
+    # Caçar não declara monstro: contestar é sempre "blefe" e custa uma carta a quem caçou.
+    state = play(make_state([D, E], [F, G]), Action(ActionKind.HUNT, 0), Action(ActionKind.CHALLENGE, 1))
+    assert state.chooser == 0 and state.pending is None
+
+
+# --- Mesas com mais de 2 jogadores ---
+def test_ability_waits_for_every_opponent_to_allow():
+    state = play(make_state([S, E], [F, G], [D, D], [E, F]), Action(ActionKind.ABILITY, 0, -1, S))
+    assert engine.acting_players(state) == [1, 2, 3]
+    state = engine.apply(state, Action(ActionKind.ALLOW, 2))
+    assert state.phase == Phase.AWAITING_RESPONSE and state.pending.passed == 1 << 2
+    assert engine.acting_players(state) == [1, 3]
+    assert engine.apply(state, Action(ActionKind.ALLOW, 2)) is state  # Já deixou passar
+    assert engine.apply(state, Action(ActionKind.CHALLENGE, 2)) is state
+    state = play(state, Action(ActionKind.ALLOW, 1), Action(ActionKind.ALLOW, 3))
+    assert state.players[0].coins == 5 and state.turn == 1
+
+
+def test_one_challenge_decides_even_after_others_allowed():
+    state = play(
+        make_state([D, E], [F, G], [D, G]),
+        Action(ActionKind.ABILITY, 0, -1, S), Action(ActionKind.ALLOW, 1), Action(ActionKind.CHALLENGE, 2),
+    )
+    assert state.phase == Phase.AWAITING_CHOICE and state.chooser == 0
+
+
+# --- Eliminação ---
+def test_elimination_skips_the_player_and_last_survivor_wins():
+    state = make_state([D, E], [F], [G, S], coins=[7, 2, 2])
+    state = play(state, Action(ActionKind.FINAL_STRIKE, 0, 1), Action(ActionKind.CHOOSE, 1, -1, F))
+    assert not engine.is_alive(state, 1)
+    assert state.turn == 2  # O assento 1 é pulado
+    assert state.phase == Phase.IN_PROGRESS
+
+    # Alvos eliminados não valem, e o eliminado não responde.
+    assert engine.apply(state, Action(ActionKind.ABILITY, 2, 1, D)) is state
+    hunted = engine.apply(state, Action(ActionKind.HUNT, 2))
+    assert engine.acting_players(hunted) == [0]
+
+    state = make_state([D], [F], coins=[7, 2])
+    state = play(state, Action(ActionKind.FINAL_STRIKE, 0, 1), Action(ActionKind.CHOOSE, 1, -1, F))
+    assert state.phase == Phase.FINISHED and state.winner == 0
+    assert engine.legal_actions(state) == []
+
+
+def test_player_who_loses_the_last_card_in_a_failed_challenge_is_eliminated():
+    state = play(make_state([S, E], [G], [D, D]), Action(ActionKind.ABILITY, 0, -1, S), Action(ActionKind.CHALLENGE, 1))
+    state = engine.apply(state, Action(ActionKind.CHOOSE, 1, -1, G))
+    assert not engine.is_alive(state, 1)
+    assert state.players[0].coins == 5
+    assert state.turn == 2
+
+
+def test_legal_actions_are_all_accepted():
+    for seed in range(10):
+        for state in random_game(3, seed)[:-1]:
+            for action in engine.legal_actions(state):
+                assert engine.apply(state, action) is not state
@@ -0,0 +1,93 @@
+# tests/test_game_manager.py
+import asyncio
+import time
+
+import pytest
+
+from app.core import engine
+from app.core.game_manager import approx_size
+from app.core.session import GameError
+
+
+def test_evict_fails_commands_still_in_the_inbox(make_manager):
+    async def scenario():
+        manager = make_manager()
+        game_id = await manager.new_game()
+        pending = asyncio.create_task(manager.submit(game_id, "join", "p1"))
+        await asyncio.sleep(0)  # O join já está na inbox, a sessão ainda não o aplicou
+        manager.evict(game_id, "lru")
+        with pytest.raises(GameError) as exc:
+            await asyncio.wait_for(pending, 1)
+        assert exc.value.status_code == 404
+
+    asyncio.run(scenario())
+
+
+def test_lru_eviction_fails_pending_submits_of_the_evicted_game(make_manager):
+    async def scenario():
+        manager = make_manager(max_games=1)
+        first = await manager.new_game()
+        pending = asyncio.create_task(manager.submit(first, "join", "p1"))
+        await asyncio.sleep(0)
+        await manager.new_game()  # Remove o primeiro jogo para abrir espaço
+        with pytest.raises(GameError):
+            await asyncio.wait_for(pending, 1)
+
+    asyncio.run(scenario())
+
+
+def test_reaper_applies_the_ttl_of_each_game_state(make_manager):
+    async def scenario():
+        closed = []
+        manager = make_manager(close_game=closed.append, ttl_waiting=100, ttl_abandoned=50, ttl_finished=10)
+        waiting = await manager.new_game()
+        abandoned, connected, finished = [await manager.new_game() for _ in range(3)]
+        for game_id in (abandoned, connected, finished):
+            for player_id in ("p1", "p2"):
+                await manager.submit(game_id, "join", player_id)
+        await manager.submit(connected, "connect", "p1")
+        game = manager.get_game(finished)
+        game.state = game.state._replace(phase=engine.Phase.FINISHED)
+
+        now = time.monotonic()
+        assert manager.reap(now + 5) == 0
+        assert manager.reap(now + 20) == 1 and finished in closed
+        assert manager.reap(now + 60) == 1 and abandoned in closed  # O conectado fica
+        assert manager.reap(now + 200) == 1 and waiting in closed
+        assert list(manager.sessions) == [connected]
+        assert manager.evicted == {"finished": 1, "abandoned": 1, "waiting": 1}
+
+    asyncio.run(scenario())
+
+
+def test_game_cap_evicts_the_least_recently_used(make_manager):
+    async def scenario():
+        manager = make_manager(max_games=3)
+        first, second, third = [await manager.new_game() for _ in range(3)]
+        await manager.submit(first, "join", "p1")  # Usado por último: sobe na fila
+        fourth = await manager.new_game()
+        assert list(manager.sessions) == [third, first, fourth] and second not in manager.active_games
+        assert manager.evicted == {"lru": 1}
+
+    asyncio.run(scenario())
+
+
+def test_stats_estimate_the_memory_per_game(make_manager):
+    async def scenario():
+        manager = make_manager()
+        assert (await manager.stats())["approx_bytes_per_game"] == 0
+        for _ in range(4):
+            game_id = await manager.new_game()
+            for player_id in ("p1", "p2"):
+                await manager.submit(game_id, "join", player_id)
+        stats = await manager.stats()
+        assert stats["live_games"] == 4 and stats["evicted_games"] == 0
+        assert 1_000 < stats["approx_bytes_per_game"] < 1_000_000
+
+    asyncio.run(scenario())
+
+
+def test_approx_size_counts_shared_objects_once():
+    shared = list(range(1000))
+    assert approx_size([shared, shared]) < approx_size([shared, list(range(1000))])
+    assert approx_size({"a": shared}) >= approx_size(shared)
@@ -0,0 +1,37 @@
+# tests/test_load.py
+import random
+
+from app import schemas
+from app.core.models import Game, GameState
+from benchmarks import load
+
+
+def level(concurrency: int, p99_ms: float, messages_per_sec: float, errors: int = 0) -> dict:
+    return {"concurrency": concurrency, "p99_ms": p99_ms, "messages_per_sec": messages_per_sec, "errors": errors}
+
+
+def test_client_plays_a_full_game_with_valid_messages(apply_message):
+    rng = random.Random(4)
+    game = Game("g1", seed=4, max_players=3)
+    for player_id in ("p0", "p1", "p2"):
+        game.add_player(player_id)
+    game.start_game()
+    for _ in range(1000):
+        if game.game_state == GameState.FINISHED:
+            break
+        moves = [(pid, load.choose_message(game.get_private_state(pid), pid, rng)) for pid in game.player_ids]
+        moves = [(pid, message) for pid, message in moves if message is not None]
+        assert moves, "nenhum jogador tem o que fazer"
+        version = game.version
+        for player_id, message in moves:
+            apply_message(game, player_id, schemas.client_message.validate_python(message))
+        assert game.version > version  # O servidor aceitou ao menos uma das mensagens
+    assert game.game_state == GameState.FINISHED
+
+
+def test_check_flags_only_real_regressions():
+    baseline = {"host": load._host(), "results": [level(10, 5.0, 1000), level(50, 20.0, 4000)]}
+    within = [level(10, 5.4, 950), level(50, 21.0, 3900), level(200, 99.0, 1)]  # 200: sem baseline
+    assert load.check_regressions(within, baseline, tolerance=0.1) == []
+    problems = load.check_regressions([level(10, 6.0, 800, errors=2)], baseline, tolerance=0.1)
+    assert len(problems) == 3 and all(p.startswith("concurrency 10:") for p in problems)
@@ -0,0 +1,87 @@
+# tests/test_matchmaking.py
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.matchmaking import Matchmaker, MatchmakingError
+from app.main import app
+
+
+async def fake_start(size, player_ids):
+    return "game"
+
+
+@pytest.mark.parametrize("rating", [float("nan"), float("inf"), float("-inf")])
+def test_enqueue_rejects_non_finite_ratings(rating):
+    async def scenario():
+        matchmaker = Matchmaker(start=fake_start)
+        with pytest.raises(MatchmakingError):
+            matchmaker.enqueue("p1", 2, rating)
+        assert not matchmaker.tickets
+
+    asyncio.run(scenario())
+
+
+def test_full_bracket_forms_a_match():
+    async def scenario():
+        matchmaker = Matchmaker(start=fake_start, bracket_width=100)
+        first = matchmaker.enqueue("p1", 2, 1510)
+        second = matchmaker.enqueue("p2", 2, 1590)
+        assert await first.future == await second.future == "game"
+        assert not matchmaker.tickets
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("rating", ["nan", "inf", "-inf", "abc"])
+def test_matchmake_endpoint_answers_bad_ratings_with_an_error(rating):
+    # Sem o `with`, o TestClient não roda o lifespan (shards, log de eventos).
+    with TestClient(app).websocket_connect(f"/matchmake?player_id=p1&size=2&rating={rating}") as ws:
+        assert ws.receive_json()["type"] == "ERROR"
+
+
+def test_long_wait_widens_to_the_nearest_brackets():
+    async def scenario():
+        matchmaker = Matchmaker(start=fake_start, bracket_width=100, widen_after=10)
+        tickets = [matchmaker.enqueue(f"p{i}", 3, rating) for i, rating in enumerate((1000, 1150, 1250, 750))]
+        now = tickets[0].queued_at
+        assert matchmaker.widen(now + 9) == 0  # Ninguém esperou o bastante
+        assert matchmaker.widen(now + 10) == 0  # Uma faixa para cada lado ainda não completa a mesa
+        assert matchmaker.widen(now + 20) == 1
+        assert await tickets[0].future == "game"
+        # As faixas mais próximas entram primeiro: 1100 e 1200 (distâncias 1 e 2), não a de 700 (distância 3).
+        assert set(matchmaker.tickets) == {"p3"}
+        assert matchmaker.stats() == {"waiting": 1, "waiting_by_size": {3: 1}, "matches": 1}
+
+    asyncio.run(scenario())
+
+
+def test_cancel_leaves_the_queue_consistent():
+    async def scenario():
+        matchmaker = Matchmaker(start=fake_start, bracket_width=100)
+        matchmaker.enqueue("p1", 2, 1500)
+        with pytest.raises(MatchmakingError):
+            matchmaker.enqueue("p1", 2, 1500)  # Já está na fila
+        matchmaker.cancel("p1")
+        matchmaker.cancel("p1")  # Cancelar de novo não faz nada
+        assert not matchmaker.tickets and not matchmaker._buckets and not matchmaker._brackets
+        first = matchmaker.enqueue("p2", 2, 1500)
+        second = matchmaker.enqueue("p3", 2, 1500)
+        assert await first.future == await second.future == "game"
+
+    asyncio.run(scenario())
+
+
+def test_failed_start_fails_every_ticket_of_the_match():
+    async def failing_start(size, player_ids):
+        raise RuntimeError("no shard")
+
+    async def scenario():
+        matchmaker = Matchmaker(start=failing_start, bracket_width=100)
+        tickets = [matchmaker.enqueue(f"p{i}", 2, 1500) for i in range(2)]
+        for ticket in tickets:
+            with pytest.raises(MatchmakingError):
+                await ticket.future
+
+    asyncio.run(scenario())
@@ -0,0 +1,62 @@
+# tests/test_metrics.py
+from fastapi.testclient import TestClient
+
+from app import main
+from app.core import metrics
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = metrics.Registry()
+    histogram = registry.histogram("h_seconds", "help", ("type",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 2.0):
+        histogram.observe(value, "SYNC")
+    text = metrics.render([registry.export()])
+    assert "# TYPE h_seconds histogram" in text
+    assert 'h_seconds_bucket{type="SYNC",le="0.1"} 1' in text
+    assert 'h_seconds_bucket{type="SYNC",le="1.0"} 3' in text
+    assert 'h_seconds_bucket{type="SYNC",le="+Inf"} 4' in text
+    assert 'h_seconds_count{type="SYNC"} 4' in text
+    assert 'h_seconds_sum{type="SYNC"} 3.05' in text
+
+
+def test_render_sums_the_series_of_every_process():
+    exports = []
+    for _ in range(3):
+        registry = metrics.Registry()
+        registry.counter("c_total", "help", ("result",)).inc(2, "replay")
+        registry.histogram("h_seconds", "help", buckets=(1.0,)).observe(0.5)
+        registry.gauge("g", "help", lambda: 7)
+        exports.append(registry.export())
+    text = metrics.render(exports)
+    assert 'c_total{result="replay"} 6' in text
+    assert 'h_seconds_bucket{le="1.0"} 3' in text
+    assert "g 21" in text
+
+
+def test_disabled_registry_skips_histograms_but_keeps_counters():
+    registry = metrics.Registry(enabled=False)
+    histogram = registry.histogram("h_seconds", "help")
+    counter = registry.counter("c_total", "help")
+    histogram.observe(1.0)
+    counter.inc()
+    assert histogram.series == {}
+    assert counter.series == {(): 1}
+
+
+def test_label_values_are_escaped():
+    registry = metrics.Registry()
+    registry.counter("c_total", "help", ("type",)).inc(1, 'a"b\\c\n')
+    assert 'c_total{type="a\\"b\\\\c\\n"} 1' in metrics.render([registry.export()])
+
+
+def test_unknown_message_types_share_one_label():
+    assert metrics.message_label("SYNC") == "SYNC"
+    assert metrics.message_label("made-up") == metrics.message_label(None) == "other"
+
+
+def test_metrics_endpoint_serves_the_text_format():
+    response = TestClient(main.app).get("/metrics")  # Sem o lifespan: nada de shards nem log de eventos
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "# TYPE monster_coup_message_seconds histogram" in response.text
+    assert "monster_coup_sent_bytes_total" in response.text
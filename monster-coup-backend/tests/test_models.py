@@ -0,0 +1,145 @@
+# tests/test_models.py
+import pytest
+
+from app.core import engine
+from app.core.models import MAX_PLAYERS, TURN_ACTIONS, Game, GameState
+
+
+def started_game(n_players: int = 2, seed: int = 3) -> Game:
+    game = Game("g1", seed=seed, max_players=n_players)
+    for i in range(n_players):
+        game.add_player(f"p{i}")
+    game.start_game()
+    return game
+
+
+def hand(game: Game, player_id: str) -> bytes:
+    return game.state.players[game.players[player_id]].hand
+
+
+def test_waiting_game_has_no_engine_state():
+    game = Game("g1", seed=1)
+    assert game.add_player("p0") and not game.add_player("p0")
+    game.start_game()  # Um jogador só não começa
+    assert game.state is None and game.game_state == GameState.WAITING_FOR_PLAYERS
+    assert game.current_turn_player_id is None and game.pending_action is None
+    assert game.get_private_state("p0")["my_monsters"] == []
+
+
+def test_table_is_limited_to_max_players():
+    game = Game("g1", seed=1, max_players=3)
+    assert [game.add_player(f"p{i}") for i in range(4)] == [True, True, True, False]
+    with pytest.raises(ValueError):
+        Game("g2", max_players=MAX_PLAYERS + 1)
+
+
+def test_seed_determines_the_game():
+    assert started_game(seed=8).state == started_game(seed=8).state
+
+
+def test_turn_actions_by_name():
+    game = started_game()
+    current = game.current_turn_player_id
+    game.handle_action(current, "Treinar")
+    assert game.state.players[game.players[current]].coins == engine.STARTING_COINS + 1
+    assert game.current_turn_player_id != current
+
+    game.handle_action(game.current_turn_player_id, "Não existe")
+    assert len(game.history) == 1
+
+
+def test_claim_response_and_choice_by_name():
+    game = started_game()
+    source = game.current_turn_player_id
+    other = next(pid for pid in game.player_ids if pid != source)
+    game.handle_action(source, "Dragão", other)
+    assert game.game_state == GameState.AWAITING_RESPONSE
+    assert game.pending_action == {
+        "action": "Dragão", "source_player_id": source, "target_player_id": other, "passed_player_ids": [],
+    }
+
+    game.resolve_pending_action(other)  # Deixa passar
+    assert game.game_state == GameState.AWAITING_CHOICE and game.player_to_choose == other
+
+    game.handle_player_choice(source, "Golem")  # Não é a vez dele de escolher
+    assert game.game_state == GameState.AWAITING_CHOICE
+    lost = engine.MONSTER_NAMES[hand(game, other)[0]]
+    game.handle_player_choice(other, lost)
+    assert game.get_public_state()["players"][other]["revealed_monsters"] == [lost]
+    assert game.current_turn_player_id == other
+
+
+def test_golem_block_and_challenge_by_name():
+    game = started_game()
+    source = game.current_turn_player_id
+    other = next(pid for pid in game.player_ids if pid != source)
+    game.handle_action(source, "Caçar")
+    game.resolve_pending_action(other, block_with="Golem")
+    assert game.game_state == GameState.IN_PROGRESS and game.current_turn_player_id == other
+
+    game.handle_action(other, "Slime")
+    game.resolve_pending_action(source, contested=True)
+    assert game.game_state == GameState.AWAITING_CHOICE
+    has_slime = engine.Card.SLIME in game.history[-1][0].players[game.players[other]].hand
+    assert game.player_to_choose == (source if has_slime else other)
+
+
+def test_falcao_swap_is_flagged_in_the_pending_action():
+    game = started_game()
+    source = game.current_turn_player_id
+    other = next(pid for pid in game.player_ids if pid != source)
+    game.handle_action(source, "Falcão")
+    game.resolve_pending_action(other)
+    assert game.player_to_choose == source
+    assert game.pending_action["is_swap"] is True
+
+
+def test_passed_player_ids_with_more_than_two_players():
+    game = started_game(4)
+    source = game.current_turn_player_id
+    others = [pid for pid in game.player_ids if pid != source]
+    game.handle_action(source, "Slime")
+    game.resolve_pending_action(others[1])
+    assert game.game_state == GameState.AWAITING_RESPONSE
+    assert game.pending_action["passed_player_ids"] == [others[1]]
+
+
+def test_private_state_adds_only_the_players_hand():
+    game = started_game()
+    public = game.get_public_state()
+    assert "my_monsters" not in public
+    private = game.get_private_state("p0")
+    assert private.pop("my_monsters") == [engine.MONSTER_NAMES[c] for c in hand(game, "p0")]
+    assert private == public
+    assert game.get_private_state("stranger") == {}
+
+
+def test_versions_only_grow_on_real_changes():
+    game = started_game()
+    version = game.version
+    game.handle_action(game.current_turn_player_id, "Treinar")
+    assert game.version == version + 1
+    game.handle_action("p0" if game.current_turn_player_id == "p1" else "p1", "Treinar")  # Fora da vez
+    assert game.version == version + 1
+
+
+def test_public_state_is_built_only_when_a_version_is_read(monkeypatch):
+    game = started_game()
+    built = []
+    original = Game.get_public_state
+    monkeypatch.setattr(Game, "get_public_state", lambda self: built.append(self.version) or original(self))
+    idle = "p0" if game.current_turn_player_id == "p1" else "p1"
+    for _ in range(3):
+        game.handle_action(idle, "Treinar")  # Fora da vez: recusada, sem versão nova
+    game.handle_action(game.current_turn_player_id, "Treinar")
+    game.handle_action(game.current_turn_player_id, "Treinar")
+    assert built == []
+    game.get_state_update("p0")
+    game.get_state_update("p1")
+    game.spectator_update()
+    assert built == [game.version]  # Uma vez, para todos os destinatários
+
+
+def test_every_turn_action_name_maps_to_a_legal_engine_action():
+    names = {"Treinar", "Caçar", "Golpe Final"} | {engine.MONSTER_NAMES[c] for c in engine.CLAIMABLE}
+    assert set(TURN_ACTIONS) == names
@@ -0,0 +1,41 @@
+# tests/test_policies.py
+import random
+
+from app.core import engine
+from app.core.engine import ActionKind
+from app.sim.policies import POLICIES, next_action
+
+
+def test_each_responder_is_polled_once_per_pending_action():
+    for seed in range(20):
+        polled = []  # Assentos consultados desde que a ação pendente atual começou
+        episode = None
+
+        def policy(state, seat, actions, rng):
+            if state.phase == engine.Phase.AWAITING_RESPONSE:
+                polled.append(seat)
+            return POLICIES["bluffer"](state, seat, actions, rng)
+
+        state, rng = engine.new_game(4, seed), random.Random(seed)
+        while state.phase != engine.Phase.FINISHED:
+            current = state.pending._replace(passed=0) if state.phase == engine.Phase.AWAITING_RESPONSE else None
+            if current != episode:
+                episode, polled = current, []
+            action = next_action(state, [policy] * 4, rng)
+            assert action in engine.legal_actions(state)
+            state = engine.apply(state, action)
+            assert len(polled) == len(set(polled))
+
+
+def test_responders_answer_in_seat_order_after_the_ones_that_passed():
+    start = engine.new_game(4, 7)
+    state = engine.apply(start, engine.Action(ActionKind.ABILITY, start.turn, -1, engine.Card.SLIME))
+    assert state.phase == engine.Phase.AWAITING_RESPONSE
+    responders = engine.acting_players(state)
+    allow = [lambda s, seat, actions, rng: engine.Action(ActionKind.ALLOW, seat)] * 4
+    order = []
+    while state.phase == engine.Phase.AWAITING_RESPONSE:
+        action = next_action(state, allow, random.Random(0))
+        order.append(action.actor)
+        state = engine.apply(state, action)
+    assert order == responders
@@ -0,0 +1,37 @@
+# tests/test_profiler.py
+import signal
+
+import pytest
+
+from app.core.profiler import SamplingProfiler
+
+pytestmark = pytest.mark.skipif(not hasattr(signal, "setitimer"), reason="needs signal.setitimer")
+
+
+@pytest.fixture
+def own_handler():
+    def handler(signum, frame):
+        pass
+
+    previous = signal.signal(signal.SIGPROF, handler)
+    yield handler
+    signal.signal(signal.SIGPROF, previous)
+
+
+def test_stop_of_an_unprofiled_game_leaves_sigprof_alone(own_handler):
+    profiler = SamplingProfiler()
+    assert profiler.stop("g1") == ""
+    assert signal.getsignal(signal.SIGPROF) is own_handler
+
+
+def test_stop_restores_the_handler_only_after_the_last_game(own_handler):
+    profiler = SamplingProfiler()
+    profiler.start("g1")
+    profiler.start("g2")
+    profiler.stop("g1")
+    assert signal.getsignal(signal.SIGPROF) == profiler._sample
+    profiler.stop("g2")
+    assert signal.getsignal(signal.SIGPROF) is own_handler
+    assert signal.getitimer(signal.ITIMER_PROF) == (0.0, 0.0)
+    profiler.stop("g2")  # De novo: nada mais a restaurar
+    assert signal.getsignal(signal.SIGPROF) is own_handler
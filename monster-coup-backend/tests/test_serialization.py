@@ -0,0 +1,91 @@
+# tests/test_serialization.py
+import json
+import random
+
+import pytest
+
+from app.ai.bots import action_to_message
+from app.core import engine, models, serialization
+from app.core.models import Game
+from app.core.serialization import EncodedMessage, add_payload_fields, append_field, encode_message, splice_payload
+
+
+@pytest.fixture(params=sorted(serialization.ENCODERS), autouse=True)
+def encoder(request, monkeypatch):
+    # O mesmo texto com orjson e com o json da stdlib (o que o servidor usa sem orjson instalado).
+    dumps = serialization.ENCODERS[request.param]
+    monkeypatch.setattr(serialization, "dumps", dumps)
+    monkeypatch.setattr(models, "dumps", dumps)
+    return request.param
+
+
+def played_games(apply_message, seed: int, n_players: int):
+    """Cada versão de um jogo aleatório, com jogadores de ids não ASCII."""
+    rng = random.Random(seed)
+    game = Game("jogo-ç", seed=seed, max_players=n_players)
+    for i in range(n_players):
+        game.add_player(f"jogador-{i}-ã")
+    game.start_game()
+    yield game
+    while game.state.phase != engine.Phase.FINISHED:
+        action = rng.choice(engine.legal_actions(game.state))
+        apply_message(game, game.player_ids[action.actor], action_to_message(game, action))
+        yield game
+
+
+@pytest.mark.parametrize("n_players", [2, 6])
+def test_spliced_snapshots_match_the_freshly_built_state(n_players, apply_message):
+    for game in played_games(apply_message, seed=1, n_players=n_players):
+        public = game.get_public_state()
+        assert json.loads(game.get_public_json()) == public
+        assert json.loads(game.public_message("GAME_START").text) == {"type": "GAME_START", "payload": public}
+        spectator = game.spectator_update()
+        assert json.loads(spectator.text) == {"type": "GAME_STATE_UPDATE", "version": game.version, "payload": public}
+        for player_id in game.player_ids:
+            game.sync_player(player_id, None)  # Força o snapshot completo
+            message = game.get_state_update(player_id, "PRIVATE_STATE")
+            assert isinstance(message, EncodedMessage)
+            assert (message.type, message.version) == ("PRIVATE_STATE", game.version)
+            assert json.loads(message.text) == {
+                "type": "PRIVATE_STATE", "version": game.version, "payload": game.get_private_state(player_id),
+            }
+
+
+def test_public_state_is_encoded_once_per_version(apply_message):
+    games = played_games(apply_message, 3, 4)
+    game = next(games)
+    first_json, first_snapshot = game.get_public_json(), game.spectator_update()
+    assert game.get_public_json() is first_json
+    assert game.spectator_update() is first_snapshot
+    version = game.version
+    next(games)  # Uma ação aceita: nova versão
+    assert game.version == version + 1
+    assert game.get_public_json() is not first_json
+    assert json.loads(game.get_public_json()) == game.get_public_state() != json.loads(first_json)
+    assert json.loads(game.spectator_update().text)["version"] == game.version
+
+
+def test_rebase_drops_the_encoded_state(apply_message):
+    game = next(played_games(apply_message, 4, 2))
+    encoded = game.get_public_json()
+    game.state = engine.apply(game.state, engine.legal_actions(game.state)[0])
+    game.version += 1
+    game.rebase_history()  # Como a recuperação do log faz depois da replay
+    assert game.get_public_json() is not encoded
+    assert json.loads(game.get_public_json()) == game.get_public_state()
+
+
+def test_fields_are_appended_without_reencoding():
+    message = encode_message({"type": "PLAYER_DISCONNECTED", "player_id": "jogador-ã"})
+    stamped = append_field(message, "seq", 41)
+    assert json.loads(stamped.text) == {"type": "PLAYER_DISCONNECTED", "player_id": "jogador-ã", "seq": 41}
+    assert stamped.shared is message.shared and message.shared.text == message.text
+
+    spliced = splice_payload("PRIVATE_STATE", '{"a":1}', 7)
+    private = append_field(add_payload_fields(spliced, my_monsters=["Falcão", "Golem"]), "seq", 42)
+    assert json.loads(private.text) == {
+        "type": "PRIVATE_STATE", "version": 7, "payload": {"a": 1, "my_monsters": ["Falcão", "Golem"]}, "seq": 42,
+    }
+    assert private.shared is spliced.shared
+    assert private.payload_fields == (("my_monsters", ["Falcão", "Golem"]),) and private.fields == (("seq", 42),)
+    assert splice_payload("GAME_START", '{"a":1}').text == '{"type":"GAME_START","payload":{"a":1}}'
@@ -0,0 +1,95 @@
+# tests/test_session.py
+import asyncio
+
+from app import schemas
+from app.ai.bots import bot_manager
+from app.core.connection_manager import Resume
+from app.core.session import MessageStream
+
+
+def test_player_disconnected_only_when_the_last_socket_closes(make_manager):
+    async def scenario():
+        sent = []
+        manager = make_manager(deliver=lambda game_id, outbound: sent.extend(outbound))
+        game_id = await manager.new_game()
+        for player_id in ("p1", "p2"):
+            await manager.submit(game_id, "join", player_id)
+
+        def disconnects():
+            return [m for _, m in sent if getattr(m, "type", None) == "PLAYER_DISCONNECTED"]
+
+        # Reconexão: o socket novo conecta antes do antigo sair.
+        assert await manager.submit(game_id, "connect", "p1")
+        assert await manager.submit(game_id, "connect", "p1")
+        await manager.submit(game_id, "disconnect", "p1")
+        assert disconnects() == []
+        await manager.submit(game_id, "disconnect", "p1")
+        assert len(disconnects()) == 2  # Uma cópia por jogador da mesa
+        assert "p1" not in manager.sessions[game_id].connections
+
+    asyncio.run(scenario())
+
+
+def seq_of(message) -> int:
+    return message["seq"] if isinstance(message, dict) else dict(message.fields)["seq"]
+
+
+def test_stream_returns_only_the_messages_after_seq():
+    stream = MessageStream(size=3)
+    first = stream.seq
+    for i in range(5):
+        stream.stamp({"type": "ERROR", "message": str(i)})
+    assert [m["message"] for m in stream.since(first + 3)] == ["3", "4"]
+    assert stream.since(stream.seq) == []
+    assert stream.since(first + 1) is None  # Já saiu do buffer
+    assert stream.since(stream.seq + 1) is None  # Seq de outro stream (ou do futuro)
+
+
+def test_resume_replays_the_missed_messages_or_syncs_the_state(make_manager):
+    async def scenario():
+        sent = []
+        manager = make_manager(deliver=lambda game_id, outbound: sent.extend(outbound))
+        game_id = await manager.new_game()
+        for player_id in ("p1", "p2"):
+            await manager.submit(game_id, "join", player_id)
+        received = [m for pid, m in sent if pid == "p1"]
+        stream = manager.sessions[game_id].streams["p1"]
+
+        sent.clear()
+        await manager.submit(game_id, "resume", "p1", 7, seq_of(received[0]), None)
+        (_, resume), = sent
+        assert isinstance(resume, Resume) and resume.connection_id == 7 and resume.replay
+        assert [seq_of(m) for m in resume.messages] == [seq_of(m) for m in received[1:]]
+
+        sent.clear()
+        await manager.submit(game_id, "resume", "p1", 8, stream.seq - len(stream.buffer) - 1, None)
+        (_, resume), = sent
+        assert not resume.replay
+        (message,) = resume.messages
+        assert message.type == "PRIVATE_STATE" and seq_of(message) == stream.seq
+
+    asyncio.run(scenario())
+
+
+def test_stop_cancels_the_bots_still_thinking(make_manager, monkeypatch):
+    async def think_forever(game, bot):
+        await asyncio.Event().wait()
+
+    async def scenario():
+        monkeypatch.setattr(bot_manager, "choose_message", think_forever)
+        manager = make_manager()
+        game_id = await manager.new_game()
+        await manager.submit(game_id, "join", "p1")
+        await manager.submit(game_id, "add_bot")
+        session = manager.sessions[game_id]
+        if session.game.current_turn_player_id == "p1":  # O bot só pensa na vez dele
+            train = schemas.client_message.validate_python({"type": "PLAYER_ACTION", "payload": {"action": "Treinar"}})
+            await manager.submit(game_id, "message", "p1", train)
+        await asyncio.sleep(0)
+        tasks = set(session._bot_tasks)
+        assert len(tasks) == 1
+        manager.evict(game_id, "idle")
+        await asyncio.sleep(0.01)
+        assert all(task.cancelled() for task in tasks) and not session._bot_tasks
+
+    asyncio.run(scenario())
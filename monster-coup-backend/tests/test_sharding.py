@@ -0,0 +1,90 @@
+# tests/test_sharding.py
+import asyncio
+import os
+import signal
+import time
+
+import pytest
+
+from app.core.session import GameError
+from app.core.sharding import ShardedGameManager, shard_for
+
+
+@pytest.fixture(autouse=True)
+def no_event_log(monkeypatch):
+    # Os workers são processos spawn: leem a configuração do ambiente herdado.
+    monkeypatch.setenv("MONSTER_COUP_EVENT_LOG_DIR", "")
+
+
+def test_dead_shard_fails_pending_and_later_requests():
+    async def scenario():
+        manager = ShardedGameManager(2)
+        await manager.start()
+        try:
+            game_id = await manager.new_game()
+            await manager.submit(game_id, "join", "p1")
+            shard = shard_for(game_id, 2)
+            process = manager._processes[shard]
+
+            # Worker parado: os envios enchem o Pipe, mas o event loop da frente não pode travar.
+            os.kill(process.pid, signal.SIGSTOP)
+            pending = [asyncio.create_task(manager.submit(game_id, "join", "x" * 100_000 + str(i))) for i in range(100)]
+            started = time.perf_counter()
+            await asyncio.sleep(0.01)
+            assert time.perf_counter() - started < 0.5
+
+            os.kill(process.pid, signal.SIGKILL)
+            results = await asyncio.wait_for(asyncio.gather(*pending, return_exceptions=True), 10)
+            assert all(isinstance(r, GameError) and r.status_code == 503 for r in results)
+
+            with pytest.raises(GameError) as exc:
+                await asyncio.wait_for(manager.submit(game_id, "join", "p2"), 1)
+            assert exc.value.status_code == 503
+            # Jogos novos vão para o shard que continua vivo, e as estatísticas ignoram o morto.
+            other = await asyncio.wait_for(manager.new_game(), 10)
+            assert shard_for(other, 2) != shard
+            assert (await manager.stats())["lost_shards"] == [shard]
+        finally:
+            await manager.stop()
+
+    asyncio.run(scenario())
+
+
+def test_worker_keeps_running_games_while_the_front_is_not_reading(monkeypatch):
+    from multiprocessing import Pipe
+
+    from app import config
+    from app.core.sharding import _serve
+
+    monkeypatch.setattr(config, "EVENT_LOG_DIR", "")
+
+    async def scenario():
+        front, worker = Pipe()
+        serving = asyncio.create_task(_serve(worker, 0))
+        # Mesas de 6 com ids longos: as entregas somam megabytes, bem mais que o buffer do Pipe.
+        requests = [(i * 7 + p, f"g{i}", "create", (6,)) if p == 0 else (i * 7 + p, f"g{i}", "join", (f"{p}-" + "x" * 2000,))
+                    for i in range(100) for p in range(7)]
+        sending = asyncio.get_running_loop().run_in_executor(None, lambda: [front.send(r) for r in requests])
+        for _ in range(50):
+            started = time.perf_counter()
+            await asyncio.sleep(0.01)
+            assert time.perf_counter() - started < 0.5  # O event loop do worker nunca trava num send
+
+        await sending
+        received = await asyncio.get_running_loop().run_in_executor(None, drain, front, len(requests))
+        assert received == len(requests)
+        front.send(None)
+        await asyncio.wait_for(serving, 10)
+
+    asyncio.run(scenario())
+
+
+def drain(conn, requests: int) -> int:
+    # Lê tudo o que o worker mandou até chegarem os resultados de todos os pedidos.
+    results = 0
+    while results < requests:
+        message = conn.recv()
+        if message is not None and message[0] == "result":
+            assert message[2], message
+            results += 1
+    return results
@@ -0,0 +1,62 @@
+# tests/test_sim.py
+import numpy as np
+import pytest
+
+from app.core.models import MAX_PLAYERS
+from app.sim.__main__ import main
+from app.sim.runner import HAND_LABELS, iter_results, run_simulation
+
+
+def simulate(capsys, *argv: str) -> list:
+    main(list(argv))
+    # Sem a linha com o tempo e o número de workers, a única que pode mudar entre execuções.
+    return [line for line in capsys.readouterr().out.splitlines() if not line.startswith("workers:")]
+
+
+@pytest.mark.parametrize("n_players, policies", [(2, "honest"), (4, "honest,bluffer,random")])
+def test_results_do_not_depend_on_the_number_of_workers(n_players, policies):
+    args = (120, n_players, policies.split(","), 7)
+    serial = list(iter_results(*args, workers=1, chunk_size=50))
+    parallel = list(iter_results(*args, workers=3, chunk_size=7))
+    assert [r.index for r in parallel] == list(range(120))
+    for a, b in zip(serial, parallel):
+        assert a._replace(actions=None) == b._replace(actions=None)
+        assert np.array_equal(a.actions, b.actions)
+
+
+def test_report_is_identical_for_one_and_many_workers(capsys):
+    args = ("--games", "200", "--players", "3", "--seed", "5", "--chunk-size", "30")
+    assert simulate(capsys, *args, "--workers", "1") == simulate(capsys, *args, "--workers", "4")
+
+
+@pytest.mark.parametrize("n_players", [2, 5])
+def test_counters_add_up(n_players):
+    stats = run_simulation(300, n_players, ["honest", "random"], seed=3, workers=2, chunk_size=64)
+    assert stats.games == 300
+    assert stats.lengths.sum() == 300
+    assert stats.position_wins.sum() + stats.unfinished == 300
+    assert stats.hand_wins.sum() == stats.position_wins.sum()
+    assert stats.hand_games.sum() == 300 * n_players
+    # Cada ação jogada cai numa célula da tabela de frequências.
+    assert stats.action_counts.sum() == np.dot(np.arange(stats.lengths.size), stats.lengths)
+    assert stats.action_frequencies().sum() == pytest.approx(1)
+    assert np.all(stats.hand_win_rates() <= 1)
+
+
+def test_games_out_writes_one_line_per_game(tmp_path, capsys):
+    path = tmp_path / "games.txt"
+    simulate(capsys, "--games", "150", "--players", "3", "--workers", "2", "--chunk-size", "40", "--games-out", str(path))
+    lines = path.read_text().splitlines()
+    assert len(lines) == 150
+    for index, line in enumerate(lines):
+        game, seed, winner, first_player, length, *hands = line.split()
+        assert int(game) == index
+        assert -1 <= int(winner) < 3 and 0 <= int(first_player) < 3 and int(length) > 0
+        assert len(hands) == 3 and set(hands) <= set(HAND_LABELS)
+
+
+def test_players_are_limited_to_the_server_table_size(capsys):
+    simulate(capsys, "--games", "2", "--players", str(MAX_PLAYERS), "--workers", "1")
+    with pytest.raises(SystemExit):
+        main(["--games", "2", "--players", str(MAX_PLAYERS + 1)])
+    assert "invalid choice" in capsys.readouterr().err
@@ -0,0 +1,169 @@
+# tests/test_spectators.py
+import asyncio
+import json
+import random
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.ai.bots import action_to_message
+from app.core import engine, wire
+from app.core.connection_manager import ConnectionManager, SpectatorGroup, SpectatorUpdate
+from app.core.game_manager import GameManager
+from app.core.serialization import splice_payload
+
+
+def versions(socket) -> list:
+    return [json.loads(data)["version"] for _, data in socket.sent]
+
+
+def update(version: int):
+    return splice_payload("GAME_STATE_UPDATE", f'{{"n":{version}}}', version)
+
+
+async def publish(group: SpectatorGroup, versions, every: float):
+    for version in versions:
+        group.publish(update(version))
+        await asyncio.sleep(every)
+
+
+def test_slow_spectator_skips_versions_instead_of_queuing_them(fake_socket):
+    async def scenario():
+        group = SpectatorGroup(delay=0, min_interval=0, send_timeout=5)
+        fast, slow = fake_socket(), fake_socket(delay=0.05)
+        group.add(fast, lambda: None)
+        group.add(slow, lambda: None)
+        await publish(group, range(1, 41), 0.005)
+        await asyncio.sleep(0.15)
+        assert versions(fast)[-1] == versions(slow)[-1] == 40
+        assert len(versions(slow)) < len(versions(fast)) / 2
+        assert versions(slow) == sorted(set(versions(slow)))  # Sempre para a frente, sem repetir
+
+    asyncio.run(scenario())
+
+
+def test_min_interval_between_sends(fake_socket):
+    async def scenario():
+        group = SpectatorGroup(delay=0, min_interval=0.05, send_timeout=5)
+        socket = fake_socket()
+        group.add(socket, lambda: None)
+        await publish(group, range(1, 21), 0.01)
+        await asyncio.sleep(0.1)
+        times = [at for at, _ in socket.sent]
+        assert all(b - a >= 0.045 for a, b in zip(times, times[1:]))
+        assert len(times) < 20 and versions(socket)[-1] == 20
+
+    asyncio.run(scenario())
+
+
+def test_delay_holds_each_version_back(fake_socket):
+    async def scenario():
+        group = SpectatorGroup(delay=0.1, min_interval=0, send_timeout=5)
+        socket = fake_socket()
+        group.add(socket, lambda: None)
+        published = time.perf_counter()
+        group.publish(update(1))
+        await asyncio.sleep(0.05)
+        assert socket.sent == []
+        await asyncio.sleep(0.1)
+        assert versions(socket) == [1] and socket.sent[0][0] - published >= 0.095
+
+    asyncio.run(scenario())
+
+
+def test_watchdog_drops_a_stalled_spectator_only(fake_socket):
+    async def scenario():
+        manager = ConnectionManager(send_timeout=0.1, spectator_delay=0, spectator_min_interval=0)
+        stalled, healthy = fake_socket(stall=True), fake_socket()
+        for socket in (stalled, healthy):
+            await manager.spectate(socket, "g1")
+        group = manager.spectators["g1"]
+        group.publish(update(1))
+        await asyncio.sleep(0.3)
+        assert stalled not in group.connections and healthy in group.connections
+        assert not manager.stop_spectating("g1", stalled)  # Já removido pelo watchdog
+        group.publish(update(2))
+        await asyncio.sleep(0.05)
+        assert versions(healthy) == [1, 2]
+        assert manager.stop_spectating("g1", healthy)
+        assert "g1" not in manager.spectators
+
+    asyncio.run(scenario())
+
+
+def test_binary_spectators_share_one_frame_per_version(fake_socket):
+    async def scenario():
+        group = SpectatorGroup(delay=0, min_interval=0, send_timeout=5)
+        sockets = [fake_socket() for _ in range(3)]
+        for socket in sockets:
+            group.add(socket, lambda: None, binary=True)
+        group.publish(update(1))
+        await asyncio.sleep(0.02)
+        frames = [socket.sent[0][1] for socket in sockets]
+        assert frames[0] is frames[1] is frames[2]
+        assert wire.unpack(frames[0]) == {"type": "GAME_STATE_UPDATE", "version": 1, "payload": {"n": 1}}
+
+    asyncio.run(scenario())
+
+
+def test_spectator_updates_never_carry_a_hand(make_manager):
+    async def scenario():
+        published = []
+        manager = make_manager(deliver=lambda game_id, outbound: published.extend(
+            m.message for _, m in outbound if isinstance(m, SpectatorUpdate)
+        ))
+        game_id = await manager.new_game(3)
+        await manager.submit(game_id, "spectate")
+        for player_id in ("p0", "p1", "p2"):
+            await manager.submit(game_id, "join", player_id)
+        game, rng = manager.get_game(game_id), random.Random(2)
+        while game.state.phase != engine.Phase.FINISHED:
+            action = rng.choice(engine.legal_actions(game.state))
+            await manager.submit(game_id, "message", game.player_ids[action.actor], action_to_message(game, action))
+        # Uma publicação por comando que mudou o jogo, até a última versão.
+        versions = [m.version for m in published]
+        assert versions == sorted(set(versions)) and versions[-1] == game.version
+        for message in published:
+            assert "my_monsters" not in message.text
+            assert "my_monsters" not in json.dumps(wire.unpack(wire.pack(message)))
+        await manager.stop()
+
+    asyncio.run(scenario())
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # O app de verdade, com um GameManager sem log de eventos e sem reaper no lugar do global.
+    manager = GameManager(reaper_interval=0, log_dir="")
+    monkeypatch.setattr(main, "game_manager", manager)
+    with TestClient(main.app) as client:
+        yield client, manager
+
+
+def wait_for(condition, timeout: float = 2):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_spectate_and_unspectate_stay_balanced(client):
+    client, manager = client
+    game_id = client.post("/create-game").json()["game_id"]
+    session = manager.sessions[game_id]
+    with client.websocket_connect(f"/ws/{game_id}/spectate") as first:
+        with client.websocket_connect(f"/ws/{game_id}/spectate") as second:
+            for ws in (first, second):
+                assert ws.receive_json()["type"] == "GAME_STATE_UPDATE"
+            wait_for(lambda: session.spectators == 2)
+        wait_for(lambda: session.spectators == 1)
+    wait_for(lambda: session.spectators == 0)
+    assert game_id not in main.connection_manager.spectators
+
+    # Jogo inexistente: o socket é recusado e nenhum contador muda.
+    with client.websocket_connect("/ws/nope/spectate") as ws:
+        with pytest.raises(Exception):
+            ws.receive_json()
+    assert session.spectators == 0 and "nope" not in main.connection_manager.spectators
@@ -0,0 +1,144 @@
+# tests/test_wire.py
+import random
+
+import msgpack
+import pytest
+
+from app.ai.bots import action_to_message
+from app.core import engine, wire
+from app.core.models import Game
+from app.core.serialization import EncodedMessage, append_field, dumps, loads
+from app.schemas import ChooseMonster, PlayerAction, Sync, client_message, server_message
+
+
+def server_messages(apply_message, n_players: int, seed: int) -> list:
+    """Tudo o que o servidor manda num jogo aleatório: snapshots, deltas, estado dos espectadores e erros."""
+    rng = random.Random(seed)
+    game = Game("g1", seed=seed, max_players=n_players)
+    for i in range(n_players):
+        game.add_player(f"p{i}")
+    game.start_game()
+    messages = [game.public_message("GAME_START")]
+    messages += [append_field(game.get_state_update(pid, "PRIVATE_STATE"), "seq", 1) for pid in game.player_ids]
+    while game.state.phase != engine.Phase.FINISHED:
+        action = rng.choice(engine.legal_actions(game.state))
+        apply_message(game, game.player_ids[action.actor], action_to_message(game, action))
+        messages += [dict(update, seq=2) for pid in game.player_ids if (update := game.get_state_update(pid))]
+        messages.append(game.spectator_update())
+    messages += [{"type": "ERROR", "message": "Invalid action or not your turn.", "seq": 3},
+                 {"type": "PLAYER_DISCONNECTED", "player_id": "p1", "seq": 4},
+                 {"type": "MATCH_FOUND", "game_id": "g1", "size": n_players}]
+    return messages
+
+
+def as_dict(message) -> dict:
+    return loads(message.text) if isinstance(message, EncodedMessage) else message
+
+
+@pytest.mark.parametrize("n_players, seed", [(2, 1), (6, 2)])
+def test_server_messages_match_the_schemas_and_survive_msgpack(n_players, seed, apply_message):
+    for message in server_messages(apply_message, n_players, seed):
+        data = as_dict(message)
+        text = message.text if isinstance(message, EncodedMessage) else dumps(message)
+        assert server_message.validate_json(text) == server_message.validate_python(data)
+        frame = wire.pack(message)
+        assert wire.unpack(frame) == data
+        assert len(frame) < len(text.encode())
+
+
+def test_compact_uses_small_integer_codes():
+    game = Game("g1", seed=3)
+    game.add_player("p0")
+    game.add_player("p1")
+    game.start_game()
+    compacted = msgpack.unpackb(wire.pack(game.get_state_update("p0", "PRIVATE_STATE")))
+    assert compacted["type"] == wire.MESSAGE_TYPES.index("PRIVATE_STATE")
+    assert compacted["payload"]["game_state"] == wire.GAME_STATES.index("IN_PROGRESS")
+    assert all(isinstance(card, int) for card in compacted["payload"]["my_monsters"])
+    delta = {"type": "GAME_STATE_DELTA", "base_version": 1, "version": 2, "patch": [
+        {"op": "replace", "path": "/game_state", "value": "FINISHED"},
+        {"op": "replace", "path": "/players/p0/revealed_monsters", "value": ["Golem"]},
+        {"op": "remove", "path": "/pending_action"},
+    ]}
+    patch = wire.compact(delta)["patch"]
+    assert patch[0] == {"op": wire.PATCH_OPS.index("replace"), "path": "/game_state", "value": wire.GAME_STATES.index("FINISHED")}
+    assert patch[1]["value"] == [wire.MONSTERS.index("Golem")]
+    assert wire.expand(wire.compact(delta)) == delta
+
+
+@pytest.mark.parametrize("message", [
+    {"type": "PLAYER_ACTION", "payload": {"action": "Dragão", "target_player_id": "p1"}},
+    {"type": "PLAYER_ACTION", "payload": {"action": "Treinar"}},
+    {"type": "ACTION_RESPONSE", "payload": {"contested": True}},
+    {"type": "ACTION_RESPONSE", "payload": {"block_with": "Golem"}},
+    {"type": "ACTION_RESPONSE"},
+    {"type": "CHOOSE_MONSTER", "payload": {"monster_name": "Falcão"}},
+    {"type": "SYNC", "payload": {"version": 7}},
+    {"type": "SYNC"},
+])
+def test_client_messages_decode_the_same_from_json_and_msgpack(message):
+    from_json = wire.decode(dumps(message))
+    assert from_json == wire.decode(msgpack.packb(wire.compact(message)))
+    assert from_json.type == message["type"]
+
+
+def test_decoded_messages_are_the_typed_models():
+    assert wire.decode('{"type": "SYNC"}') == Sync("SYNC")
+    action = wire.decode('{"type": "PLAYER_ACTION", "payload": {"action": "Slime"}}')
+    assert isinstance(action, PlayerAction) and action.payload.target_player_id is None
+    assert isinstance(wire.decode(msgpack.packb({"type": 2, "payload": {"monster_name": 4}})), ChooseMonster)
+
+
+@pytest.mark.parametrize("frame", [
+    "{not json",
+    '{"type": "NOPE"}',
+    '{"type": "PLAYER_ACTION", "payload": {"action": "Voar"}}',
+    '{"type": "PLAYER_ACTION"}',
+    '{"type": "SYNC", "payload": {"version": "x"}}',
+    '{"type": "SYNC", "payload": {"extra": 1}}',
+    '["PLAYER_ACTION"]',
+    b"\xc1\x00",
+    msgpack.packb({"type": 0, "payload": {"action": 99}}),
+    msgpack.packb({"type": {"nested": 1}}),
+    msgpack.packb([1, 2]),
+])
+def test_invalid_frames_raise_value_error_with_a_short_description(frame):
+    with pytest.raises(ValueError) as exc:
+        wire.decode(frame)
+    assert 0 < len(wire.describe(exc.value)) < 200
+
+
+def test_negotiation_prefers_what_the_client_offers_first():
+    assert wire.negotiate([wire.MSGPACK, wire.JSON]) == wire.MSGPACK
+    assert wire.negotiate([wire.JSON, wire.MSGPACK]) == wire.JSON
+    assert wire.negotiate(["other"]) is None and wire.negotiate([]) is None
+    assert wire.is_binary(wire.MSGPACK) and not wire.is_binary(None)
+
+
+def test_client_schema_rejects_server_message_types():
+    with pytest.raises(ValueError):
+        client_message.validate_python({"type": "PRIVATE_STATE", "payload": {}})
+
+
+@pytest.mark.parametrize("n_players, seed", [(2, 4), (6, 5)])
+def test_pack_splices_recipient_fields_into_the_shared_conversion(n_players, seed, apply_message):
+    for message in server_messages(apply_message, n_players, seed):
+        if isinstance(message, EncodedMessage):
+            assert wire.pack(message) == msgpack.packb(wire.compact(loads(message.text)))
+
+
+def test_broadcast_is_converted_once_for_all_binary_recipients(monkeypatch):
+    game = Game("g1", seed=6, max_players=6)
+    for i in range(6):
+        game.add_player(f"p{i}")
+    game.start_game()
+    conversions = []
+    monkeypatch.setattr(wire, "loads", lambda text: conversions.append(text) or loads(text))
+    broadcast = game.public_message("GAME_START")
+    snapshots = [game.get_state_update(pid, "PRIVATE_STATE") for pid in game.player_ids]
+    frames = [wire.pack(append_field(m, "seq", seq)) for seq, m in enumerate([broadcast] * 6 + snapshots)]
+    assert len(conversions) == 2  # Um por mensagem comum: o broadcast e o snapshot da versão
+    assert [wire.unpack(f)["payload"]["my_monsters"] for f in frames[6:]] == [
+        game.get_private_state(pid)["my_monsters"] for pid in game.player_ids
+    ]
+    assert {wire.unpack(f)["seq"] for f in frames} == set(range(12))